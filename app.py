@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.security import OAuth2AuthorizationCodeBearer
@@ -10,19 +11,37 @@ from google.genai import types
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow, InstalledAppFlow
 from google.auth.transport.requests import Request as GoogleRequest
-from googleapiclient.discovery import build
+from google_services import service_pool, credential_identity
+from calendar_sync import sync_deadlines, format_report as format_calendar_report
+from calendar_cache import calendar_cache
+from credential_store import CredentialStore
+from conversation_store import ConversationStore, SUMMARY_PROMPT
+from response_cache import ResponseCache
+from tool_registry import ToolRegistry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import datetime as dt
+import asyncio
+import functools
 import os
+import sys
 import json
 import requests
 
+# The vectorDatabase scripts import each other as top-level modules
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorDatabase"))
+from vectorStore import VectorStore, make_embedder
+from deadlineStore import DeadlineStore, ASSIGNMENTS_FILE, QUIZZES_FILE
+
 app = FastAPI()
 load_dotenv()
 
 # API Keys and credentials
 # API Keys and credentials
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")  # override for local stub servers
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_SUMMARY_MODEL = os.getenv("GEMINI_SUMMARY_MODEL", GEMINI_MODEL)
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("REDIRECT_URI", "http://localhost:8000/auth/callback")
@@ -42,8 +61,31 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
 )
 
 # Gemini client
-genai_client = genai.Client(api_key=GEMINI_API_KEY)
-genai_client = genai.Client(api_key=GEMINI_API_KEY)
+genai_client = genai.Client(
+    api_key=GEMINI_API_KEY,
+    http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None,
+)
+
+# Google API tools are blocking (googleapiclient/httplib2), so they run on a
+# bounded thread pool instead of the event loop
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+# Model/tool round trips allowed per /chat request before giving up
+MAX_AGENT_STEPS = int(os.getenv("MAX_AGENT_STEPS", "5"))
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+async def run_tool(func, *args, **kwargs):
+    """Run a blocking tool function on the tool thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tool_executor, functools.partial(func, *args, **kwargs))
+
+# Tools available to Gemini; declarations are derived from the decorated
+# functions below and the GenerateContentConfig is compiled once
+registry = ToolRegistry(
+    runner=run_tool,
+    context_params=("user_token", "credentials"),
+    default_timeout=TOOL_TIMEOUT_SECONDS,
+)
 
 # Models
 # Models
@@ -53,8 +95,14 @@ class ChatTurn(BaseModel):
     content: str
 
 class ChatRequest(BaseModel):
-    history: List[ChatTurn]
-    user_token: Optional[str] = None  # OAuth token for the user
+    history: List[ChatTurn] = []  # full history, for clients that keep it themselves
+    message: Optional[str] = None  # new user message of a server-side conversation
+    conversation_id: Optional[str] = None  # omit with `message` to start a conversation
+    session_id: Optional[str] = None  # returned by /auth/callback
+    user_token: Optional[str] = None  # OAuth token for the user, for clients without a session
+
+class LogoutRequest(BaseModel):
+    session_id: str
 
 class CalendarEvent(BaseModel):
     summary: str
@@ -93,11 +141,56 @@ def get_oauth_flow():
         scopes=["https://www.googleapis.com/auth/calendar"],
     )
 
+# OAuth credentials of signed-in users, kept encrypted and refreshed in the background
+credential_store = CredentialStore()
+
+@app.on_event("startup")
+def start_credential_refresh():
+    credential_store.start()
+
+@app.on_event("shutdown")
+def stop_credential_refresh():
+    credential_store.stop()
+
+def user_credentials(credentials: Optional[Credentials], user_token) -> Optional[Credentials]:
+    """Warm credentials from the session store, else built from what the client sent
+
+    `user_token` may be a bare access token or the authorized-user JSON
+    (string or dict) that /auth/callback used to return.
+    """
+    if credentials is not None:
+        return credentials
+    if not user_token:
+        return None
+    if isinstance(user_token, str) and user_token.lstrip().startswith("{"):
+        user_token = json.loads(user_token)
+    if isinstance(user_token, dict):
+        return Credentials(
+            token=user_token.get("token"),
+            refresh_token=user_token.get("refresh_token"),
+            token_uri=user_token.get("token_uri"),
+            client_id=user_token.get("client_id"),
+            client_secret=user_token.get("client_secret")
+        )
+    return Credentials(user_token)
+
+async def request_context(chat_request: ChatRequest) -> dict:
+    """Context values handed to the tools; an unknown session fails before any Gemini call"""
+    credentials = None
+    if chat_request.session_id:
+        # The lookup hits SQLite and may refresh an expired token over HTTP, so it runs off the loop
+        credentials = await run_tool(credential_store.get, chat_request.session_id)
+        if credentials is None:
+            raise HTTPException(status_code=401, detail="Unknown or expired session. Sign in again via /auth.")
+    return {"user_token": chat_request.user_token, "credentials": credentials}
+
 # Calendar API client setup
 def get_calendar_service(credentials):
-    return build("calendar", "v3", credentials=credentials)
+    """Lease a pooled Calendar service; use as `with get_calendar_service(creds) as service:`"""
+    return service_pool.service("calendar", "v3", credentials)
 
 # Tool functions
+@registry.tool(read_only=True)
 def say_hello_world():
     """Say hello world back to the user if the user asks for it
     Args:
@@ -107,53 +200,66 @@ def say_hello_world():
     """
     return "hello world tool call TEST"
 
+@registry.tool(read_only=True)
 def read_calendar_events(
     user_token: str,
     time_min: Optional[str] = None,
     time_max: Optional[str] = None,
     max_results: int = 10,
+    credentials: Optional[Credentials] = None,
 ) -> str:
-    """Fetch upcoming events from the user's primary calendar."""
-    if not user_token:
-        return "Error: A user OAuth token is required to read calendar events."
+    """List upcoming events from the user's Google Calendar
 
-    # Build credentials & service
-    creds = Credentials(user_token)
-    service = build("calendar", "v3", credentials=creds)
-
-    # Default to now if no time_min provided
-    now_iso = datetime.utcnow().isoformat() + 'Z'
-    events_result = (
-        service.events()
-               .list(
-                   calendarId='primary',
-                   timeMin=time_min or now_iso,
-                   timeMax=time_max,
-                   maxResults=max_results,
-                   singleEvents=True,
-                   orderBy='startTime',
-               )
-               .execute()
-    )
-    items = events_result.get('items', [])
-    if not items:
+    Args:
+        user_token: OAuth token for the user
+        time_min: ISO datetime (inclusive) to start listing from
+        time_max: ISO datetime (exclusive) to stop listing at
+        max_results: Maximum number of events to return
+
+    Returns:
+        A text list of the matching events
+    """
+    creds = user_credentials(credentials, user_token)
+    if creds is None:
+        return "Error: A user OAuth token is required to read calendar events."
+    try:
+        window_start = parse_event_time(time_min) if time_min else datetime.now(dt.timezone.utc)
+        window_end = parse_event_time(time_max) if time_max else None
+    except ValueError as e:
+        return f"Error: Invalid time range: {str(e)}"
+
+    # Served from the per-user event cache, which syncs incrementally when stale
+    events = calendar_cache.events(creds, window_start, window_end)
+    if not events:
         return "No upcoming events found."
+    items = events[:max(1, max_results)]
 
     # Format a simple text list
     lines = []
     for ev in items:
         start = ev['start'].get('dateTime', ev['start'].get('date'))
         lines.append(f"- {start}: {ev.get('summary', '(no title)')}")
+    if len(events) > len(items):
+        lines.append(f"... and {len(events) - len(items)} more")
     return "Here are your upcoming events:\n" + "\n".join(lines)
 
+def parse_event_time(value: str) -> datetime:
+    """ISO date or datetime as an aware datetime, UTC when no offset is given"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return parsed
+
+@registry.tool
 def create_calendar_event(
     summary: str,
     start_time: str,
     end_time: str,
-    description: str = None,
-    location: str = None,
-    attendees: List[str] = None,
+    description: Optional[str] = None,
+    location: Optional[str] = None,
+    attendees: Optional[List[str]] = None,
     user_token: str = None,
+    credentials: Optional[Credentials] = None,
 ) -> str:
     """Create a new event in the user's Google Calendar.
 
@@ -169,13 +275,11 @@ def create_calendar_event(
     Returns:
         A confirmation message with the event details and link
     """
-    if not user_token:
+    credentials = user_credentials(credentials, user_token)
+    if credentials is None:
         return "Error: User authentication token is required to create calendar events."
 
     try:
-        # Create credentials from the token
-        credentials = Credentials(user_token)
-        service = build("calendar", "v3", credentials=credentials)
 
         # Format event data
         event = {
@@ -198,7 +302,9 @@ def create_calendar_event(
             event['attendees'] = [{'email': email} for email in attendees]
 
         # Insert the event
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
+        with get_calendar_service(credentials) as service:
+            created_event = service.events().insert(calendarId='primary', body=event).execute()
+        calendar_cache.invalidate(credentials)
 
         # Return success message with link to event
         return f"Event created successfully! View it at: {created_event.get('htmlLink')}"
@@ -206,27 +312,39 @@ def create_calendar_event(
     except Exception as e:
         return f"Error creating calendar event: {str(e)}"
 
-def create_google_doc(title: str, description: str, time: Optional[str], user_token: str, download: bool = False) -> str:
-    if not user_token:
-        return "Error: User authentication token is required to create a document."
+@registry.tool
+def create_google_doc(
+    title: str,
+    description: str,
+    time: Optional[str] = None,
+    user_token: str = None,
+    download: bool = False,
+    credentials: Optional[Credentials] = None,
+) -> str:
+    """Create a new Google Doc with meeting details
+
+    Args:
+        title: Title of the document
+        description: Meeting details to write into the document
+        time: Timestamp to prefix the details with (defaults to now)
+        user_token: OAuth credentials for the user (JSON string or dict)
+        download: Whether the user wants to download the document
 
+    Returns:
+        The URL of the created document
+    """
     try:
-        creds = Credentials(
-            token=user_token.get("token"),
-            refresh_token=user_token.get("refresh_token"),
-            token_uri=user_token.get("token_uri"),
-            client_id=user_token.get("client_id"),
-            client_secret=user_token.get("client_secret")
-        )
-        drive_service = build("drive", "v3", credentials=creds)
-        doc_service = build("docs", "v1", credentials=creds)
+        creds = user_credentials(credentials, user_token)
+        if creds is None:
+            return "Error: User authentication token is required to create a document."
 
         # Create doc
         doc_metadata = {
             "name": title,
             "mimeType": "application/vnd.google-apps.document"
         }
-        doc = drive_service.files().create(body=doc_metadata).execute()
+        with service_pool.service("drive", "v3", creds) as drive_service:
+            doc = drive_service.files().create(body=doc_metadata).execute()
         doc_id = doc.get("id")
 
         if not doc_id:
@@ -244,13 +362,161 @@ def create_google_doc(title: str, description: str, time: Optional[str], user_to
                 }
             }
         ]
-        doc_service.documents().batchUpdate(documentId=doc_id, body={"requests": requests}).execute()
+        with service_pool.service("docs", "v1", creds) as doc_service:
+            doc_service.documents().batchUpdate(documentId=doc_id, body={"requests": requests}).execute()
         doc_url = f"https://docs.google.com/document/d/{doc_id}"
         return doc_url
 
     except Exception as e:
         return f"Error creating or updating document: {str(e)}"
 
+# Indexed Canvas course content (built by vectorDatabase/vectorStore.py)
+VECTOR_STORE_DIR = os.getenv(
+    "VECTOR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorDatabase", "index"),
+)
+_course_store = None
+_course_store_version = None
+
+def get_course_store() -> Optional[VectorStore]:
+    """The course index, reopened when it was rebuilt or grew; None until one has been built
+
+    Never creates an index: an empty one made here would pin the hashing
+    embedder for whatever index is built there later.
+    """
+    global _course_store, _course_store_version
+    meta_path = os.path.join(VECTOR_STORE_DIR, "meta.json")
+    vectors_path = os.path.join(VECTOR_STORE_DIR, "vectors.f32")
+    if not os.path.exists(meta_path):
+        _course_store = _course_store_version = None
+        return None
+    version = (
+        os.stat(meta_path).st_mtime_ns,
+        os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0,
+    )
+    if _course_store is None or version != _course_store_version:
+        _course_store = VectorStore(VECTOR_STORE_DIR)
+        _course_store_version = version
+    return _course_store
+
+@registry.tool(read_only=True)
+def search_course_content(query: str, top_k: int = 5, course_id: Optional[int] = None) -> str:
+    """Search the user's Canvas course material (syllabus, slides, announcements, module pages)
+
+    Args:
+        query: What to look for, in natural language
+        top_k: Number of passages to return
+        course_id: Only search this Canvas course
+
+    Returns:
+        The most relevant passages with their source
+    """
+    course_store = get_course_store()
+    if course_store is None:
+        return "Course content has not been indexed yet."
+
+    filters = {"course_id": course_id} if course_id is not None else {}
+    results = course_store.search(query, k=max(1, min(top_k, 20)), **filters)
+    if not results:
+        return "No matching course content found."
+    return "\n\n".join(
+        f"[{r['source']}: {r.get('title') or 'untitled'}"
+        f"{', p. ' + str(r['page']) if r.get('page') else ''}] {r['text']}" for r in results
+    )
+
+# Assignment/quiz deadlines written by vectorDatabase/main.py
+DEADLINES_DIR = os.getenv(
+    "DEADLINES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorDatabase"),
+)
+_deadline_store = None
+_deadline_mtimes = None
+
+def get_deadline_store() -> DeadlineStore:
+    """The deadline index, rebuilt only when the JSON files it was built from change"""
+    global _deadline_store, _deadline_mtimes
+    mtimes = tuple(
+        os.path.getmtime(path) if os.path.exists(path) else None
+        for path in (os.path.join(DEADLINES_DIR, name) for name in (ASSIGNMENTS_FILE, QUIZZES_FILE))
+    )
+    if _deadline_store is None or mtimes != _deadline_mtimes:
+        _deadline_store = DeadlineStore.load(DEADLINES_DIR)
+        _deadline_mtimes = mtimes
+    return _deadline_store
+
+@registry.tool(read_only=True)
+def list_deadlines(
+    window: str = "upcoming",
+    hours: int = 72,
+    course: Optional[str] = None,
+    kind: Optional[str] = None,
+) -> str:
+    """List Canvas assignment and quiz deadlines in a time window
+
+    Args:
+        window: One of "upcoming" (due in the next `hours`), "overdue" (due date passed),
+            "this_week" (due before the end of Sunday, grouped by course) or "undated"
+        hours: Look-ahead for "upcoming", or look-back for "overdue", in hours
+        course: Only courses whose name contains this text
+        kind: "assignment" or "quiz"
+
+    Returns:
+        One line per deadline with course, title and due time (UTC)
+    """
+    store = get_deadline_store()
+    if not len(store):
+        return "No assignment or quiz data available. Run vectorDatabase/main.py first."
+    filters = {"course": course, "kind": kind if kind in ("assignment", "quiz") else None}
+
+    if window == "overdue":
+        items = store.overdue(days=hours / 24, **filters)
+    elif window == "this_week":
+        items = [item for group in store.this_week(**filters).values() for item in group]
+    elif window == "undated":
+        items = store.undated(**filters)
+    else:
+        items = store.upcoming(hours=hours, **filters)
+
+    if not items:
+        return f"No {window.replace('_', ' ')} deadlines found."
+    return "\n".join(
+        f"{item.course}: {item.title} ({item.kind}) - "
+        f"{item.due.strftime('%Y-%m-%d %H:%M UTC') if item.due else 'no due date'}"
+        for item in items
+    )
+
+@registry.tool(timeout=120)
+def sync_deadlines_to_calendar(
+    user_token: str = None,
+    calendar_id: str = "primary",
+    credentials: Optional[Credentials] = None,
+) -> str:
+    """Add, update and remove Google Calendar events so they match all Canvas assignment and quiz due dates.
+    Use this instead of creating deadline events one by one; running it again only applies what changed.
+
+    Args:
+        user_token: OAuth token for the user
+        calendar_id: Calendar to sync into
+
+    Returns:
+        How many events were inserted, updated, deleted and left unchanged
+    """
+    credentials = user_credentials(credentials, user_token)
+    if credentials is None:
+        return "Error: User authentication token is required to sync calendar events."
+    store = get_deadline_store()
+    if not len(store):
+        return "No assignment or quiz data available. Run vectorDatabase/main.py first."
+    try:
+        report = sync_deadlines(credentials, store.between() + store.undated(), calendar_id)
+        calendar_cache.invalidate(credentials, calendar_id)
+    except Exception as e:
+        return f"Error syncing deadlines to calendar: {str(e)}"
+    return format_calendar_report(report)
+
+# Compile the tool declarations once at import instead of on the first request
+registry.compile()
+
 # Routes
 @app.get("/auth")
 async def auth_redirect():
@@ -306,181 +572,270 @@ async def auth_callback(code: str):
     flow.fetch_token(code=code)
     credentials = flow.credentials
 
+    # The tokens stay on the server; the client only gets an opaque session ID
+    session_id = await run_tool(credential_store.create, credentials)
     return {
-        "token": credentials.token,
-        "refresh_token": credentials.refresh_token,
-        "token_uri": credentials.token_uri,
-        "client_id": credentials.client_id,
-        "client_secret": GOOGLE_CLIENT_SECRET,
+        "session_id": session_id,
         "scopes": credentials.scopes,
     }
 
-@app.post("/chat")
-async def chat(chat_request: ChatRequest):
-    if not chat_request.history:
-        raise HTTPException(status_code=400, detail="Chat history is empty.")
-    
-    formatted_history = [format_message(turn) for turn in chat_request.history]
-    client = genai.Client(api_key=GEMINI_API_KEY)
-
-    # Set up tools
-    config = types.GenerateContentConfig(
-        tools=[
-            {
-                "function_declarations": [
-                    {
-                        "name": "create_calendar_event",
-                        "description": "Create a new event in Google Calendar",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "title": {
-                                    "type": "string",
-                                    "description": "Title of the event"
-                                },
-                                "start_time": {
-                                    "type": "string",
-                                    "description": "Start time in ISO format (YYYY-MM-DDTHH:MM:SS)"
-                                },
-                                "end_time": {
-                                    "type": "string",
-                                    "description": "End time in ISO format (YYYY-MM-DDTHH:MM:SS)"
-                                },
-                                "description": {
-                                    "type": "string",
-                                    "description": "Optional description for the event"
-                                },
-                                "location": {
-                                    "type": "string",
-                                    "description": "Optional location for the event"
-                                },
-                                "attendees": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Optional list of email addresses for attendees"
-                                }
-                            },
-                            "required": ["title", "start_time", "end_time"]
-                        }
-                    },
-                    {
-                        "name": "read_calendar_events",
-                        "description": "List upcoming events from the user's Google Calendar",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "user_token": {
-                                    "type": "string",
-                                    "description": "OAuth token for the user"
-                                },
-                                "time_min": {
-                                    "type": "string",
-                                    "description": "ISO datetime (inclusive) to start listing from"
-                                },
-                                "time_max": {
-                                    "type": "string",
-                                    "description": "ISO datetime (exclusive) to stop listing at"
-                                },
-                                "max_results": {
-                                    "type": "integer",
-                                    "description": "Maximum number of events to return"
-                                }
-                            },
-                            "required": ["user_token"]
-                        }
-                    },
-                    {
-                        "name": "create_google_doc",
-                        "description": "Create a new Google Doc with meeting details",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "title": {"type": "string"},
-                                "description": {"type": "string"},
-                                "time": {"type": "string"},
-                                "download": {"type": "boolean"}
-                            },
-                            "required": ["title", "description"]
-                        }
-                    },
-                    {
-                        "name": "say_hello_world",
-                        "description": "Say hello world back to the user if the user asks for it",
-                        "parameters": {"type": "object", "properties": {}}
-                    }
-                ]
-            }
-        ]
+@app.post("/auth/logout")
+async def auth_logout(logout_request: LogoutRequest):
+    await run_tool(credential_store.delete, logout_request.session_id)
+    return {"status": "signed out"}
+
+async def generate(contents, stream: bool):
+    """Yield Gemini responses for `contents`: chunk by chunk when streaming, else once"""
+    if stream:
+        async for chunk in await genai_client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=registry.config
+        ):
+            yield chunk
+    else:
+        yield await genai_client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=registry.config
+        )
+
+async def run_agent(contents: list, context: dict, stream: bool = False):
+    """Agent loop shared by /chat and /chat/stream
+
+    Every function call of a model turn runs concurrently, the results are fed
+    back as function responses and the model continues until it answers in
+    text or MAX_AGENT_STEPS is reached.
+
+    Yields:
+        (event, data) tuples: "text", "tool_call_start", "tool_call_end", "done"
+    """
+    for _ in range(MAX_AGENT_STEPS):
+        parts, function_calls = [], []
+        async for response in generate(contents, stream):
+            if not response.candidates or not response.candidates[0].content:
+                continue
+            for part in response.candidates[0].content.parts or []:
+                parts.append(part)
+                if part.function_call:
+                    function_calls.append(part.function_call)
+                elif part.text and not part.thought:
+                    yield "text", {"text": part.text}
+
+        if not function_calls:
+            yield "done", {}
+            return
+
+        contents.append(types.Content(role="model", parts=parts))
+        for call in function_calls:
+            yield "tool_call_start", {"id": call.id, "name": call.name, "args": call.args}
+
+        async def call_tool(index, call):
+            return index, await registry.dispatch(call, context)
+
+        results = [None] * len(function_calls)
+        for finished in asyncio.as_completed(
+            [call_tool(i, call) for i, call in enumerate(function_calls)]
+        ):
+            index, result = await finished
+            results[index] = result
+            call = function_calls[index]
+            yield "tool_call_end", {"id": call.id, "name": call.name, "result": result}
+
+        contents.append(types.Content(
+            role="user",
+            parts=[
+                types.Part(function_response=types.FunctionResponse(
+                    id=call.id, name=call.name, response={"result": result}
+                ))
+                for call, result in zip(function_calls, results)
+            ],
+        ))
+
+    yield "done", {"stopped": f"Stopped after {MAX_AGENT_STEPS} tool steps."}
+
+# Conversations kept server-side, so clients only send the new message
+conversation_store = ConversationStore()
+
+# The event loop only keeps weak references to tasks, so background ones are held here until done
+background_tasks = set()
+
+def _background_task_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error in background task: {str(task.exception())}")
+
+def run_in_background(coro) -> asyncio.Task:
+    """Start a task that outlives the request, keeping it referenced and logging its failure"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+async def summarize_conversation(summary: str, turns: str, max_words: int) -> str:
+    """Fold `turns` into the rolling `summary` of a conversation with the summary model"""
+    response = await genai_client.aio.models.generate_content(
+        model=GEMINI_SUMMARY_MODEL,
+        contents=SUMMARY_PROMPT.format(words=max_words, summary=summary or "(none yet)", turns=turns),
     )
+    return response.text or ""
+
+def open_conversation(chat_request: ChatRequest):
+    """(conversation_id, Conversation) for a request in server-side mode, else (None, None)"""
+    if chat_request.message is None:
+        if not chat_request.history:
+            raise HTTPException(status_code=400, detail="Chat history is empty.")
+        return None, None
+    if not chat_request.conversation_id:
+        return conversation_store.create(chat_request.session_id)
+    conversation = conversation_store.get(chat_request.conversation_id, chat_request.session_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation.")
+    return chat_request.conversation_id, conversation
+
+# Replies to turns that only read data. The near-duplicate lookup is off
+# unless RESPONSE_CACHE_SIMILARITY is set (e.g. 0.92); it needs a semantic
+# embedder, the hashing one scores "due this week" and "due next week" as close
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "1000")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_SECONDS", "300")),
+    embed=(make_embedder({"name": os.getenv("RESPONSE_CACHE_EMBEDDER", "gemini")}).embed
+           if RESPONSE_CACHE_SIMILARITY > 0 else None),
+    similarity=RESPONSE_CACHE_SIMILARITY,
+)
+
+def cache_scope(context: dict) -> str:
+    """Whose data a reply was based on: the identity of the request's credentials"""
+    credentials = user_credentials(context.get("credentials"), context.get("user_token"))
+    return credential_identity(credentials) if credentials is not None else "anonymous"
 
+def data_version(context: dict) -> str:
+    """Version of everything a read-only reply can depend on
+
+    The Canvas files the deadline tools read, the course index, the user's
+    calendar sync token and the UTC date (for "today" and "this week"). The
+    calendar is synced incrementally (at most once per CALENDAR_CACHE_SECONDS)
+    first, so edits made directly in Google Calendar change the version too.
+    Blocking; see cache_version().
+    """
+    paths = (
+        os.path.join(DEADLINES_DIR, ASSIGNMENTS_FILE),
+        os.path.join(DEADLINES_DIR, QUIZZES_FILE),
+        os.path.join(VECTOR_STORE_DIR, "meta.json"),
+    )
+    parts = [str(os.path.getmtime(path)) if os.path.exists(path) else "-" for path in paths]
+    credentials = user_credentials(context.get("credentials"), context.get("user_token"))
+    if credentials is not None:
+        parts.append(calendar_cache.sync_token(credentials) or "-")
+    parts.append(datetime.utcnow().strftime("%Y-%m-%d"))
+    return ":".join(parts)
+
+async def cache_version(context: dict) -> Optional[str]:
+    """data_version() on the tool pool, or None (don't cache this turn) if the cache is off or it failed"""
+    if response_cache.ttl_seconds <= 0:
+        return None
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=formatted_history,
-            config=config
-        )
+        return await run_tool(data_version, context)
+    except Exception as e:
+        print(f"Error checking data version, not caching this turn: {str(e)}")
+        return None
 
-        # Handle function calling if present
-        if hasattr(response, 'candidates') and response.candidates:
-            candidate = response.candidates[0]
-            if hasattr(candidate, 'content') and candidate.content.parts:
-                for part in candidate.content.parts:
-                    if hasattr(part, 'function_call'):
-                        function_call = part.function_call
-                        if function_call:
-                            if function_call.name == "create_calendar_event":
-                                # Extract arguments - handle both string and dict cases
-                                args = function_call.args
-                                if isinstance(args, str):
-                                    # Parse JSON string to dictionary
-                                    args = json.loads(args)
-                                # If it's already a dict, use it directly
-
-                                # Call the calendar creation function
-                                result = create_calendar_event(
-                                    summary=args.get("title"),
-                                    start_time=args.get("start_time"),
-                                    end_time=args.get("end_time"),
-                                    description=args.get("description"),
-                                    location=args.get("location"),
-                                    attendees=args.get("attendees"),
-                                    user_token=chat_request.user_token
-                                )
-
-                                # Return result with the model's response
-                                return {"message": f"{response.text}\n\nCalendar Result: {result}"}
-                            elif function_call.name == "read_calendar_events":
-                                args = function_call.args
-                                if isinstance(args, str):
-                                    args = json.loads(args)
-                                result = read_calendar_events(
-                                    user_token=args.get("user_token"),
-                                    time_min=args.get("time_min"),
-                                    time_max=args.get("time_max"),
-                                    max_results=args.get("max_results", 10),
-                                )
-                                return {"message": f"{response.text}\n\nCalendar Read Result:\n{result}"}
-                            elif function_call.name == "create_google_doc":
-                                args = function_call.args
-                                if isinstance(args, str):
-                                    args = json.loads(args)
-
-                                result = create_google_doc(
-                                    title=args.get("title"),
-                                    description=args.get("description"),
-                                    time=args.get("time"),
-                                    download=args.get("download", False),
-                                    user_token=json.loads(chat_request.user_token) if isinstance(chat_request.user_token, str) else chat_request.user_token
-                                )
-
-                                return {"message": f"{response.text}\n\nGoogle Doc Url: {result}"}
-
-                            elif function_call.name == "say_hello_world":
-                                result = say_hello_world()
-                                return {"message": f"{response.text}\n\nTool Result: {result}"}
-
-        # If no function call, return the standard response
-        return {"message": response.text}
+async def cache_call(func, *args):
+    """Call a response_cache method; with the similarity lookup on it embeds (blocking), so it goes to the thread pool"""
+    if response_cache.embed is not None:
+        return await run_tool(func, *args)
+    return func(*args)
+
+async def cached_agent(contents: list, context: dict, tail: list, stream: bool = False):
+    """run_agent behind the response cache
+
+    A hit answers with one text event and a done event marked cached. A turn
+    is stored only if every tool it called is read-only and it finished
+    normally; a turn that called a write tool clears the user's entries.
+    """
+    scope = cache_scope(context)
+    version = await cache_version(context)
+    cached = await cache_call(response_cache.get, scope, tail, version) if version is not None else None
+    if cached is not None:
+        yield "text", {"text": cached}
+        yield "done", {"cached": True}
+        return
+
+    text, wrote = [], False
+    async for event, data in run_agent(contents, context, stream):
+        if event == "text":
+            text.append(data["text"])
+        elif event == "tool_call_start" and not registry.is_read_only(data["name"]):
+            wrote = True
+        elif event == "done":
+            if wrote:
+                response_cache.invalidate(scope)
+            elif text and not data.get("stopped") and version is not None:
+                # Versioned after the turn, so state the tools refreshed counts
+                version = await cache_version(context)
+                if version is not None:
+                    await cache_call(response_cache.put, scope, tail, version, "".join(text))
+        yield event, data
+
+async def run_chat(chat_request: ChatRequest, context: dict, conversation_id, conversation, stream: bool = False):
+    """cached_agent over the client's history, or over a server-side conversation
+
+    With a conversation, the new message and everything the turn produced
+    (tool calls, results and the reply) are stored, the final done event
+    carries the conversation ID and token usage, and the conversation is
+    compacted in the background once it is over budget.
+    """
+    if conversation is None:
+        contents = [format_message(turn) for turn in chat_request.history]
+        tail = [(turn.role, turn.content) for turn in chat_request.history]
+        async for event, data in cached_agent(contents, context, tail, stream):
+            yield event, data
+        return
+
+    async with conversation.lock:
+        # The turn is only stored once it completes, so a failed turn leaves no trace
+        user_turn = types.Content(role="user", parts=[types.Part(text=chat_request.message)])
+        contents = conversation.contents() + [user_turn]
+        known = len(contents)
+        tail = conversation.text_turns() + [("user", chat_request.message)]
+
+        text = []
+        async for event, data in cached_agent(contents, context, tail, stream):
+            if event == "text":
+                text.append(data["text"])
+            elif event == "done":
+                usage = conversation.record_request(user_turn, cached=data.get("cached", False))
+                conversation_store.record(usage)
+                # run_agent added the tool turns; the final reply is added here
+                new_turns = [user_turn] + contents[known:]
+                if text:
+                    new_turns.append(types.Content(role="model", parts=[types.Part(text="".join(text))]))
+                conversation.add(new_turns)
+                data = {**data, "conversation_id": conversation_id, "usage": usage}
+            yield event, data
+
+    if conversation.needs_compaction():
+        run_in_background(conversation_store.compact(conversation, summarize_conversation))
+
+@app.post("/chat")
+async def chat(chat_request: ChatRequest):
+    conversation_id, conversation = open_conversation(chat_request)
+    context = await request_context(chat_request)
+
+    try:
+        text, result = [], {}
+        async for event, data in run_chat(chat_request, context, conversation_id, conversation):
+            if event == "text":
+                text.append(data["text"])
+            elif event == "done":
+                if data.get("stopped"):
+                    text.append(f"\n\n{data['stopped']}")
+                if "conversation_id" in data:
+                    result = {"conversation_id": data["conversation_id"], "usage": data["usage"]}
+                if data.get("cached"):
+                    result["cached"] = True
+        return {"message": "".join(text), **result}
 
     except Exception as e:
         # Add more detailed error logging
@@ -489,3 +844,45 @@ async def chat(chat_request: ChatRequest):
         print(f"Error details: {error_details}")
 
         raise HTTPException(status_code=500, detail=f"Error calling Gemini API: {str(e)}")
+
+@app.post("/chat/stream")
+async def chat_stream(chat_request: ChatRequest):
+    """Server-sent events variant of /chat
+
+    Text deltas are flushed as they arrive from Gemini, with tool_call_start /
+    tool_call_end events inline and a final done (or error) event.
+    """
+    conversation_id, conversation = open_conversation(chat_request)
+    context = await request_context(chat_request)
+
+    async def event_stream():
+        try:
+            async for event, data in run_chat(chat_request, context, conversation_id, conversation, stream=True):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            import traceback
+            print(f"Error details: {traceback.format_exc()}")
+            yield f"event: error\ndata: {json.dumps({'detail': f'Error calling Gemini API: {str(e)}'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hits, near-duplicate hits, misses, stores, invalidations and evictions of the response cache"""
+    return {**response_cache.stats, "entries": len(response_cache)}
+
+@app.get("/conversations/stats")
+async def conversation_stats():
+    """Requests, compactions and estimated tokens sent/saved across server-side conversations"""
+    return conversation_store.stats
+
+@app.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str, session_id: Optional[str] = None):
+    if conversation_store.get(conversation_id, session_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation.")
+    conversation_store.delete(conversation_id)
+    return {"status": "deleted"}
@@ -0,0 +1,89 @@
+"""
+Canvas-to-Calendar: one insert per event vs batched, idempotent sync
+
+Runs against a local stub Calendar server that adds `--latency` per HTTP
+request. The first line is the previous path (one events.insert round trip
+per deadline); then calendar_sync runs a first sync, an unchanged re-run, and
+a run after `--changed` deadlines moved and `--removed` disappeared.
+
+    python benchmarks/calendar_batch_sync.py --deadlines 300 --latency 0.05
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.oauth2.credentials import Credentials  # noqa: E402
+from google_services import ServicePool  # noqa: E402
+from calendar_sync import CalendarSync, event_body  # noqa: E402
+from deadlineStore import Deadline  # noqa: E402
+from stub_servers import StubCalendarHandler, start_server  # noqa: E402
+
+
+def synthetic_deadlines(rng, count):
+    now = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    return [
+        Deadline(now + timedelta(hours=rng.randint(0, 24 * 100)), f"Course {i % 6}",
+                 rng.choice(("assignment", "quiz")), f"Item {i}", i, float(rng.choice((10, 50, 100))))
+        for i in range(count)
+    ]
+
+
+def run(name, counts, func):
+    before = dict(counts)
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    delta = {key: counts.get(key, 0) - before.get(key, 0) for key in ("http_requests", "writes")}
+    print(f"{name:>26}: {elapsed:6.2f} s  {delta['http_requests']:4d} HTTP requests  {delta['writes']:4d} writes")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deadlines", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per HTTP request")
+    parser.add_argument("--changed", type=int, default=30)
+    parser.add_argument("--removed", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    deadlines = synthetic_deadlines(rng, args.deadlines)
+    credentials = Credentials("stub-token")
+
+    # Previous path: a separate round trip per event
+    counts = {}
+    _, base_url = start_server(StubCalendarHandler, events={}, counts=counts, latency=args.latency)
+    pool = ServicePool(api_endpoint=base_url)
+    with pool.service("calendar", "v3", credentials) as service:
+        run("one insert per event", counts, lambda: [
+            service.events().insert(calendarId="primary", body=event_body(d)).execute() for d in deadlines
+        ])
+
+    counts = {}
+    _, base_url = start_server(StubCalendarHandler, events={}, counts=counts, latency=args.latency)
+    pool = ServicePool(api_endpoint=base_url)
+    with pool.service("calendar", "v3", credentials) as service:
+        syncer = CalendarSync(service)
+        report = run("first sync", counts, lambda: syncer.sync(deadlines))
+        assert report["inserted"] == len(deadlines) and not report["failed"], report
+        report = run("re-run, nothing changed", counts, lambda: syncer.sync(deadlines))
+        assert report["unchanged"] == len(deadlines), report
+
+        for deadline in rng.sample(deadlines, args.changed):
+            deadline.due += timedelta(days=1)
+        kept = deadlines[args.removed:]
+        report = run(f"{args.changed} moved, {args.removed} removed", counts, lambda: syncer.sync(kept))
+        print(f"{'':>26}  {report['inserted']} inserted, {report['updated']} updated, "
+              f"{report['deleted']} deleted, {report['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Calendar reads: one events.list per question vs the sync-token event cache
+
+A stub Calendar server holds `--events` events over a year and adds
+`--latency` per request. Every "read" asks for next week's events: first the
+previous way (an events.list round trip each time), then through
+calendar_cache, which syncs once and answers later reads from its index. The
+cache is then checked against the server after edits (incremental sync) and
+after its sync token expires (410, full resync).
+
+    python benchmarks/calendar_event_cache.py --events 2000 --reads 50
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.oauth2.credentials import Credentials  # noqa: E402
+from google_services import ServicePool  # noqa: E402
+from calendar_cache import CalendarCachePool  # noqa: E402
+from stub_servers import StubCalendarHandler, start_server  # noqa: E402
+
+YEAR_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def synthetic_event(rng, index):
+    start = YEAR_START + timedelta(minutes=15 * rng.randrange(4 * 24 * 365))
+    end = start + timedelta(minutes=rng.choice((30, 60, 90, 180)))
+    return {
+        "id": f"e{index}",
+        "summary": f"Event {index}",
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": end.isoformat()},
+    }
+
+
+def expected(events, start, end):
+    """Brute-force overlap check against the server's events"""
+    ids = set()
+    for event in events.values():
+        event_start = datetime.fromisoformat(event["start"]["dateTime"])
+        event_end = datetime.fromisoformat(event["end"]["dateTime"])
+        if event_start < end and event_end > start:
+            ids.add(event["id"])
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per HTTP request")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    events = {event["id"]: event for event in (synthetic_event(rng, i) for i in range(args.events))}
+    counts, changes = {}, []
+    server, base_url = start_server(StubCalendarHandler, events=events, counts=counts, changes=changes,
+                                     latency=args.latency)
+    credentials = Credentials("stub-token")
+    services = ServicePool(api_endpoint=base_url)
+    week_start = YEAR_START + timedelta(days=120)
+    week_end = week_start + timedelta(days=7)
+
+    with services.service("calendar", "v3", credentials) as service:
+        start = time.perf_counter()
+        for _ in range(args.reads):
+            service.events().list(calendarId="primary", timeMin=week_start.isoformat(),
+                                  timeMax=week_end.isoformat(), maxResults=10, singleEvents=True,
+                                  orderBy="startTime").execute()
+        per_read = (time.perf_counter() - start) / args.reads
+    print(f"{'events.list per read':>24}: {per_read * 1000:10.2f} ms/read   {args.reads} requests")
+
+    cache_pool = CalendarCachePool(max_age=3600, pool=services)
+    before = counts["http_requests"]
+    start = time.perf_counter()
+    found = cache_pool.events(credentials, week_start, week_end)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        found = cache_pool.events(credentials, week_start, week_end)
+    per_read = (time.perf_counter() - start) / args.reads
+    print(f"{'cache, first read':>24}: {first * 1000:10.2f} ms        (full sync)")
+    print(f"{'cache, later reads':>24}: {per_read * 1e6:10.2f} us/read   "
+          f"{counts['http_requests'] - before} requests in total")
+    assert {e["id"] for e in found} == expected(events, week_start, week_end)
+
+    # Edits on the server side, picked up by an incremental sync
+    with services.service("calendar", "v3", credentials) as service:
+        created = service.events().insert(calendarId="primary", body=synthetic_event(rng, "new")).execute()
+        service.events().patch(calendarId="primary", eventId="e1",
+                               body={"start": {"dateTime": (week_start + timedelta(hours=1)).isoformat()},
+                                     "end": {"dateTime": (week_start + timedelta(hours=2)).isoformat()}}).execute()
+        service.events().delete(calendarId="primary", eventId="e2").execute()
+    cache = cache_pool.cache(credentials)
+    cache_pool.invalidate(credentials)
+    found = cache_pool.events(credentials, week_start, week_end)
+    assert {e["id"] for e in found} == expected(events, week_start, week_end)
+    assert created["id"] in {e["id"] for e in cache_pool.events(credentials)} and len(cache) == len(events)
+    print(f"{'after edits':>24}: incremental syncs {cache.stats['incremental_syncs']}, cache matches server")
+
+    # Expired token: 410, then a full resync
+    server.RequestHandlerClass.min_sync_token = len(changes) + 1
+    cache_pool.invalidate(credentials)
+    found = cache_pool.events(credentials, week_start, week_end)
+    assert {e["id"] for e in found} == expected(events, week_start, week_end)
+    print(f"{'after 410':>24}: full syncs {cache.stats['full_syncs']}, cache matches server")
+
+
+if __name__ == "__main__":
+    main()
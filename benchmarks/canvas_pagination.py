@@ -0,0 +1,100 @@
+"""
+Serial vs prefetching pagination against a stub Canvas list endpoint
+
+The stub serves `--records` assignments, honours per_page (capped at 100) and
+links pages with a Link header, adding `--latency` per request. The consumer
+spends `--work` ms on every page, standing in for conversion and indexing.
+
+    python benchmarks/canvas_pagination.py --records 1000 --latency 0.15
+"""
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "vectorDatabase"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from canvasapi import Canvas  # noqa: E402
+from pagination import stream  # noqa: E402
+from stub_servers import start_server  # noqa: E402
+
+
+class StubCanvasHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    records = 1000
+    latency = 0.15
+    default_per_page = 10
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.latency)
+        if url.path.endswith("/courses/1"):
+            body = {"id": 1, "name": "Stub course"}
+            headers = {}
+        else:
+            per_page = min(100, int(query.get("per_page", [self.default_per_page])[0]))
+            page = int(query.get("page", ["1"])[0])
+            start = (page - 1) * per_page
+            body = [{"id": i, "name": f"Assignment {i}", "course_id": 1}
+                    for i in range(start, min(start + per_page, self.records))]
+            headers = {}
+            if start + per_page < self.records:
+                host = self.headers["Host"]
+                headers["Link"] = (f'<http://{host}{url.path}?page={page + 1}&per_page={per_page}>; rel="next"')
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def consume(iterable, work_seconds, page_size):
+    count = 0
+    for _ in iterable:
+        count += 1
+        if count % page_size == 0:
+            time.sleep(work_seconds)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15, help="Seconds per request")
+    parser.add_argument("--work", type=float, default=100, help="Consumer ms per 100 records")
+    args = parser.parse_args()
+
+    _, base_url = start_server(StubCanvasHandler, records=args.records, latency=args.latency)
+    warnings.simplefilter("ignore")
+    canvas = Canvas(base_url, "token")
+    course = canvas.get_course(1)
+    work = args.work / 1000
+
+    runs = (
+        ("serial, per_page=10", lambda: course.get_assignments(per_page=10), 10, False),
+        ("serial, per_page=100", lambda: course.get_assignments(), 100, False),
+        ("stream (prefetch)", lambda: course.get_assignments(), 100, True),
+    )
+    for name, make_list, page_size, prefetch in runs:
+        paginated = make_list()
+        start = time.perf_counter()
+        count = consume(stream(paginated) if prefetch else paginated, work * page_size / 100, page_size)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>22}: {count} records in {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
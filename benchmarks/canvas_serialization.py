@@ -0,0 +1,123 @@
+"""
+Converting and saving Canvas assignments: attribute walk vs typed schema
+
+Builds `--records` canvasapi Assignment objects from synthetic API data, with
+the extra attributes real responses carry, then times the previous conversion
+(walk __dict__, test-encode every value with json.dumps) against
+Assignment.from_canvas, and json.dump(indent=2) against save_json and
+save_jsonl.
+
+    python benchmarks/canvas_serialization.py --records 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "vectorDatabase"))
+
+from canvasapi.assignment import Assignment as CanvasAssignment  # noqa: E402
+from canvasSchemas import Assignment, save_json, save_jsonl, load_jsonl  # noqa: E402
+
+ESSENTIAL_FIELDS = set(Assignment.FIELDS)
+
+
+def walking_to_dict(assignment):
+    """The previous implementation"""
+    assignment_dict = {}
+    for key, value in assignment.__dict__.items():
+        if key not in ESSENTIAL_FIELDS:
+            continue
+        try:
+            if hasattr(value, 'isoformat') and callable(value.isoformat):
+                assignment_dict[key] = value.isoformat()
+            else:
+                json.dumps({key: value})
+                assignment_dict[key] = value
+        except (TypeError, OverflowError):
+            pass
+    return assignment_dict
+
+
+def synthetic_attributes(rng, index, courses):
+    due = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:59:00Z"
+    return {
+        "id": index,
+        "name": f"Assignment {index}",
+        "description": "<p>" + " ".join(rng.choice(("read", "write", "submit", "the", "lab", "report"))
+                                        for _ in range(60)) + "</p>",
+        "points_possible": float(rng.choice((10, 20, 50, 100))),
+        "due_at": due,
+        "unlock_at": None,
+        "lock_at": due,
+        "course_id": rng.randrange(courses),
+        "workflow_state": "published",
+        "submission_types": ["online_upload"],
+        "grading_type": "points",
+        "created_at": "2025-01-05T12:00:00Z",
+        "updated_at": "2025-01-06T12:00:00Z",
+        "html_url": f"https://canvas.example/courses/1/assignments/{index}",
+        "allowed_extensions": ["pdf"],
+        "rubric": [{"id": f"r{i}", "points": 5, "description": "Criterion"} for i in range(4)],
+        "has_submitted_submissions": False,
+        "omit_from_final_grade": False,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--courses", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    objects = [CanvasAssignment(None, synthetic_attributes(rng, i, args.courses)) for i in range(args.records)]
+
+    walked, walk_time = timed(lambda: [walking_to_dict(a) for a in objects])
+    typed, typed_time = timed(lambda: [Assignment.from_canvas(a).to_dict() for a in objects])
+    if walked != typed:
+        print("MISMATCH: schema conversion differs from the attribute walk")
+        sys.exit(1)
+    print(f"{args.records} assignments")
+    print(f"{'convert, walk':>22}: {walk_time * 1000:8.0f} ms")
+    print(f"{'convert, schema':>22}: {typed_time * 1000:8.0f} ms")
+
+    by_course = {}
+    for record in typed:
+        by_course.setdefault(f"Course {record['course_id']}", []).append(record)
+
+    with tempfile.TemporaryDirectory() as directory:
+        def json_dump(path):
+            with open(path, "w") as f:
+                json.dump(by_course, f, indent=2)
+
+        runs = (
+            ("json.dump indent=2", json_dump, "dump.json"),
+            ("save_json", lambda path: save_json(by_course, path), "save.json"),
+            ("save_jsonl", lambda path: save_jsonl(by_course, path), "save.jsonl"),
+        )
+        for name, write, filename in runs:
+            path = os.path.join(directory, filename)
+            _, elapsed = timed(write, path)
+            print(f"{name:>22}: {elapsed * 1000:8.0f} ms   {os.path.getsize(path) / 1024:7.0f} KiB")
+
+        _, elapsed = timed(load_jsonl, os.path.join(directory, "save.jsonl"))
+        print(f"{'load_jsonl':>22}: {elapsed * 1000:8.0f} ms")
+        with open(os.path.join(directory, "save.json")) as f:
+            _, elapsed = timed(json.load, f)
+        print(f"{'json.load':>22}: {elapsed * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
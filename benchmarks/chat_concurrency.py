@@ -0,0 +1,68 @@
+"""Throughput of /chat against a stub Gemini server at increasing concurrency
+
+Run from the repository root:
+    python benchmarks/chat_concurrency.py --latency 0.2 --requests 64
+
+With a non-blocking /chat, throughput should scale roughly linearly with the
+number of in-flight requests until the stub or the tool pool saturates.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubGeminiHandler, start_server
+
+
+async def run_level(client, concurrency: int, total: int) -> float:
+    """Send `total` chat requests with at most `concurrency` in flight, return req/s"""
+    semaphore = asyncio.Semaphore(concurrency)
+    payload = {"history": [{"role": "user", "content": "hello"}]}
+
+    async def one():
+        async with semaphore:
+            response = await client.post("/chat", json=payload)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args):
+    import httpx
+
+    server, base_url = start_server(
+        StubGeminiHandler, latency=args.latency, tool_every=args.tool_every
+    )
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["GEMINI_BASE_URL"] = base_url
+    # Every request sends the same prompt; measure the chat path, not cached replies
+    os.environ["RESPONSE_CACHE_SECONDS"] = "0"
+
+    from app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        print(f"stub latency {args.latency * 1000:.0f} ms, {args.requests} requests per level")
+        print(f"{'in-flight':>10} {'req/s':>10} {'speedup':>10}")
+        baseline = None
+        for concurrency in args.levels:
+            rate = await run_level(client, concurrency, args.requests)
+            baseline = baseline or rate
+            print(f"{concurrency:>10} {rate:>10.1f} {rate / baseline:>9.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--tool-every", type=int, default=4, help="every Nth reply is a tool call (0 disables)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    asyncio.run(main(parser.parse_args()))
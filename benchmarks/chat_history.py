@@ -0,0 +1,93 @@
+"""Request size per turn: client-resent history vs server-side conversations
+
+Drives `--turns` turns of one chat against a stub Gemini server, once with
+the client resending the whole history (the previous /chat contract) and
+once with only the new message and a conversation ID. Prints what reached
+Gemini per turn, as bytes and as the server's token estimate.
+
+Run from the repository root:
+    python benchmarks/chat_history.py --turns 40 --budget 3000
+"""
+from io import BytesIO
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubGeminiHandler, start_server
+
+WORDS = ("assignment", "deadline", "lecture", "quiz", "exam", "project", "chapter", "office", "hours", "review")
+
+
+class RecordingGeminiHandler(StubGeminiHandler):
+    """Stub Gemini that keeps the size of every chat request body (summary calls apart)"""
+    chat_sizes = None
+    summary_calls = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if b'"tools"' in body:
+            self.chat_sizes.append(len(body))
+        else:
+            self.summary_calls.append(len(body))
+        self.rfile = BytesIO(body)
+        super().do_POST()
+
+
+def main(args):
+    from fastapi.testclient import TestClient
+
+    rng = random.Random(args.seed)
+    messages = [" ".join(rng.choice(WORDS) for _ in range(args.words)) for _ in range(args.turns)]
+    reply = " ".join(rng.choice(WORDS) for _ in range(args.words))
+
+    chat_sizes, summary_calls = [], []
+    _, base_url = start_server(RecordingGeminiHandler, latency=0, reply=reply,
+                               chat_sizes=chat_sizes, summary_calls=summary_calls)
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ["CONVERSATION_TOKEN_BUDGET"] = str(args.budget)
+    # Both passes send the same messages; the second must not be answered from cached replies
+    os.environ["RESPONSE_CACHE_SECONDS"] = "0"
+
+    import app
+
+    with TestClient(app.app) as client:
+        history = []
+        for message in messages:
+            history.append({"role": "user", "content": message})
+            answer = client.post("/chat", json={"history": history}).json()["message"]
+            history.append({"role": "model", "content": answer})
+        resent = list(chat_sizes)
+
+        chat_sizes.clear()
+        conversation_id, usage = None, []
+        for message in messages:
+            response = client.post("/chat", json={"message": message, "conversation_id": conversation_id}).json()
+            conversation_id = response["conversation_id"]
+            usage.append(response["usage"])
+            # Let the background compaction finish, as the gap between real turns would
+            time.sleep(0.05)
+        server_side = list(chat_sizes)
+
+    print(f"{args.turns} turns of ~{args.words} words, token budget {args.budget}")
+    print(f"{'turn':>5} {'resent bytes':>13} {'session bytes':>14} {'tokens sent':>12} {'tokens saved':>13}")
+    for turn in sorted({0, 4, 9, 19, args.turns - 1} & set(range(args.turns))):
+        print(f"{turn + 1:>5} {resent[turn]:>13} {server_side[turn]:>14} "
+              f"{usage[turn]['tokens_sent']:>12} {usage[turn]['tokens_saved']:>13}")
+    print(f"total bytes to Gemini: resent {sum(resent)}, server-side {sum(server_side)} "
+          f"(+{sum(summary_calls)} in {len(summary_calls)} summary calls)")
+    print(f"store stats: {app.conversation_store.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--words", type=int, default=120, help="words per message and per reply")
+    parser.add_argument("--budget", type=int, default=3000, help="CONVERSATION_TOKEN_BUDGET")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""Latency of repeated read-only questions with and without the response cache
+
+Sends a mix of questions to /chat against a stub Gemini server. Most are
+repeats, one only differs in case and punctuation, and some ask to add a
+calendar event. The stub answers the latter with a create_calendar_event
+call, which is a write: the turn is not cached and clears the user's entries.
+Runs once with the cache disabled (zero TTL) and once enabled.
+
+Run from the repository root:
+    python benchmarks/chat_response_cache.py --requests 200 --latency 0.2
+"""
+from io import BytesIO
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubGeminiHandler, start_server
+
+QUESTIONS = (
+    "What is due this week?",
+    "what is due this week",
+    "Which quizzes do I have left in Biology?",
+    "When is my next exam?",
+    "Summarize the syllabus of CS 101",
+)
+WRITE = "Add a study session on Friday at 3pm"
+
+
+class WritingGeminiHandler(StubGeminiHandler):
+    """Stub Gemini that answers WRITE with a create_calendar_event call"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.rfile = BytesIO(body)
+        if WRITE.encode("utf-8") in body and b'"functionResponse"' not in body:
+            time.sleep(self.latency)
+            self._send_json(self._response([{"functionCall": {"name": "create_calendar_event", "args": {
+                "summary": "Study session", "start_time": "2030-01-04T15:00:00Z", "end_time": "2030-01-04T16:00:00Z",
+            }}}]))
+            return
+        super().do_POST()
+
+
+def run(client, messages):
+    latencies, cached = [], 0
+    for message in messages:
+        start = time.perf_counter()
+        response = client.post("/chat", json={"history": [{"role": "user", "content": message}]}).json()
+        latencies.append(time.perf_counter() - start)
+        cached += bool(response.get("cached"))
+    return latencies, cached
+
+
+def main(args):
+    from fastapi.testclient import TestClient
+
+    rng = random.Random(args.seed)
+    messages = [WRITE if rng.random() < args.write_ratio else rng.choice(QUESTIONS) for _ in range(args.requests)]
+
+    _, base_url = start_server(WritingGeminiHandler, latency=args.latency)
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["GEMINI_BASE_URL"] = base_url
+
+    import app
+    from response_cache import ResponseCache
+
+    print(f"{args.requests} requests, {messages.count(WRITE)} writes, Gemini latency {args.latency * 1000:.0f} ms")
+    with TestClient(app.app) as client:
+        for label, cache in (("no cache", ResponseCache(ttl_seconds=0)), ("cache", ResponseCache())):
+            app.response_cache = cache
+            latencies, cached = run(client, messages)
+            print(f"{label:>8}: total {sum(latencies):6.2f} s, median {statistics.median(latencies) * 1000:7.2f} ms, "
+                  f"{cached} served from cache; {cache.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stub Gemini call")
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,69 @@
+"""Time to first byte of /chat versus /chat/stream against a stub Gemini server
+
+Run from the repository root:
+    python benchmarks/chat_ttfb.py --latency 1.0 --words 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubGeminiHandler, start_server
+
+
+def measure(client, path: str):
+    """Return (time to first body byte, total time) for one request"""
+    payload = {"history": [{"role": "user", "content": "hello"}]}
+    start = time.perf_counter()
+    first = None
+    with client.stream("POST", path, json=payload) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            if chunk and first is None:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main(args):
+    import httpx
+    import uvicorn
+
+    reply = " ".join(f"word{i}" for i in range(args.words))
+    stub, base_url = start_server(StubGeminiHandler, latency=args.latency, reply=reply)
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["GEMINI_BASE_URL"] = base_url
+    # Every request sends the same prompt; measure the chat path, not cached replies
+    os.environ["RESPONSE_CACHE_SECONDS"] = "0"
+
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"stub latency {args.latency * 1000:.0f} ms over {args.words} chunks, {args.runs} runs")
+    print(f"{'endpoint':>14} {'ttfb ms':>10} {'total ms':>10}")
+    with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=60) as client:
+        for path in ("/chat", "/chat/stream"):
+            samples = [measure(client, path) for _ in range(args.runs)]
+            ttfb = statistics.median(s[0] for s in samples) * 1000
+            total = statistics.median(s[1] for s in samples) * 1000
+            print(f"{path:>14} {ttfb:>10.1f} {total:>10.1f}")
+
+    server.should_exit = True
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="stub generation time in seconds")
+    parser.add_argument("--words", type=int, default=20, help="chunks in the streamed reply")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    main(parser.parse_args())
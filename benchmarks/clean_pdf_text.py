@@ -0,0 +1,66 @@
+"""Equivalence check and speed of the compiled clean_pdf_text engine
+
+Run from the repository root:
+    python benchmarks/clean_pdf_text.py --pages 500 --fuzz 20000
+
+The compiled engine in vectorDatabase/pdfCleaner.py must produce exactly the
+output of the original multi-pass implementation (tests/pdf_cleaner_reference.py,
+also used by the test suite). The script checks a synthetic slide deck plus
+randomized adversarial inputs built from every pattern the cleaner knows
+about, exits non-zero on any mismatch, and then times both implementations.
+"""
+import argparse
+import random
+import sys
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "vectorDatabase"))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_pdf import slide_lines
+from pdf_cleaner_reference import fuzz_input, reference_clean_pdf_text
+
+
+def deck(pages: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join("\n".join(slide_lines(rng)) for _ in range(pages))
+
+
+def timed(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    from pdfCleaner import clean_pdf_text
+
+    text = deck(args.pages)
+    rng = random.Random(args.seed)
+    cases = [text] + [fuzz_input(rng) for _ in range(args.fuzz)]
+    mismatches = [c for c in cases if clean_pdf_text(c) != reference_clean_pdf_text(c)]
+    print(f"equivalence: {len(cases) - len(mismatches)}/{len(cases)} inputs identical")
+    if mismatches:
+        print(f"first mismatch: {mismatches[0][:200]!r}")
+        sys.exit(1)
+
+    print(f"synthetic deck: {args.pages} pages, {len(text) / 1e6:.2f} MB")
+    reference = timed(reference_clean_pdf_text, text, args.repeat)
+    compiled = timed(clean_pdf_text, text, args.repeat)
+    print(f"{'reference':>10} {reference * 1000:>9.1f} ms")
+    print(f"{'compiled':>10} {compiled * 1000:>9.1f} ms  ({reference / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fuzz", type=int, default=20000, help="randomized equivalence inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+"""
+Time and memory of PDF text extraction on a long synthetic deck
+
+Compares the previous approach (`text += page.extract_text()` over every page,
+then one clean_pdf_text over the whole string) against the page-streaming
+extractor, consuming (page_number, text) records one page at a time.
+The extraction cache is bypassed so both sides parse the PDF.
+
+    python benchmarks/pdf_extraction.py --pages 500
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "vectorDatabase"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import PyPDF2  # noqa: E402
+from pdfCleaner import clean_pdf_text  # noqa: E402
+from pdfExtraction import iter_pdf_pages  # noqa: E402
+from synthetic_pdf import make_pdf, slide_lines  # noqa: E402
+
+
+def concatenating_extract(data):
+    """The previous implementation"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return clean_pdf_text(text)
+
+
+def streaming_extract(data):
+    """Page records consumed one at a time, as an indexer would"""
+    pages = 0
+    chars = 0
+    for page_number, raw in iter_pdf_pages(data):
+        cleaned = clean_pdf_text(raw)
+        pages = page_number
+        chars += len(cleaned)
+    return pages, chars
+
+
+def measure(func, data):
+    """Wall time of an untraced run, then peak traced memory of a second run"""
+    start = time.perf_counter()
+    func(data)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data = make_pdf([slide_lines(rng, args.lines) for _ in range(args.pages)])
+    print(f"Synthetic PDF: {args.pages} pages, {len(data) / 1024:.0f} KiB")
+
+    # Page records must carry the same text the concatenating path saw
+    joined = "".join(raw for _, raw in iter_pdf_pages(data))
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    if joined != "".join(page.extract_text() for page in reader.pages):
+        print("MISMATCH: page records differ from whole-document text")
+        sys.exit(1)
+
+    for name, func in (("concatenate", concatenating_extract), ("stream pages", streaming_extract)):
+        elapsed, peak = measure(func, data)
+        print(f"{name:>14}: {elapsed * 1000:8.0f} ms   peak traced memory {peak / 1024 ** 2:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
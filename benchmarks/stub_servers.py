@@ -0,0 +1,233 @@
+"""Local stand-ins for the Gemini and Google APIs used by the benchmarks"""
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import itertools
+import json
+import threading
+import time
+import uuid
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent calls after a fixed delay
+
+    Every `tool_every`-th request answers with a say_hello_world function call
+    so the tool offload path gets exercised as well. streamGenerateContent
+    sends one SSE chunk per word of `reply`, spread over the same delay.
+    """
+    latency = 0.2
+    tool_every = 0
+    reply = "stub reply"
+    counter = itertools.count(1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if ":streamGenerateContent" in self.path:
+            self._stream()
+            return
+        if ":generateContent" not in self.path:
+            self._send_json({"error": {"code": 404, "message": "not found"}}, status=404)
+            return
+
+        time.sleep(self.latency)
+        self._send_json(self._response(self._parts()))
+
+    def _parts(self):
+        n = next(self.counter)
+        if self.tool_every and n % self.tool_every == 0:
+            return [{"functionCall": {"name": "say_hello_world", "args": {}}}]
+        return [{"text": word} for word in self.reply.split(" ")]
+
+    @staticmethod
+    def _response(parts):
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": parts},
+                "finishReason": "STOP",
+            }]
+        }
+
+    def _stream(self):
+        """Send the reply as SSE chunks spread evenly over `latency`"""
+        parts = self._parts()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for part in parts:
+            time.sleep(self.latency / len(parts))
+            payload = json.dumps(self._response([part]))
+            self.wfile.write(f"data: {payload}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+
+class StubCalendarHandler(BaseHTTPRequestHandler):
+    """Calendar v3 events list/insert/patch/delete plus multipart batch requests
+
+    Events live in the `events` dict ({id: event}) given to start_server, and
+    `counts` tallies HTTP requests, batch requests and writes. Every HTTP
+    request (a batch counts once) waits `latency` seconds.
+
+    Given a `changes` list, writes are logged to it and listings hand out
+    sync tokens (positions in the log). A syncToken below `min_sync_token`
+    gets 410 Gone, as an expired token would.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.05
+    events = None
+    counts = None
+    changes = None
+    min_sync_token = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def _send(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        self._count("http_requests")
+        time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if urlparse(self.path).path.startswith("/batch/"):
+            self._batch(body)
+            return
+        status, payload = self._dispatch(self.command, self.path, body)
+        self._send(status, json.dumps(payload).encode("utf-8") if payload is not None else b"")
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+    def _dispatch(self, method, path, body):
+        """(status, json payload or None) for one Calendar request"""
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")
+        # calendar/v3/calendars/{calendarId}/events[/{eventId}]
+        if parts[:3] != ["calendar", "v3", "calendars"] or len(parts) < 5 or parts[4] != "events":
+            return 404, {"error": {"code": 404, "message": "not found"}}
+        event_id = parts[5] if len(parts) > 5 else None
+
+        with self.lock:
+            if method == "GET" and event_id is None:
+                return self._list(parse_qs(url.query))
+            if method == "POST" and event_id is None:
+                event = json.loads(body or b"{}")
+                event["id"] = uuid.uuid4().hex
+                self.events[event["id"]] = event
+                self._log(event["id"])
+                self.counts["writes"] = self.counts.get("writes", 0) + 1
+                return 200, event
+            if event_id not in self.events:
+                return 404, {"error": {"code": 404, "message": "event not found"}}
+            self.counts["writes"] = self.counts.get("writes", 0) + 1
+            self._log(event_id)
+            if method == "PATCH":
+                _merge(self.events[event_id], json.loads(body or b"{}"))
+                return 200, self.events[event_id]
+            if method == "DELETE":
+                del self.events[event_id]
+                return 204, None
+        return 405, {"error": {"code": 405, "message": "method not allowed"}}
+
+    def _log(self, event_id):
+        if self.changes is not None:
+            self.changes.append(event_id)
+
+    def _list(self, query):
+        if "syncToken" in query:
+            token = int(query["syncToken"][0])
+            if token < self.min_sync_token:
+                return 410, {"error": {"code": 410, "message": "Sync token is no longer valid"}}
+            changed = dict.fromkeys(self.changes[token:])
+            items = [self.events.get(event_id, {"id": event_id, "status": "cancelled"}) for event_id in changed]
+        else:
+            items = list(self.events.values())
+        for condition in query.get("privateExtendedProperty", []):
+            name, _, value = condition.partition("=")
+            items = [e for e in items if e.get("extendedProperties", {}).get("private", {}).get(name) == value]
+        page_size = min(int(query.get("maxResults", ["250"])[0]), 2500)
+        start = int(query.get("pageToken", ["0"])[0])
+        page = {"kind": "calendar#events", "items": items[start:start + page_size]}
+        if start + page_size < len(items):
+            page["nextPageToken"] = str(start + page_size)
+        elif self.changes is not None:
+            page["nextSyncToken"] = str(len(self.changes))
+        return 200, page
+
+    def _batch(self, body):
+        self._count("batch_requests")
+        message = BytesParser().parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body
+        )
+        boundary = uuid.uuid4().hex
+        out = []
+        for part in message.get_payload():
+            raw = part.get_payload(decode=True)
+            head, separator, inner_body = raw.partition(b"\r\n\r\n")
+            if not separator:
+                head, separator, inner_body = raw.partition(b"\n\n")
+            method, path = head.decode("utf-8").splitlines()[0].split(" ")[:2]
+            status, payload = self._dispatch(method, path, inner_body)
+            response_body = json.dumps(payload) if payload is not None else ""
+            content_id = part["Content-ID"].strip("<>")
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(response_body)}\r\n\r\n"
+                f"{response_body}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        self._send(200, "".join(out).encode("utf-8"), f"multipart/mixed; boundary={boundary}")
+
+
+def _merge(target, patch):
+    """PATCH semantics: nested objects are merged, everything else replaced"""
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_server(handler_cls, **attrs):
+    """Start `handler_cls` on a free localhost port in a daemon thread
+
+    Returns:
+        (server, base_url)
+    """
+    handler = type(handler_cls.__name__, (handler_cls,), attrs)
+    server = StubServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
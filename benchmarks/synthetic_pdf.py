@@ -0,0 +1,64 @@
+"""Minimal PDF writer for generating benchmark inputs without extra dependencies"""
+import random
+
+
+def make_pdf(pages):
+    """
+    Build a PDF with one Helvetica text page per entry of `pages`
+
+    Args:
+        pages (List[List[str]]): Lines of text for each page
+
+    Returns:
+        bytes: The PDF file
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        ops = ["BT /F1 11 Tf 14 TL 50 780 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+WORDS = ("network", "epidemic", "graph", "misinformation", "node", "edge", "model",
+         "probability", "cascade", "threshold", "measles", "meme", "degree", "cluster")
+
+
+def slide_lines(rng: random.Random, count: int = 30):
+    """Lecture-slide-like lines: prose, bullets, numbers and formula fragments"""
+    lines = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))).capitalize())
+        elif kind < 0.75:
+            lines.append(f"• {' '.join(rng.choice(WORDS) for _ in range(5))}")
+        elif kind < 0.85:
+            lines.append(str(rng.randint(1, 40)))
+        else:
+            lines.append(f"p = 0.{rng.randint(1, 99)} and A{rng.randint(1, 9)} = f(x, {rng.random():.3f})")
+    return lines
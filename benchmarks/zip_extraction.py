@@ -0,0 +1,55 @@
+"""Throughput of course export zip extraction, serial versus process pool
+
+Run from the repository root:
+    python benchmarks/zip_extraction.py --pdfs 64 --pages 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vectorDatabase"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_pdf import make_pdf, slide_lines
+
+
+def build_zip(path: str, pdfs: int, pages: int, seed: int = 0):
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(pdfs):
+            zf.writestr(f"files/lecture_{i:03d}.pdf", make_pdf([slide_lines(rng) for _ in range(pages)]))
+            zf.writestr(f"wiki_content/page_{i:03d}.html", "<p>" + " ".join(slide_lines(rng, 10)) + "</p>")
+
+
+def main(args):
+    import contextlib
+    import io
+    from getCourseInfo import iter_zip_content
+
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_path = os.path.join(tmp, "export.zip")
+        build_zip(zip_path, args.pdfs, args.pages)
+        size_mb = os.path.getsize(zip_path) / 1e6
+        print(f"synthetic export: {args.pdfs} PDFs x {args.pages} pages + {args.pdfs} pages, {size_mb:.1f} MB")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>9}")
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                items = list(iter_zip_content(zip_path, workers))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {len(items) / elapsed:>9.1f} {baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdfs", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    main(parser.parse_args())
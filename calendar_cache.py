@@ -0,0 +1,213 @@
+"""Per-user Calendar event cache kept current with sync tokens
+
+The first read for a (user, calendar) pulls every event once and keeps the
+`nextSyncToken` Google hands back. Later refreshes send that token and only
+receive what changed since (cancelled events included, which are dropped). A
+410 Gone means the token expired, and the cache starts over with a full sync.
+
+Reads within `max_age` seconds of the last refresh never leave the process.
+Range queries go through an index of events sorted by start time: two bisects
+find the candidates, so "what's on next week" does not scan every event.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from google_services import credential_identity, service_pool
+
+
+def event_bounds(event) -> Tuple[float, float]:
+    """(start, end) of an event as UTC timestamps; all-day dates count from UTC midnight"""
+    def stamp(moment):
+        value = moment.get("dateTime") or moment.get("date")
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    start = stamp(event["start"])
+    end = stamp(event["end"]) if event.get("end") else start
+    return start, max(start, end)
+
+
+class EventCache:
+    """Events of one calendar for one user, refreshed incrementally
+
+    Args:
+        calendar_id: Calendar to mirror
+        max_age: Seconds a refresh stays fresh before reads sync again
+    """
+
+    def __init__(self, calendar_id: str = "primary", max_age: float = 60):
+        self.calendar_id = calendar_id
+        self.max_age = max_age
+        self.sync_token: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+        self.stats = {"full_syncs": 0, "incremental_syncs": 0, "list_requests": 0, "hits": 0}
+        self._events: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._index_stale = True
+        self._starts: List[float] = []
+        self._ordered: List[Tuple[float, float, Dict]] = []
+        self._max_duration = 0.0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def invalidate(self):
+        """Make the next read sync first, e.g. after writing to the calendar"""
+        self.refreshed_at = None
+
+    def _list(self, service, **params):
+        """Every page of an events.list call; returns (items, nextSyncToken)"""
+        items, page_token = [], None
+        while True:
+            response = service.events().list(
+                calendarId=self.calendar_id, singleEvents=True, maxResults=2500,
+                pageToken=page_token, **params
+            ).execute()
+            self.stats["list_requests"] += 1
+            items.extend(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return items, response.get("nextSyncToken")
+
+    def _apply(self, items):
+        for event in items:
+            if event.get("status") == "cancelled":
+                self._events.pop(event["id"], None)
+            elif event.get("start"):
+                self._events[event["id"]] = event
+        self._index_stale = True
+
+    def sync(self, service):
+        """Bring the cache up to date: incrementally when we hold a sync token, else in full"""
+        if self.sync_token:
+            try:
+                items, token = self._list(service, syncToken=self.sync_token)
+                self._apply(items)
+                self.sync_token = token
+                self.stats["incremental_syncs"] += 1
+                self.refreshed_at = time.monotonic()
+                return
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                print(f"Sync token for calendar {self.calendar_id} expired, doing a full sync")
+
+        items, token = self._list(service)
+        self._events = {}
+        self._apply(items)
+        self.sync_token = token
+        self.stats["full_syncs"] += 1
+        self.refreshed_at = time.monotonic()
+
+    def refresh(self, service_factory):
+        """
+        Sync if the last refresh is older than max_age
+
+        Args:
+            service_factory: Returns a context manager yielding a Calendar service,
+                only called when a sync is actually needed
+        """
+        with self._lock:
+            if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.max_age:
+                self.stats["hits"] += 1
+                return
+            with service_factory() as service:
+                self.sync(service)
+
+    def _index(self):
+        if not self._index_stale:
+            return
+        ordered = []
+        for event in self._events.values():
+            try:
+                start, end = event_bounds(event)
+            except (KeyError, ValueError):
+                continue
+            ordered.append((start, end, event))
+        ordered.sort(key=lambda entry: entry[0])
+        self._ordered = ordered
+        self._starts = [start for start, _, _ in ordered]
+        self._max_duration = max((end - start for start, end, _ in ordered), default=0.0)
+        self._index_stale = False
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """
+        Events overlapping [start, end), sorted by start time
+
+        Args:
+            start (datetime): Inclusive lower bound (aware), None for no bound
+            end (datetime): Exclusive upper bound (aware), None for no bound
+        """
+        with self._lock:
+            self._index()
+            low = start.timestamp() if start is not None else float("-inf")
+            # An event overlapping the window starts at most max_duration before it
+            lo = bisect_left(self._starts, low - self._max_duration) if start is not None else 0
+            hi = bisect_left(self._starts, end.timestamp()) if end is not None else len(self._starts)
+            return [event for event_start, event_end, event in self._ordered[lo:hi]
+                    if event_end > low or event_start >= low]
+
+
+class CalendarCachePool:
+    """EventCaches keyed by (credential, calendar), least recently used dropped first
+
+    Args:
+        max_users: Caches kept before the least recently used one is dropped
+        max_age: Seconds a refresh stays fresh (see EventCache)
+        pool: ServicePool used to lease Calendar services for syncs
+    """
+
+    def __init__(self, max_users: int = 256, max_age: Optional[float] = None, pool=service_pool):
+        self.max_users = max_users
+        self.max_age = max_age if max_age is not None else float(os.getenv("CALENDAR_CACHE_SECONDS", "60"))
+        self.pool = pool
+        self._caches: "OrderedDict[Tuple[str, str], EventCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache(self, credentials, calendar_id: str = "primary") -> EventCache:
+        """The cache of one user's calendar, created empty on first use"""
+        key = (credential_identity(credentials), calendar_id)
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = EventCache(calendar_id, self.max_age)
+            self._caches.move_to_end(key)
+            while len(self._caches) > self.max_users:
+                self._caches.popitem(last=False)
+            return cache
+
+    def events(self, credentials, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               calendar_id: str = "primary") -> List[Dict]:
+        """Events overlapping [start, end), syncing first if the cache is stale"""
+        cache = self.cache(credentials, calendar_id)
+        cache.refresh(lambda: self.pool.service("calendar", "v3", credentials))
+        return cache.between(start, end)
+
+    def sync_token(self, credentials, calendar_id: str = "primary") -> Optional[str]:
+        """Sync token of a user's calendar, syncing first if the cache is stale
+
+        The token changes whenever the calendar does, edits made outside this
+        app included, so it versions anything derived from the calendar.
+        """
+        cache = self.cache(credentials, calendar_id)
+        cache.refresh(lambda: self.pool.service("calendar", "v3", credentials))
+        return cache.sync_token
+
+    def invalidate(self, credentials, calendar_id: str = "primary"):
+        """Mark a user's calendar as changed so the next read syncs"""
+        with self._lock:
+            cache = self._caches.get((credential_identity(credentials), calendar_id))
+        if cache is not None:
+            cache.invalidate()
+
+
+calendar_cache = CalendarCachePool()
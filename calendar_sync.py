@@ -0,0 +1,280 @@
+"""Idempotent sync of Canvas deadlines into Google Calendar
+
+Every event the sync creates carries private extended properties naming the
+Canvas object it mirrors and a hash of the fields the sync sets. A run lists
+those events (one filtered, paginated listing), diffs them against the current
+deadlines and sends only the inserts, updates and deletes, packed into batch
+requests of up to 50 operations each. Re-running with nothing changed makes no
+writes. Events without the tag are never touched, and events are only deleted
+for the (course, kind) pairs present in the input, so a course whose fetch
+failed or a missing AllQuizzes.json does not wipe its events.
+
+    python calendar_sync.py --token $GOOGLE_ACCESS_TOKEN --dry-run
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+from google_services import service_pool
+
+# The vectorDatabase scripts import each other as top-level modules
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorDatabase"))
+from deadlineStore import DeadlineStore  # noqa: E402
+
+SOURCE_PROPERTY = "canvasSource"
+SOURCE_VALUE = "canvas-sync"
+ID_PROPERTY = "canvasId"
+COURSE_PROPERTY = "canvasCourse"
+HASH_PROPERTY = "canvasHash"
+
+# Calendar accepts at most 50 calls per batch request
+MAX_BATCH_SIZE = 50
+# Deadline events end at the due time
+EVENT_MINUTES = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def canvas_key(deadline) -> str:
+    """Identity of a deadline's event, stored in its extended properties"""
+    return f"{deadline.kind}:{deadline.id}"
+
+
+def event_body(deadline) -> Dict:
+    """Calendar event for a dated Deadline, tagged with its Canvas identity and content hash"""
+    start = deadline.due - timedelta(minutes=EVENT_MINUTES)
+    points = f", {deadline.points:g} points" if deadline.points is not None else ""
+    fields = {
+        "summary": f"{deadline.title} ({deadline.course})",
+        "description": f"Canvas {deadline.kind} due{points}",
+        "start": {"dateTime": start.strftime("%Y-%m-%dT%H:%M:%SZ"), "timeZone": "UTC"},
+        "end": {"dateTime": deadline.due.strftime("%Y-%m-%dT%H:%M:%SZ"), "timeZone": "UTC"},
+        "transparency": "transparent",
+    }
+    # The course is hashed too, so events created before it was stored get it on the next run
+    hashed = {**fields, COURSE_PROPERTY: deadline.course}
+    digest = hashlib.sha256(json.dumps(hashed, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    body = dict(fields)
+    body["extendedProperties"] = {"private": {
+        SOURCE_PROPERTY: SOURCE_VALUE,
+        ID_PROPERTY: canvas_key(deadline),
+        COURSE_PROPERTY: deadline.course,
+        HASH_PROPERTY: digest,
+    }}
+    return body
+
+
+def _private(event) -> Dict:
+    return event.get("extendedProperties", {}).get("private", {})
+
+
+def _scope(event) -> Tuple[Optional[str], str]:
+    """(course, kind) an event belongs to; the course is None for events that predate storing it"""
+    private = _private(event)
+    return private.get(COURSE_PROPERTY), private.get(ID_PROPERTY, "").split(":", 1)[0]
+
+
+def _retryable(error: Exception) -> bool:
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status in RETRY_STATUSES:
+        return True
+    return error.resp.status == 403 and b"ateLimitExceeded" in (error.content or b"")
+
+
+class CalendarSync:
+    """Diff Canvas deadlines against the tagged events of one calendar and apply the changes
+
+    Args:
+        service: Calendar v3 service (e.g. leased from google_services.service_pool)
+        calendar_id: Calendar to sync into
+        batch_size: Operations per batch request (at most 50)
+        max_retries: Rounds of retries for operations that were rate limited or hit a 5xx
+        base_delay: Seconds before the first retry round, doubled every round
+    """
+
+    def __init__(self, service, calendar_id: str = "primary", batch_size: int = MAX_BATCH_SIZE,
+                 max_retries: int = 3, base_delay: float = 1.0):
+        self.service = service
+        self.calendar_id = calendar_id
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.stats = {"list_requests": 0, "batch_requests": 0, "operations": 0}
+
+    def existing_events(self) -> Dict[str, List[Dict]]:
+        """{canvas_key: [events]} of every event this sync created in the calendar"""
+        events, page_token = {}, None
+        while True:
+            response = self.service.events().list(
+                calendarId=self.calendar_id,
+                privateExtendedProperty=f"{SOURCE_PROPERTY}={SOURCE_VALUE}",
+                maxResults=2500,
+                pageToken=page_token,
+            ).execute()
+            self.stats["list_requests"] += 1
+            for event in response.get("items", []):
+                key = _private(event).get(ID_PROPERTY)
+                if key:
+                    events.setdefault(key, []).append(event)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return events
+
+    def plan(self, deadlines: Iterable) -> Dict:
+        """
+        Work out the changes without applying them
+
+        Args:
+            deadlines: deadlineStore.Deadline items; undated ones and ones without an id are skipped.
+                Stale events are only deleted for the (course, kind) pairs among them.
+
+        Returns:
+            Dict: {'insert': [(key, body)], 'update': [(key, event_id, body)],
+                   'delete': [(key, event_id)], 'unchanged': int}
+        """
+        wanted, loaded = {}, set()
+        for deadline in deadlines:
+            loaded.add((deadline.course, deadline.kind))
+            if deadline.due is not None and deadline.id is not None:
+                wanted[canvas_key(deadline)] = event_body(deadline)
+
+        plan = {"insert": [], "update": [], "delete": [], "unchanged": 0}
+        existing = self.existing_events()
+        for key, body in wanted.items():
+            events = existing.pop(key, [])
+            if not events:
+                plan["insert"].append((key, body))
+                continue
+            event, duplicates = events[0], events[1:]
+            if _private(event).get(HASH_PROPERTY) == _private(body)[HASH_PROPERTY]:
+                plan["unchanged"] += 1
+            else:
+                plan["update"].append((key, event["id"], body))
+            plan["delete"].extend((key, duplicate["id"]) for duplicate in duplicates)
+        for key, events in existing.items():
+            plan["delete"].extend((key, event["id"]) for event in events if _scope(event) in loaded)
+        return plan
+
+    def _requests(self, plan: Dict) -> List[Tuple[str, str, object]]:
+        """(action, key, request factory) for every change in the plan"""
+        events = self.service.events()
+        operations = []
+        for key, body in plan["insert"]:
+            operations.append(("inserted", key, lambda body=body: events.insert(
+                calendarId=self.calendar_id, body=body)))
+        for key, event_id, body in plan["update"]:
+            operations.append(("updated", key, lambda event_id=event_id, body=body: events.patch(
+                calendarId=self.calendar_id, eventId=event_id, body=body)))
+        for key, event_id in plan["delete"]:
+            operations.append(("deleted", key, lambda event_id=event_id: events.delete(
+                calendarId=self.calendar_id, eventId=event_id)))
+        return operations
+
+    def _execute(self, operations) -> List[Tuple[Tuple, Exception]]:
+        """Run operations in batches; returns the (operation, error) pairs that failed"""
+        failed = []
+        for start in range(0, len(operations), self.batch_size):
+            chunk = operations[start:start + self.batch_size]
+
+            def callback(request_id, response, exception):
+                if exception is not None:
+                    failed.append((chunk[int(request_id)], exception))
+
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index, (_, _, make_request) in enumerate(chunk):
+                batch.add(make_request(), request_id=str(index))
+            try:
+                batch.execute()
+            except Exception as e:
+                # The batch request itself failed, so none of its operations are known to have run
+                failed.extend((operation, e) for operation in chunk)
+            self.stats["batch_requests"] += 1
+            self.stats["operations"] += len(chunk)
+        return failed
+
+    def apply(self, plan: Dict) -> Dict:
+        """
+        Apply a plan in batch requests, retrying rate-limited and 5xx operations
+
+        Returns:
+            Dict: {'inserted', 'updated', 'deleted', 'unchanged': counts, 'failed': [(key, error)]}
+        """
+        operations = self._requests(plan)
+        failed = self._execute(operations)
+        for attempt in range(self.max_retries):
+            retry = [operation for operation, error in failed if _retryable(error)]
+            if not retry:
+                break
+            time.sleep(self.base_delay * 2 ** attempt)
+            failed = [(operation, error) for operation, error in failed if not _retryable(error)]
+            failed.extend(self._execute(retry))
+
+        failed_operations = {id(operation) for operation, _ in failed}
+        report = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": plan["unchanged"]}
+        for operation in operations:
+            if id(operation) not in failed_operations:
+                report[operation[0]] += 1
+        report["failed"] = [(operation[1], str(error)) for operation, error in failed]
+        return report
+
+    def sync(self, deadlines: Iterable) -> Dict:
+        """Plan and apply in one go; see apply() for the report"""
+        return self.apply(self.plan(deadlines))
+
+
+def sync_deadlines(credentials, deadlines: Iterable, calendar_id: str = "primary", dry_run: bool = False) -> Dict:
+    """
+    Sync deadlines into a user's calendar through a pooled Calendar service
+
+    Args:
+        credentials: google.oauth2 Credentials of the user
+        deadlines: deadlineStore.Deadline items, undated ones included so that an
+            event whose deadline lost its due date is deleted
+        calendar_id: Calendar to sync into
+        dry_run: Only plan; nothing is written
+
+    Returns:
+        Dict: apply() report, or the plan when dry_run
+    """
+    with service_pool.service("calendar", "v3", credentials) as service:
+        syncer = CalendarSync(service, calendar_id)
+        plan = syncer.plan(deadlines)
+        return plan if dry_run else syncer.apply(plan)
+
+
+def format_report(report: Dict) -> str:
+    if "insert" in report:
+        return (f"Would insert {len(report['insert'])}, update {len(report['update'])}, "
+                f"delete {len(report['delete'])}; {report['unchanged']} unchanged")
+    lines = [f"Inserted {report['inserted']}, updated {report['updated']}, "
+             f"deleted {report['deleted']}; {report['unchanged']} unchanged"]
+    lines.extend(f"  failed {key}: {error}" for key, error in report["failed"])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync Canvas assignment and quiz deadlines into Google Calendar")
+    parser.add_argument("--dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorDatabase"),
+                        help="Directory with AllAssignments.json / AllQuizzes.json from vectorDatabase/main.py")
+    parser.add_argument("--token", default=os.getenv("GOOGLE_ACCESS_TOKEN"), help="OAuth access token with the calendar scope")
+    parser.add_argument("--calendar", default="primary")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    args = parser.parse_args()
+
+    if not args.token:
+        parser.error("an access token is required (--token or $GOOGLE_ACCESS_TOKEN)")
+    store = DeadlineStore.load(args.dir)
+    report = sync_deadlines(Credentials(args.token), store.between() + store.undated(), args.calendar, args.dry_run)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Server-side chat conversations with rolling-summary compaction
+
+Clients send only the new message and a conversation ID. The conversation
+keeps its turns (tool calls and results included) on the server. When its
+estimated size passes the token budget, the older turns are folded into a
+rolling summary. Only the most recent turns, up to about half the budget,
+are kept verbatim. Compaction runs after a reply has been sent, so it never
+delays one. Each request records how many tokens the full history would have
+cost versus what was actually sent.
+"""
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+import time
+
+from google.genai import types
+
+# Conversations whose estimated size passes this are compacted
+TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "6000"))
+# Idle conversations are dropped after this many seconds
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", str(24 * 3600)))
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a student and their school assistant. "
+    "Keep every fact, date, course, decision and open request that may matter later; drop small talk. "
+    "Answer with the updated summary only, in at most {words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew turns to fold in:\n{turns}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+def content_text(content: types.Content) -> str:
+    """Plain-text rendering of a turn, tool calls and results included"""
+    pieces = []
+    for part in content.parts or []:
+        if part.text:
+            pieces.append(part.text)
+        elif part.function_call:
+            pieces.append(f"[called {part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)})]")
+        elif part.function_response:
+            pieces.append(f"[{part.function_response.name} returned {json.dumps(part.function_response.response, default=str)}]")
+    return "\n".join(pieces)
+
+
+def _starts_exchange(content: types.Content) -> bool:
+    """A user message (not a function response), where history can be cut cleanly"""
+    return content.role == "user" and not any(part.function_response for part in content.parts or [])
+
+
+class Conversation:
+    """Turns of one conversation plus the summary of the turns compacted away
+
+    Args:
+        owner: Hash of the session that created it, or None when there was no session
+        token_budget: Estimated tokens above which the history is compacted
+    """
+
+    def __init__(self, owner: Optional[str] = None, token_budget: int = TOKEN_BUDGET):
+        self.owner = owner
+        self.token_budget = token_budget
+        self.summary = ""
+        self.turns: List[types.Content] = []
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        # Estimated tokens of every turn ever added, what sending the whole history would cost
+        self.full_tokens = 0
+        self.stats = {"requests": 0, "compactions": 0, "tokens_sent": 0, "tokens_saved": 0}
+
+    def add(self, contents: List[types.Content]):
+        for content in contents:
+            self.turns.append(content)
+            self.full_tokens += estimate_tokens(content_text(content))
+
+    def _summary_contents(self) -> List[types.Content]:
+        if not self.summary:
+            return []
+        return [
+            types.Content(role="user", parts=[types.Part(text=f"Summary of our conversation so far:\n{self.summary}")]),
+            types.Content(role="model", parts=[types.Part(text="Understood, I'll keep that in mind.")]),
+        ]
+
+    def contents(self) -> List[types.Content]:
+        """What to send to the model: the summary (if any) then the recent turns"""
+        return self._summary_contents() + list(self.turns)
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(content_text(content)) for content in self.contents())
+
+    def text_turns(self) -> List[Tuple[str, str]]:
+        """(role, text) of the kept turns that are plain messages, without tool calls and results"""
+        return [
+            (content.role, content_text(content)) for content in self.turns
+            if not any(part.function_call or part.function_response for part in content.parts or [])
+        ]
+
+    def record_request(self, pending: types.Content, cached: bool = False) -> Dict[str, int]:
+        """Count a request over contents() plus the `pending` user turn; returns its token usage estimate
+
+        A cached reply sent nothing to the model.
+        """
+        pending_tokens = estimate_tokens(content_text(pending))
+        sent = 0 if cached else self.tokens() + pending_tokens
+        full = self.full_tokens + pending_tokens
+        saved = max(0, full - sent)
+        self.stats["requests"] += 1
+        self.stats["tokens_sent"] += sent
+        self.stats["tokens_saved"] += saved
+        return {"tokens_sent": sent, "full_history_tokens": full, "tokens_saved": saved}
+
+    def _cut_index(self) -> int:
+        """Index of the first turn kept verbatim: the longest clean suffix within half the budget
+
+        The latest exchange is always kept, and a cut never separates a tool
+        call from its result.
+        """
+        starts = [i for i, content in enumerate(self.turns) if _starts_exchange(content)]
+        if not starts:
+            return 0
+        cut = starts[-1]
+        kept = sum(estimate_tokens(content_text(content)) for content in self.turns[cut:])
+        for start in reversed(starts[:-1]):
+            size = sum(estimate_tokens(content_text(content)) for content in self.turns[start:cut])
+            if kept + size > self.token_budget // 2:
+                break
+            kept += size
+            cut = start
+        return cut
+
+    def needs_compaction(self) -> bool:
+        return self.tokens() > self.token_budget
+
+    async def compact(self, summarize: Callable[[str, str, int], Awaitable[str]]):
+        """
+        Fold the older turns into the rolling summary
+
+        Args:
+            summarize: async (summary, new_turns_text, max_words) -> updated summary.
+                If it fails, the folded turns are appended to the summary truncated.
+        """
+        cut = self._cut_index()
+        if cut == 0:
+            return
+        folded = self.turns[:cut]
+        transcript = "\n".join(f"{content.role}: {content_text(content)}" for content in folded)
+        # The summary gets a quarter of the budget (about 3/4 of a word per token)
+        summary_tokens = self.token_budget // 4
+        max_words = max(50, summary_tokens * 3 // 4)
+        try:
+            summary = (await summarize(self.summary, transcript, max_words)).strip()
+        except Exception as e:
+            print(f"Error summarizing conversation, truncating instead: {str(e)}")
+            summary = ""
+        if not summary:
+            summary = f"{self.summary}\n{transcript}".strip()
+        # Never let the summary itself outgrow its share of the budget
+        limit = summary_tokens * 4
+        if len(summary) > limit:
+            summary = summary[-limit:]
+        self.summary = summary
+        self.turns = self.turns[cut:]
+        self.stats["compactions"] += 1
+
+
+class ConversationStore:
+    """In-memory conversations by ID, oldest dropped past `max_conversations` or after `ttl_seconds` idle
+
+    Args:
+        max_conversations: Conversations kept before the least recently used is dropped
+        ttl_seconds: Idle time after which a conversation is dropped
+        token_budget: Passed to every new Conversation
+    """
+
+    def __init__(self, max_conversations: int = 1000, ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+                 token_budget: int = TOKEN_BUDGET):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.token_budget = token_budget
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.stats = {"requests": 0, "compactions": 0, "tokens_sent": 0, "tokens_saved": 0}
+
+    @staticmethod
+    def owner_of(session_id: Optional[str]) -> Optional[str]:
+        return hashlib.sha256(session_id.encode("utf-8")).hexdigest() if session_id else None
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._conversations:
+            conversation_id, conversation = next(iter(self._conversations.items()))
+            if now - conversation.last_used <= self.ttl_seconds and len(self._conversations) <= self.max_conversations:
+                return
+            del self._conversations[conversation_id]
+
+    def create(self, session_id: Optional[str] = None):
+        """Start a conversation; returns (conversation_id, conversation)"""
+        conversation_id = secrets.token_urlsafe(16)
+        conversation = Conversation(self.owner_of(session_id), self.token_budget)
+        self._conversations[conversation_id] = conversation
+        self._expire()
+        return conversation_id, conversation
+
+    def get(self, conversation_id: str, session_id: Optional[str] = None) -> Optional[Conversation]:
+        """A conversation by ID, or None if unknown, expired or started under another session"""
+        self._expire()
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None or conversation.owner != self.owner_of(session_id):
+            return None
+        conversation.last_used = time.monotonic()
+        self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def delete(self, conversation_id: str):
+        self._conversations.pop(conversation_id, None)
+
+    def record(self, usage: Dict[str, int]):
+        """Add one request's token usage to the store totals"""
+        self.stats["requests"] += 1
+        self.stats["tokens_sent"] += usage["tokens_sent"]
+        self.stats["tokens_saved"] += usage["tokens_saved"]
+
+    async def compact(self, conversation: Conversation, summarize):
+        """Compact a conversation if it is over budget, waiting for any turn in progress"""
+        async with conversation.lock:
+            if conversation.needs_compaction():
+                await conversation.compact(summarize)
+                self.stats["compactions"] += 1
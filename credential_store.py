@@ -0,0 +1,291 @@
+"""Encrypted server-side store of users' Google OAuth credentials
+
+/auth/callback saves the credentials it obtains under a random session ID and
+only that ID goes back to the client. Credentials are kept encrypted (Fernet)
+in SQLite, rows are keyed by a hash of the session ID, and decrypted
+Credentials objects stay in memory once loaded.
+
+A background thread refreshes access tokens that are about to expire, so the
+tools always get a warm token: no request waits for a refresh, and no tool
+call fails on an expired token after the Gemini round trip already happened.
+Only sessions used recently are kept warm; idle ones are dropped from memory
+and refreshed inline if they come back, and sessions unused for longer than
+the session TTL are deleted.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request as GoogleRequest
+from google.oauth2.credentials import Credentials
+
+DEFAULT_STORE_PATH = os.getenv(
+    "CREDENTIAL_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "credentials.sqlite"),
+)
+# Access tokens expiring within this many seconds are refreshed ahead of time
+REFRESH_MARGIN_SECONDS = float(os.getenv("CREDENTIAL_REFRESH_MARGIN", "600"))
+# How often the background thread looks for expiring tokens
+REFRESH_INTERVAL_SECONDS = float(os.getenv("CREDENTIAL_REFRESH_INTERVAL", "60"))
+# Sessions unused for this long are kept out of the background refresh and out of memory
+ACTIVE_SECONDS = float(os.getenv("CREDENTIAL_ACTIVE_SECONDS", str(24 * 3600)))
+# Sessions unused for this long are deleted
+SESSION_TTL_SECONDS = float(os.getenv("CREDENTIAL_SESSION_TTL", str(30 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS credentials (
+    session_key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    expiry REAL,
+    updated_at REAL NOT NULL,
+    last_used REAL
+);
+"""
+
+
+def load_key(key_path: str) -> bytes:
+    """Fernet key from $CREDENTIAL_STORE_KEY, else from `key_path` (created 0600 on first use)"""
+    key = os.getenv("CREDENTIAL_STORE_KEY")
+    if key:
+        return key.encode("utf-8")
+    try:
+        with open(key_path, "rb") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        key = Fernet.generate_key()
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+
+def session_key(session_id: str) -> str:
+    """Row key for a session; the ID itself is never stored"""
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+
+class CredentialStore:
+    """Encrypted, self-refreshing credentials keyed by opaque session IDs
+
+    Args:
+        path: SQLite file holding the encrypted credentials
+        key: Fernet key; defaults to load_key() with a .key file next to `path`
+        refresh_margin: Seconds before expiry at which tokens are refreshed
+        refresh_interval: Seconds between background refresh passes
+        active_seconds: Sessions used within this many seconds are refreshed in the background
+        session_ttl: Sessions unused for this many seconds are deleted
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, key: Optional[bytes] = None,
+                 refresh_margin: float = REFRESH_MARGIN_SECONDS,
+                 refresh_interval: float = REFRESH_INTERVAL_SECONDS,
+                 active_seconds: float = ACTIVE_SECONDS,
+                 session_ttl: float = SESSION_TTL_SECONDS):
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.active_seconds = active_seconds
+        self.session_ttl = session_ttl
+        self._fernet = Fernet(key or load_key(os.path.splitext(path)[0] + ".key"))
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(credentials)")]
+        if "last_used" not in columns:
+            # Stores created before sessions expired count as used when first opened
+            self._conn.execute("ALTER TABLE credentials ADD COLUMN last_used REAL")
+            self._conn.execute("UPDATE credentials SET last_used = ?", (time.time(),))
+            self._conn.commit()
+        self._lock = threading.RLock()
+        self._loaded: Dict[str, Credentials] = {}
+        # Last use per session as last written to the database, to batch up touch() writes
+        self._last_used: Dict[str, float] = {}
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"refreshed": 0, "refresh_errors": 0, "inline_refreshes": 0, "expired": 0}
+
+    def _save(self, key: str, credentials: Credentials):
+        data = self._fernet.encrypt(credentials.to_json().encode("utf-8"))
+        # google-auth keeps expiry as naive UTC
+        expiry = credentials.expiry.replace(tzinfo=timezone.utc).timestamp() if credentials.expiry else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO credentials (session_key, data, expiry, updated_at, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_key) DO UPDATE SET data = excluded.data, expiry = excluded.expiry, "
+                "updated_at = excluded.updated_at",
+                (key, data, expiry, now, now),
+            )
+            self._conn.commit()
+            self._loaded[key] = credentials
+            self._last_used.setdefault(key, now)
+
+    def create(self, credentials: Credentials) -> str:
+        """Store credentials under a new session ID and return the ID"""
+        session_id = secrets.token_urlsafe(32)
+        self._save(session_key(session_id), credentials)
+        return session_id
+
+    def _touch(self, key: str):
+        """Record a use of the session; written at most once per refresh_interval"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_used.get(key, 0) < self.refresh_interval:
+                return
+            self._conn.execute("UPDATE credentials SET last_used = ? WHERE session_key = ?", (now, key))
+            self._conn.commit()
+            self._last_used[key] = now
+
+    def _load(self, key: str) -> Optional[Credentials]:
+        with self._lock:
+            credentials = self._loaded.get(key)
+            if credentials is not None:
+                return credentials
+            row = self._conn.execute("SELECT data, last_used FROM credentials WHERE session_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and time.time() - row[1] > self.session_ttl:
+                self._delete(key)
+                self.stats["expired"] += 1
+                return None
+            self._last_used[key] = row[1] or 0
+            try:
+                info = json.loads(self._fernet.decrypt(row[0]))
+            except InvalidToken:
+                print("Could not decrypt stored credentials; was the store key changed?")
+                return None
+            credentials = Credentials.from_authorized_user_info(info)
+            self._loaded[key] = credentials
+            return credentials
+
+    def _expiring(self, credentials: Credentials, margin: float) -> bool:
+        if credentials.expiry is None:
+            return not credentials.token
+        # google-auth keeps expiry as naive UTC
+        return credentials.expiry - datetime.utcnow() < timedelta(seconds=margin)
+
+    def _refresh(self, key: str, credentials: Credentials, margin: float) -> bool:
+        """Refresh and persist one session's token; a revoked grant removes the session"""
+        with self._lock:
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+        with refresh_lock:
+            # Another thread may have refreshed it while we waited
+            if not self._expiring(credentials, margin):
+                return True
+            return self._refresh_locked(key, credentials)
+
+    def _refresh_locked(self, key: str, credentials: Credentials) -> bool:
+        try:
+            credentials.refresh(GoogleRequest())
+        except RefreshError as e:
+            self.stats["refresh_errors"] += 1
+            print(f"Could not refresh stored credentials: {str(e)}")
+            if "invalid_grant" in str(e):
+                self._delete(key)
+            return False
+        except Exception as e:
+            # Network trouble: keep the session and try again on the next pass
+            self.stats["refresh_errors"] += 1
+            print(f"Error refreshing stored credentials: {str(e)}")
+            return False
+        self._save(key, credentials)
+        self.stats["refreshed"] += 1
+        return True
+
+    def get(self, session_id: str) -> Optional[Credentials]:
+        """
+        Warm credentials of a session, or None for an unknown session
+
+        The background thread normally keeps tokens fresh; a token that has
+        already expired (e.g. right after a restart) is refreshed here.
+        """
+        if not session_id:
+            return None
+        key = session_key(session_id)
+        credentials = self._load(key)
+        if credentials is None:
+            return None
+        self._touch(key)
+        if self._expiring(credentials, 0):
+            self.stats["inline_refreshes"] += 1
+            if not self._refresh(key, credentials, 0):
+                return self._load(key)
+        return credentials
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM credentials WHERE session_key = ?", (key,))
+            self._conn.commit()
+            self._loaded.pop(key, None)
+            self._last_used.pop(key, None)
+            self._refresh_locks.pop(key, None)
+
+    def delete(self, session_id: str):
+        """Forget a session (logout)"""
+        self._delete(session_key(session_id))
+
+    def prune(self) -> int:
+        """Delete sessions past the session TTL and unload idle ones; returns how many were deleted"""
+        now = time.time()
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM credentials WHERE last_used < ?", (now - self.session_ttl,)
+            ).rowcount
+            self._conn.commit()
+            self.stats["expired"] += deleted
+            for key in [k for k in self._loaded if now - self._last_used.get(k, 0) > self.active_seconds]:
+                self._loaded.pop(key, None)
+                self._last_used.pop(key, None)
+                self._refresh_locks.pop(key, None)
+        return deleted
+
+    def refresh_expiring(self) -> int:
+        """Refresh the tokens of recently used sessions expiring within refresh_margin; returns how many were refreshed"""
+        now = time.time()
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT session_key FROM credentials WHERE (expiry IS NULL OR expiry < ?) AND last_used >= ?",
+                (now + self.refresh_margin, now - self.active_seconds),
+            )]
+        refreshed = 0
+        for key in keys:
+            credentials = self._load(key)
+            if credentials is not None and credentials.refresh_token and self._expiring(credentials, self.refresh_margin):
+                refreshed += self._refresh(key, credentials, self.refresh_margin)
+        return refreshed
+
+    def _run(self):
+        while True:
+            try:
+                self.prune()
+                self.refresh_expiring()
+            except Exception as e:
+                print(f"Error in credential refresh loop: {str(e)}")
+            if self._stop.wait(self.refresh_interval):
+                return
+
+    def start(self):
+        """Start the background refresh thread; its first pass runs right away"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="credential-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM credentials").fetchone()[0]
@@ -0,0 +1,136 @@
+"""Pooled googleapiclient service objects
+
+`build()` loads and parses the discovery document and creates a fresh HTTP
+transport on every call. The pool parses each bundled (static) discovery
+document once, and keeps built services around per (api, version, credential)
+so repeated tool calls reuse both the service and its keep-alive connection.
+
+httplib2 transports are not thread-safe, so a service is leased to one caller
+at a time; concurrent callers for the same key get their own instance.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+import google_auth_httplib2
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+
+def credential_identity(credentials) -> str:
+    """Stable identity for a credentials object
+
+    Prefers the refresh token (which survives access token refreshes) and
+    falls back to the access token. Only a hash is kept in memory.
+    """
+    secret = getattr(credentials, "refresh_token", None) or getattr(credentials, "token", None) or ""
+    client_id = getattr(credentials, "client_id", None) or ""
+    return hashlib.sha256(f"{client_id}:{secret}".encode("utf-8")).hexdigest()
+
+
+class ServicePool:
+    """LRU/TTL pool of built Google API services
+
+    Args:
+        max_keys: Maximum number of (api, version, credential) keys kept
+        ttl_seconds: Idle services older than this are discarded
+        max_idle_per_key: Idle instances kept per key
+        http_timeout: Socket timeout for the underlying httplib2 transport
+        api_endpoint: Root URL to send requests (batch requests included) to instead
+            of the one in the discovery document, e.g. a local stub server.
+            Defaults to $GOOGLE_API_ENDPOINT.
+    """
+
+    def __init__(
+        self,
+        max_keys: int = 256,
+        ttl_seconds: float = 900,
+        max_idle_per_key: int = 4,
+        http_timeout: float = 30,
+        api_endpoint: Optional[str] = None,
+    ):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self.max_idle_per_key = max_idle_per_key
+        self.http_timeout = http_timeout
+        self.api_endpoint = api_endpoint or os.getenv("GOOGLE_API_ENDPOINT")
+        self._lock = threading.Lock()
+        self._idle: "OrderedDict[Tuple[str, str, str], List[Tuple[float, object]]]" = OrderedDict()
+        self._documents: Dict[Tuple[str, str], dict] = {}
+        self.stats = {"hits": 0, "builds": 0, "evictions": 0}
+
+    def _document(self, api: str, version: str) -> dict:
+        """Parsed discovery document, loaded once from the bundled static copy"""
+        doc = self._documents.get((api, version))
+        if doc is None:
+            raw = get_static_doc(api, version)
+            if raw is None:
+                raise ValueError(f"No bundled discovery document for {api} {version}")
+            doc = json.loads(raw)
+            if self.api_endpoint:
+                # rootUrl also decides where batch requests go, which the
+                # api_endpoint client option does not change
+                doc["rootUrl"] = self.api_endpoint.rstrip("/") + "/"
+            self._documents[(api, version)] = doc
+        return doc
+
+    def _build(self, api: str, version: str, credentials):
+        http = google_auth_httplib2.AuthorizedHttp(
+            credentials, http=httplib2.Http(timeout=self.http_timeout)
+        )
+        return build_from_document(self._document(api, version), http=http)
+
+    def acquire(self, api: str, version: str, credentials):
+        """Take an idle service for this key, or build a new one"""
+        key = (api, version, credential_identity(credentials))
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                last_used, service = idle.pop()
+                if now - last_used <= self.ttl_seconds:
+                    self._idle.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return key, service
+                self.stats["evictions"] += 1
+            self.stats["builds"] += 1
+        return key, self._build(api, version, credentials)
+
+    def release(self, key, service):
+        """Return a leased service to the pool"""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append((time.monotonic(), service))
+            while len(self._idle) > self.max_keys:
+                _, dropped = self._idle.popitem(last=False)
+                self.stats["evictions"] += len(dropped)
+
+    @contextmanager
+    def service(self, api: str, version: str, credentials):
+        """Lease a service for the duration of a `with` block"""
+        key, service = self.acquire(api, version, credentials)
+        try:
+            yield service
+        finally:
+            self.release(key, service)
+
+    def clear(self, credentials: Optional[object] = None):
+        """Drop idle services, either all of them or those of one credential"""
+        with self._lock:
+            if credentials is None:
+                self._idle.clear()
+                return
+            identity = credential_identity(credentials)
+            for key in [k for k in self._idle if k[2] == identity]:
+                del self._idle[key]
+
+
+service_pool = ServicePool()
@@ -0,0 +1,155 @@
+"""Cache of chat replies for turns that only read data
+
+Entries are keyed by a hash of the user, the normalized tail of the
+conversation (the last few turns, ending with the new message) and the
+version of the data the reply was based on. A changed version makes old
+entries unreachable, so they simply age out. Entries expire after
+`ttl_seconds`, and the least recently used ones are dropped past
+`max_entries`.
+
+With an `embed` function and a `similarity` threshold, a miss falls back to
+the most similar cached question that has the same user, the same earlier
+turns and the same data version. That way "what's due this week" can answer
+"what is due this week?". Only replies from turns whose tool calls were all
+read-only are ever stored; the caller decides that.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a message"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _SPACE_RE.sub(" ", _PUNCTUATION_RE.sub("", text)).strip()
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    response: str
+    scope: str
+    group: str
+    question: str
+    vector: Optional[np.ndarray]
+    expires: float
+
+
+class ResponseCache:
+    """TTL/LRU cache of replies with optional near-duplicate lookup
+
+    Args:
+        max_entries: Entries kept before the least recently used is dropped
+        ttl_seconds: Lifetime of an entry; 0 disables the cache
+        tail_turns: Turns of the conversation (the new message included) that make up the key
+        embed: texts -> L2-normalized vectors, for the similarity lookup
+        similarity: Cosine similarity a near-duplicate needs; 0 turns the lookup off
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300, tail_turns: int = 3,
+                 embed: Optional[Callable[[List[str]], np.ndarray]] = None, similarity: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.tail_turns = tail_turns
+        self.embed = embed if similarity > 0 else None
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # group -> keys, for the similarity lookup and per-user invalidation
+        self._groups: Dict[str, set] = {}
+        self._scopes: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0}
+
+    def _keys(self, scope: str, tail: Sequence[Tuple[str, str]], version: str):
+        """(key, group, normalized question) for a turn
+
+        `tail` is the conversation as (role, text) pairs ending with the new
+        user message; the group is everything but that message.
+        """
+        tail = [(role, normalize(text)) for role, text in tail[-self.tail_turns:]]
+        question = tail[-1][1] if tail else ""
+        context = "\x1e".join(f"{role}:{text}" for role, text in tail[:-1])
+        group = _digest(scope, version, context)
+        return _digest(group, question), group, question
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for index, owner in ((self._groups, entry.group), (self._scopes, entry.scope)):
+            keys = index.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[owner]
+
+    def get(self, scope: str, tail: Sequence[Tuple[str, str]], version: str) -> Optional[str]:
+        """Cached reply for this turn, or None"""
+        key, group, question = self._keys(scope, tail, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= now:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.response
+            candidates = [k for k in self._groups.get(group, ())
+                          if self._entries[k].expires > now and self._entries[k].vector is not None]
+
+        if self.embed is not None and candidates and question:
+            vector = self.embed([question])[0]
+            with self._lock:
+                candidates = [k for k in candidates if k in self._entries]
+                if candidates:
+                    scores = np.stack([self._entries[k].vector for k in candidates]) @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        self._entries.move_to_end(candidates[best])
+                        self.stats["similar_hits"] += 1
+                        return self._entries[candidates[best]].response
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, scope: str, tail: Sequence[Tuple[str, str]], version: str, response: str):
+        """Store the reply of a read-only turn"""
+        if self.ttl_seconds <= 0:
+            return
+        key, group, question = self._keys(scope, tail, version)
+        vector = self.embed([question])[0] if self.embed is not None and question else None
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _Entry(response, scope, group, question, vector, time.monotonic() + self.ttl_seconds)
+            self._groups.setdefault(group, set()).add(key)
+            self._scopes.setdefault(scope, set()).add(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, scope: str):
+        """Forget every reply cached for one user, e.g. after one of their turns wrote data"""
+        with self._lock:
+            for key in list(self._scopes.get(scope, ())):
+                self._drop(key)
+            self.stats["invalidations"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
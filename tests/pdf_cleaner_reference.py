@@ -0,0 +1,165 @@
+"""The original multi-pass clean_pdf_text and fuzz inputs for checking the compiled engine against it
+
+Used by tests/test_pdf_cleaner.py and benchmarks/clean_pdf_text.py.
+"""
+import re
+
+
+def reference_clean_pdf_text(content):
+    """
+    The original multi-pass clean_pdf_text, kept verbatim as the golden reference
+    
+    Args:
+        content (str): Raw text content from PDF
+        
+    Returns:
+        str: Cleaned, readable text content
+    """
+    # Step 1: Fix Unicode escape sequences (expanded list)
+    unicode_map = {
+        '\\u201c': '"', '\\u201d': '"',
+        '\\u00f6': 'ö', '\\u00e9': 'é',
+        '\\u00e1': 'á', '\\u00a0': ' ',
+        '\\u2019': "'", '\\u2013': '-',
+        '\\u2014': '—', '\\u2026': '...',
+        '\\u00f6s': 'ös', '\\u00e9nyi': 'ényi',
+        '\\u2022': '•', '\\u00fb': 'û',
+        '\\u00ff': 'ÿ', '\\ufb01': 'fi',
+        '\\ufb02': 'fl', '\\u00a0': ' ',
+        '\\u00f6\\': 'ö', '\\u00e9\\': 'é',
+        '\\u25cf': '●', '\\u25cb': '○',
+        '\\u2713': '✓', '\\u03b2': 'β',
+        '\\u03b3': 'γ', '\\u221e': '∞'
+    }
+    for escaped, char in unicode_map.items():
+        content = content.replace(escaped, char)
+    
+    # Step 2: Fix literal newlines and fix common PDF extraction issues
+    content = content.replace('\\n', '\n')
+    
+    # Step 3: Remove null bytes and other control characters
+    content = re.sub(r'\u0000+', '', content)
+    content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
+    
+    # Step 4: Remove JSON artifacts (from your sample data)
+    content = re.sub(r'"filename":\s*"[^"]+\.pdf",\s*"content":\s*"', '\n\n--- NEW SLIDE SET: ', content)
+    content = re.sub(r'",\s*"type":\s*"pdf"', '', content)
+    
+    # Step 5: Remove matrix-like structures and mathematical notation
+    content = re.sub(r'266664.*?377775', '', content, flags=re.DOTALL)
+    content = re.sub(r'\[A\^?n\]i,j.*?edges', '', content, flags=re.DOTALL)
+    content = re.sub(r'<latexit.*?</latexit>', '', content, flags=re.DOTALL)
+    content = re.sub(r'\\\w+\{.*?\}', '', content)
+    
+    # Step 6: Remove specific patterns for common slide elements
+    slide_patterns = [
+        r'\d+\s*x\s*\d+',  # Dimensions like "3 x 3"
+        r'p\s*=\s*0\.\d+',  # Probability notation
+        r'\(\d+,\s*\d+\)',  # Coordinate pairs
+        r'\b[0-9]+\.[0-9]+\b',  # Decimal numbers
+        r'^\s*\d{1,2}\s*$',  # Standalone numbers (slide numbers)
+        r'^\s*[A-Z]\d\s*$',  # Notation like "A2"
+        r'^\s*[a-zA-Z]{1,2}\s*$',  # Single letters
+        r'i,j',  # Matrix notation
+        r'dI/dt',  # Differential equations
+        r'[kK]_\w+',  # Variables with subscripts
+        r'A\d+',  # Matrix notation
+    ]
+    for pattern in slide_patterns:
+        content = re.sub(pattern, '', content, flags=re.MULTILINE)
+    
+    # Step 7: Handle PDF slide headers and footers
+    content = re.sub(r'Memes, Measles, and Misinformation', 'COURSE: Memes, Measles, and Misinformation', content)
+    
+    # Step 8: Remove lines containing only a single type of character
+    content = re.sub(r'^\s*(.)\1{3,}\s*$', '', content, flags=re.MULTILINE)
+    
+    # Step 9: Remove lines that likely represent code or formulas
+    code_patterns = [
+        r'^\s*import\s+\w+.*$',
+        r'^\s*random_nums\s*=.*$',
+        r'^\s*if\s*\(.*\):.*$',
+        r'.*=\s*\[\[.*\]\].*$',
+        r'.*\.add_\w+\(.*\).*$',
+        r'^\s*g\s*=\s*nx\..*$',
+        r'for\s+i\s+in\s+range.*$',
+        r'.*pyplot\..*$',
+        r'.*\.decode\(.*\).*$',
+        r'.*zip_ref\..*$',
+        r'Nt\+1\s*=\s*Nt.*',  # Mathematical equations
+        r'ddt=.*',            # More differential equations
+        r'.*=.*\(\s*.*\)',    # Function calls
+        r'.*\[.*\].*=.*',     # Array assignments
+    ]
+    for pattern in code_patterns:
+        content = re.sub(pattern, '', content, flags=re.MULTILINE)
+    
+    # Step 10: Split into lines and filter problematic ones
+    lines = content.split('\n')
+    filtered_lines = []
+    
+    prev_line = ""
+    for line in lines:
+        line = line.strip()
+        
+        # Skip empty lines or too short lines
+        if not line or len(line) < 2:
+            continue
+            
+        # Skip lines that are likely slide artifacts
+        if re.match(r'^[0-9]+$', line) or re.match(r'^[A-Z][0-9]$', line):
+            continue
+            
+        # Skip lines with too many numbers or special characters
+        if sum(c.isdigit() for c in line) > len(line) * 0.5:
+            continue
+            
+        # Skip very short lines that are likely labels
+        if len(line) <= 3 and not line.lower() in ['the', 'and', 'but', 'or', 'a', 'an']:
+            continue
+        
+        # Avoid duplicating the same line that appears consecutively
+        if line == prev_line:
+            continue
+            
+        # Add the line to our filtered list
+        filtered_lines.append(line)
+        prev_line = line
+    
+    # Step 11: Join lines and fix multiple newlines
+    content = '\n'.join(filtered_lines)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    
+    # Step 12: Fix spacing issues
+    content = re.sub(r'\s{2,}', ' ', content)
+    
+    # Step 13: Fix academic-specific patterns
+    content = re.sub(r'•', '- ', content)  # Convert bullets to dashes
+    content = re.sub(r'–', '-', content)   # Standardize dashes
+    
+    # Step 14: Clean up remaining specific patterns from the sample data
+    content = re.sub(r'In Class Points[!]?', '\n[In-Class Activity]', content)
+    content = re.sub(r'https?://\S+', lambda m: f"\n{m.group(0)}\n", content)  # Put URLs on their own lines
+    
+    return content.strip()
+
+
+# Fragments hitting every step of the cleaner, including the cases where
+# patterns span line breaks or earlier passes create later matches
+FRAGMENTS = [
+    '\\u201c', '\\u00f6', '\\u00f6s', '\\u00e9\\', '\\u00e9nyi', '\\ufb01', '\\n', '\\', '\\u',
+    '\x00', '\x07', '\x0b', '\r', '\t', '"filename": "a b.pdf", "content": "', '", "type": "pdf"', '"',
+    '266664', '377775', '[A^n]i,j', '[An]i,j', 'edges', '<latexit>', '</latexit>', '\\frac{a}{b}', '}',
+    '3 x 4', '3\nx\n4', 'p = 0.5', '(1, 2)', '1.5', '12', 'A2', 'ab', 'Q', 'i,j', 'dI/dt', 'k_foo', 'A12',
+    'Memes, Measles, and Misinformation', '----', 'aaaa', '    ', 'import os', 'import\nnumpy',
+    'random_nums = [1]', 'if (x): y', 'x = [[1]] z', 'a=\n[[2]]', 'g.add_edge(1,2)', 'g = nx.Graph()',
+    'for i in range(3)', 'plt.pyplot.show()', 's.decode(x) y', 'zip_ref.extract', 'Nt+1 = Nt + 1', 'ddt=3',
+    'y = f(x)', 'a = b(\nc)', 'x=f(', 'y)', 'z[1] = 2', '[a] b = c', '•', '–', 'In Class Points!',
+    'http://x.com/a', 'the', 'and', 'an', 'abc', '²³', '١٢٣', 'network', '\n', '\n\n', ' ', '=', '(', ')',
+]
+
+
+def fuzz_input(rng):
+    return "".join(
+        rng.choice(FRAGMENTS) + rng.choice(["", " ", "\n", "  "]) for _ in range(rng.randint(1, 120))
+    )
@@ -0,0 +1,55 @@
+"""CalendarSync.plan against an in-memory Calendar service"""
+from datetime import datetime, timezone
+
+from calendar_sync import CalendarSync, event_body
+from deadlineStore import Deadline, DeadlineStore
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeEvents:
+    def __init__(self, items):
+        self.items = items
+
+    def list(self, **params):
+        return FakeRequest({"items": self.items})
+
+
+class FakeService:
+    def __init__(self, items):
+        self._events = FakeEvents(items)
+
+    def events(self):
+        return self._events
+
+
+def synced_event(event_id, deadline):
+    return {"id": event_id, **event_body(deadline)}
+
+
+def test_deadline_that_lost_its_due_date_is_deleted():
+    due = datetime(2030, 1, 10, tzinfo=timezone.utc)
+    service = FakeService([synced_event("E1", Deadline(due, "Biology", "assignment", "Lab report", 1))])
+    store = DeadlineStore([Deadline(None, "Biology", "assignment", "Lab report", 1)])
+
+    plan = CalendarSync(service).plan(store.between() + store.undated())
+
+    assert plan["delete"] == [("assignment:1", "E1")]
+    assert plan["insert"] == [] and plan["update"] == []
+
+
+def test_events_of_courses_not_loaded_are_kept():
+    due = datetime(2030, 1, 10, tzinfo=timezone.utc)
+    service = FakeService([synced_event("E1", Deadline(due, "Biology", "assignment", "Lab report", 1))])
+    store = DeadlineStore([Deadline(due, "Chemistry", "assignment", "Problem set", 2)])
+
+    plan = CalendarSync(service).plan(store.between() + store.undated())
+
+    assert plan["delete"] == []
+    assert [key for key, _ in plan["insert"]] == ["assignment:2"]
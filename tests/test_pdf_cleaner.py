@@ -0,0 +1,36 @@
+"""The compiled clean_pdf_text must match the original multi-pass implementation exactly"""
+import json
+import os
+import random
+
+import pytest
+
+from pdfCleaner import clean_pdf_text
+from pdf_cleaner_reference import fuzz_input, reference_clean_pdf_text
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "clean_pdf_text.json"), encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[case["name"] for case in GOLDEN])
+def test_golden_output(case):
+    assert clean_pdf_text(case["input"]) == case["expected"]
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[case["name"] for case in GOLDEN])
+def test_golden_output_is_reference_output(case):
+    assert reference_clean_pdf_text(case["input"]) == case["expected"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_inputs_match_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        text = fuzz_input(rng)
+        assert clean_pdf_text(text) == reference_clean_pdf_text(text), text
+
+
+def test_long_input_matches_reference():
+    # One large input, so patterns spanning many lines get exercised as well
+    text = fuzz_input(random.Random(1234)) * 50
+    assert clean_pdf_text(text) == reference_clean_pdf_text(text)
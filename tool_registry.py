@@ -0,0 +1,226 @@
+"""Declarative registry for the Gemini tools exposed by /chat
+
+Tools are plain Python functions registered with a decorator. Their Gemini
+function declarations and pydantic argument models are derived once from the
+signature and docstring, and the compiled GenerateContentConfig is cached so
+requests only pay for a dict lookup and argument validation.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+import asyncio
+import inspect
+import json
+import re
+
+from google.genai import types
+from pydantic import ConfigDict, ValidationError, create_model
+
+_SCHEMA_TYPES = {
+    str: types.Type.STRING,
+    int: types.Type.INTEGER,
+    float: types.Type.NUMBER,
+    bool: types.Type.BOOLEAN,
+    dict: types.Type.OBJECT,
+}
+
+_SECTION_RE = re.compile(r"^\s*(Args|Arguments|Returns|Raises|Yields|Example|Examples):\s*$")
+_ARG_RE = re.compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+
+
+@dataclass
+class RegisteredTool:
+    name: str
+    func: Callable[..., Any]
+    declaration: types.FunctionDeclaration
+    args_model: type
+    context_params: Tuple[str, ...] = field(default_factory=tuple)
+    timeout: Optional[float] = None
+    read_only: bool = False
+
+
+def _unwrap_optional(annotation):
+    """Return (inner_type, is_optional) for Optional[X] annotations"""
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+def _schema_for(annotation, description: Optional[str] = None) -> types.Schema:
+    """Translate a Python type annotation into a Gemini schema"""
+    annotation, _ = _unwrap_optional(annotation)
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (str,)
+        return types.Schema(type=types.Type.ARRAY, items=_schema_for(item_type), description=description)
+    if origin in (dict, Dict):
+        return types.Schema(type=types.Type.OBJECT, description=description)
+    if annotation not in _SCHEMA_TYPES:
+        raise TypeError(f"Unsupported tool parameter type: {annotation!r}")
+    return types.Schema(type=_SCHEMA_TYPES[annotation], description=description)
+
+
+def _parse_docstring(doc: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """Split a Google-style docstring into a summary and per-argument descriptions"""
+    summary_lines, arg_docs = [], {}
+    section, current = None, None
+    for line in inspect.cleandoc(doc or "").splitlines():
+        match = _SECTION_RE.match(line)
+        if match:
+            section, current = match.group(1), None
+            continue
+        if section is None:
+            summary_lines.append(line.strip())
+        elif section in ("Args", "Arguments") and line.strip():
+            arg = _ARG_RE.match(line)
+            if arg and arg.group(1) != "no":
+                current = arg.group(1)
+                arg_docs[current] = arg.group(2).strip()
+            elif current:
+                arg_docs[current] = f"{arg_docs[current]} {line.strip()}"
+    summary = " ".join(l for l in summary_lines if l)
+    return summary, arg_docs
+
+
+class ToolRegistry:
+    """Maps tool names to their declaration, argument model and implementation
+
+    Args:
+        runner: Awaitable used to invoke the (blocking) tool functions, e.g.
+            a thread-pool offload helper
+        context_params: Parameter names filled in from the request instead of
+            by the model (never advertised to Gemini)
+        default_timeout: Seconds a tool may run before its call fails
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Any]],
+        context_params: Tuple[str, ...] = ("user_token",),
+        default_timeout: Optional[float] = 30,
+    ):
+        self._runner = runner
+        self._context_params = frozenset(context_params)
+        self.default_timeout = default_timeout
+        self._tools: Dict[str, RegisteredTool] = {}
+        self._config: Optional[types.GenerateContentConfig] = None
+
+    def tool(
+        self,
+        func: Optional[Callable] = None,
+        *,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        timeout: Optional[float] = None,
+        read_only: bool = False,
+    ):
+        """Register a function as a Gemini tool
+
+        Can be used bare (`@registry.tool`) or with overrides
+        (`@registry.tool(name=..., description=..., timeout=..., read_only=...)`).
+        Only tools registered with read_only=True are assumed to change nothing;
+        turns that call any other tool are never served from a cache.
+        """
+        def register(fn):
+            tool = self._build(fn, name or fn.__name__, description)
+            tool.timeout = timeout
+            tool.read_only = read_only
+            self._tools[tool.name] = tool
+            self._config = None
+            return fn
+
+        return register(func) if func is not None else register
+
+    def _build(self, fn, name: str, description: Optional[str]) -> RegisteredTool:
+        summary, arg_docs = _parse_docstring(fn.__doc__)
+        hints = get_type_hints(fn)
+        properties, required, fields, context = {}, [], {}, []
+
+        for param in inspect.signature(fn).parameters.values():
+            if param.name in self._context_params:
+                context.append(param.name)
+                continue
+            annotation = hints.get(param.name, str)
+            properties[param.name] = _schema_for(annotation, arg_docs.get(param.name))
+            if param.default is inspect.Parameter.empty:
+                required.append(param.name)
+                fields[param.name] = (annotation, ...)
+            else:
+                if param.default is None:
+                    annotation = Optional[_unwrap_optional(annotation)[0]]
+                fields[param.name] = (annotation, param.default)
+
+        declaration = types.FunctionDeclaration(
+            name=name,
+            description=description or summary,
+            parameters=types.Schema(type=types.Type.OBJECT, properties=properties, required=required)
+            if properties else None,
+        )
+        args_model = create_model(
+            f"{name}_args",
+            __config__=ConfigDict(extra="ignore"),
+            **fields,
+        )
+        return RegisteredTool(name, fn, declaration, args_model, tuple(context))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def is_read_only(self, name: str) -> bool:
+        """Whether `name` is a registered tool marked read_only (unknown names are not)"""
+        tool = self._tools.get(name)
+        return tool is not None and tool.read_only
+
+    @property
+    def declarations(self) -> List[types.FunctionDeclaration]:
+        return [t.declaration for t in self._tools.values()]
+
+    def compile(self) -> types.GenerateContentConfig:
+        """Build (or return the cached) GenerateContentConfig advertising every tool"""
+        if self._config is None:
+            self._config = types.GenerateContentConfig(
+                tools=[types.Tool(function_declarations=self.declarations)]
+            )
+        return self._config
+
+    @property
+    def config(self) -> types.GenerateContentConfig:
+        return self.compile()
+
+    async def dispatch(self, function_call, context: Dict[str, Any]) -> Any:
+        """Validate a model function call and run the matching tool
+
+        Args:
+            function_call: types.FunctionCall from a Gemini response
+            context: Request-scoped values for the tools' context parameters
+
+        Returns:
+            The tool's return value, or an error string the model can read
+        """
+        tool = self._tools.get(function_call.name)
+        if tool is None:
+            return f"Error: Unknown tool '{function_call.name}'."
+
+        args = function_call.args or {}
+        try:
+            if isinstance(args, str):
+                args = json.loads(args)
+            validated = tool.args_model.model_validate(args)
+        except (ValueError, ValidationError) as e:
+            return f"Error: Invalid arguments for {tool.name}: {e}"
+
+        kwargs = dict(validated)
+        for param in tool.context_params:
+            kwargs[param] = context.get(param)
+
+        timeout = tool.timeout if tool.timeout is not None else self.default_timeout
+        try:
+            return await asyncio.wait_for(self._runner(tool.func, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            # The worker thread cannot be interrupted; its result is discarded
+            return f"Error: {tool.name} timed out after {timeout:g} seconds."
+        except Exception as e:
+            # A failing tool must not take down the other calls of the turn
+            print(f"Error running tool {tool.name}: {str(e)}")
+            return f"Error: {tool.name} failed: {e}"
@@ -0,0 +1,197 @@
+"""
+Typed schemas for the Canvas objects we keep, and their JSON/JSONL output
+
+Each schema lists exactly the fields we store. Converting a canvasapi object
+reads those fields straight from its attribute dict in one pass, instead of
+walking every attribute and test-encoding each one with json.dumps to find
+out whether it serializes.
+"""
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+
+def _plain(value):
+    """Datetimes as ISO strings, everything else as is"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _attributes(obj) -> Dict:
+    """Attribute dict of a canvasapi object, or the dict itself for raw API data"""
+    return obj if isinstance(obj, dict) else obj.__dict__
+
+def schema(cls):
+    """Make `cls` a slots dataclass and record its field names in FIELDS"""
+    cls = dataclass(slots=True)(cls)
+    cls.FIELDS = tuple(f.name for f in fields(cls))
+    return cls
+
+class Record:
+    __slots__ = ()
+    FIELDS = ()
+
+    @classmethod
+    def from_canvas(cls, obj):
+        """Build the record from a canvasapi object (or a raw API dict)"""
+        attributes = _attributes(obj)
+        return cls(*[_plain(attributes.get(name)) for name in cls.FIELDS])
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+@schema
+class Course(Record):
+    id: int
+    name: Optional[str] = None
+    course_code: Optional[str] = None
+    workflow_state: Optional[str] = None
+    account_id: Optional[int] = None
+    enrollment_term_id: Optional[int] = None
+    uuid: Optional[str] = None
+    start_at: Optional[str] = None
+    end_at: Optional[str] = None
+    created_at: Optional[str] = None
+    time_zone: Optional[str] = None
+    default_view: Optional[str] = None
+    is_public: Optional[bool] = None
+    access_restricted_by_date: Optional[bool] = None
+    calendar: Optional[Dict] = None
+    enrollments: Optional[List[Dict]] = None
+
+@schema
+class Assignment(Record):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    points_possible: Optional[float] = None
+    due_at: Optional[str] = None
+    unlock_at: Optional[str] = None
+    lock_at: Optional[str] = None
+    course_id: Optional[int] = None
+    workflow_state: Optional[str] = None
+    submission_types: Optional[List[str]] = None
+    grading_type: Optional[str] = None
+
+@schema
+class Quiz(Record):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    due_at: Optional[str] = None
+    points_possible: Optional[float] = None
+    quiz_type: Optional[str] = None
+    allowed_attempts: Optional[int] = None
+
+@schema
+class Announcement(Record):
+    id: int
+    title: Optional[str] = None
+    message: Optional[str] = None
+    posted_at: Optional[str] = None
+    delayed_post_at: Optional[str] = None
+    last_reply_at: Optional[str] = None
+    published: Optional[bool] = None
+    locked: bool = False
+    pinned: bool = False
+    position: Optional[int] = None
+    author: Optional[Dict] = None
+
+    @classmethod
+    def from_canvas(cls, obj):
+        attributes = _attributes(obj)
+        author = None
+        if 'user_id' in attributes:
+            author = {'id': attributes['user_id'], 'name': attributes.get('user_name')}
+        return cls(
+            attributes.get('id'),
+            attributes.get('title'),
+            attributes.get('message'),
+            _plain(attributes.get('posted_at')),
+            _plain(attributes.get('delayed_post_at')),
+            _plain(attributes.get('last_reply_at')),
+            attributes.get('published'),
+            attributes.get('locked', False),
+            attributes.get('pinned', False),
+            attributes.get('position'),
+            author,
+        )
+
+@schema
+class ModuleItem(Record):
+    id: int
+    title: Optional[str] = None
+    type: Optional[str] = None
+    module_id: Optional[int] = None
+    position: Optional[int] = None
+    indent: Optional[int] = None
+    content_id: Optional[int] = None
+    page_url: Optional[str] = None
+    html_url: Optional[str] = None
+    url: Optional[str] = None
+    external_url: Optional[str] = None
+
+@schema
+class Module(Record):
+    id: int
+    name: Optional[str] = None
+    position: Optional[int] = None
+    items: List[ModuleItem] = field(default_factory=list)
+
+    @classmethod
+    def from_canvas(cls, obj, items=None):
+        """
+        Args:
+            obj: canvasapi Module (or raw API dict)
+            items (list): Module items to use instead of the ones inlined in `obj`
+        """
+        attributes = _attributes(obj)
+        if items is None:
+            items = attributes.get('items') or []
+        return cls(attributes.get('id'), attributes.get('name'), attributes.get('position'),
+                   [ModuleItem.from_canvas(item) for item in items])
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'name': self.name, 'position': self.position,
+                'items': [item.to_dict() for item in self.items]}
+
+def iter_rows(data) -> Iterator[Dict]:
+    """
+    Flatten saved data into one record per row
+
+    A {course_name: [records]} dictionary yields each record with a 'course'
+    key added; a list yields its records as they are.
+    """
+    if isinstance(data, dict):
+        for course_name, records in data.items():
+            for record in records or []:
+                yield {'course': course_name, **record}
+    else:
+        yield from data
+
+def save_json(data: Any, filename: str, jsonl: bool = False):
+    """
+    Write `data` as indented JSON, and optionally as compact JSON Lines next to it
+
+    Args:
+        data: List of records, or {course_name: [records]}
+        filename (str): Path of the .json file
+        jsonl (bool): Also write one compact record per line to the matching .jsonl file
+    """
+    # One dumps and one write: json.dump writes every small token separately
+    with open(filename, "w") as f:
+        f.write(json.dumps(data, indent=2))
+    if jsonl:
+        save_jsonl(data, os.path.splitext(filename)[0] + ".jsonl")
+
+def save_jsonl(data: Any, filename: str):
+    """Write `data` as compact JSON Lines, one record per line (see iter_rows)"""
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    with open(filename, "w") as f:
+        f.writelines(encode(row) + "\n" for row in iter_rows(data))
+
+def load_jsonl(filename: str) -> List[Dict]:
+    """Read the records written by save_jsonl"""
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,396 @@
+"""
+Incremental Canvas sync with per-object change tracking in SQLite
+
+Canvas list endpoints have no "updated since" filter, so the cheap listings
+(assignments, quizzes, announcements, modules, pages, files) are still read on
+every sync. What changes is everything after that: each object's version
+(its `updated_at`, or a hash of its fields when Canvas has none) is compared
+with the one stored from the last sync, and only new or changed module pages
+and PDFs are fetched and extracted again. Unchanged content is served from the
+state database.
+"""
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from getAssignments import assignment_to_dict
+from getQuizes import quiz_to_dict
+from getCourseInfo import announcement_to_dict, download_pdf, list_modules_with_items
+from pdfExtraction import cleaned_pages, pdf_text
+from httpSession import make_canvas
+from pagination import stream
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SYNC_KINDS = ('assignments', 'quizzes', 'announcements', 'modules')
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "canvas_sync.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    kind TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    object_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (kind, course_id, object_id)
+);
+CREATE TABLE IF NOT EXISTS contents (
+    course_id INTEGER NOT NULL,
+    content_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    filename TEXT,
+    content TEXT,
+    PRIMARY KEY (course_id, content_key)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    kind TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (kind, course_id)
+);
+"""
+
+def fingerprint(data) -> str:
+    """Stable hash of a JSON-serializable object, used when Canvas has no updated_at"""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def _version(obj, data) -> str:
+    updated_at = getattr(obj, 'updated_at', None)
+    return str(updated_at) if updated_at else fingerprint(data)
+
+class SyncState:
+    """
+    SQLite store of the objects seen by the last sync
+
+    One connection is shared between threads and serialized with a lock.
+
+    Args:
+        path (str): Path of the SQLite file, created if missing
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def versions(self, kind: str, course_id: int) -> Dict[str, str]:
+        """{object_id: version} stored for one kind of one course"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT object_id, version FROM objects WHERE kind = ? AND course_id = ?",
+                (kind, course_id),
+            ).fetchall()
+        return dict(rows)
+
+    def apply(self, kind: str, course_id: int, records: List[Tuple[str, str, Dict]]) -> Dict[str, List[str]]:
+        """
+        Replace the stored objects of one kind/course with a fresh listing
+
+        Args:
+            kind (str): Content kind, e.g. 'assignments'
+            course_id (int): Canvas course ID
+            records (list): (object_id, version, data) in Canvas order
+
+        Returns:
+            dict: Object IDs that were 'added', 'changed' and 'deleted'
+        """
+        previous = self.versions(kind, course_id)
+        seen = {object_id for object_id, _, _ in records}
+        report = {
+            'added': [oid for oid, _, _ in records if oid not in previous],
+            'changed': [oid for oid, version, _ in records if oid in previous and previous[oid] != version],
+            'deleted': [oid for oid in previous if oid not in seen],
+        }
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (kind, course_id, oid, position, version, json.dumps(data), now)
+                    for position, (oid, version, data) in enumerate(records)
+                ],
+            )
+            self._conn.executemany(
+                "DELETE FROM objects WHERE kind = ? AND course_id = ? AND object_id = ?",
+                [(kind, course_id, oid) for oid in report['deleted']],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)", (kind, course_id, now)
+            )
+        return report
+
+    def load(self, kind: str, course_id: int) -> List[Dict]:
+        """Stored objects of one kind/course in Canvas order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM objects WHERE kind = ? AND course_id = ? ORDER BY position",
+                (kind, course_id),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def last_synced(self, kind: str, course_id: int) -> Optional[float]:
+        """Unix time of the last successful sync of one kind/course, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM syncs WHERE kind = ? AND course_id = ?", (kind, course_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_content(self, course_id: int, content_key: str, version: Optional[str]):
+        """
+        Stored page body / PDF text if it was fetched at this version
+
+        Returns:
+            (found, filename, content): found is False when the content must be fetched again
+        """
+        if not version:
+            return False, None, None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename, content FROM contents WHERE course_id = ? AND content_key = ? AND version = ?",
+                (course_id, content_key, version),
+            ).fetchone()
+        return (True, row[0], row[1]) if row else (False, None, None)
+
+    def set_content(self, course_id: int, content_key: str, version: Optional[str],
+                    content: Optional[str], filename: Optional[str] = None):
+        """Remember fetched content together with the version it was fetched at"""
+        if not version:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO contents VALUES (?, ?, ?, ?, ?)",
+                (course_id, content_key, version, filename, content),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CanvasSync:
+    """
+    Incrementally sync assignments, quizzes, announcements and modules
+
+    Args:
+        canvas: Canvas instance
+        state (SyncState): Change-tracking store
+        workers (int): Concurrent page/file checks per course
+    """
+
+    def __init__(self, canvas, state: SyncState, workers: int = 4):
+        self.canvas = canvas
+        self.workers = max(1, workers)
+        self.state = state
+        self.stats = {'fetched': 0, 'reused': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _assignments(self, course) -> List[Tuple[str, str, Dict]]:
+        records = []
+        for assignment in stream(course.get_assignments()):
+            data = assignment_to_dict(assignment)
+            records.append((str(assignment.id), _version(assignment, data), data))
+        return records
+
+    def _quizzes(self, course) -> List[Tuple[str, str, Dict]]:
+        records = []
+        for quiz in stream(course.get_quizzes()):
+            data = quiz_to_dict(quiz)
+            records.append((str(quiz.id), _version(quiz, data), data))
+        return records
+
+    def _announcements(self, course) -> List[Tuple[str, str, Dict]]:
+        records = []
+        for announcement in stream(course.get_discussion_topics(only_announcements=True)):
+            # Announcements have no updated_at; edits and replies change the hash
+            data = announcement_to_dict(announcement)
+            records.append((str(announcement.id), fingerprint(data), data))
+        return records
+
+    def _listing_versions(self, listing) -> Optional[Dict]:
+        """{key: updated_at} from one paginated listing, or None if it is not visible to us"""
+        try:
+            return {key: str(updated_at) for key, updated_at in listing()}
+        except Exception as e:
+            print(f"Listing unavailable, falling back to per-item checks: {str(e)}")
+            return None
+
+    def _page_content(self, course, page_url, title, page_versions):
+        """(content, version) of a module page, fetched only if its version changed"""
+        key = f"page:{page_url}"
+        version = page_versions.get(page_url) if page_versions is not None else None
+        found, _, content = self.state.get_content(course.id, key, version)
+        if found:
+            self._count('reused')
+            return content, version
+        try:
+            page = course.get_page(page_url)
+        except Exception:
+            print(f"Could not fetch content for page: {title}")
+            return None, version
+        self._count('fetched')
+        version = str(getattr(page, 'updated_at', None) or fingerprint(page.body))
+        self.state.set_content(course.id, key, version, page.body)
+        return page.body, version
+
+    def _file_content(self, course, file_id, title, file_versions):
+        """
+        (filename, extraction, version) of a module file; only PDFs have an extraction
+
+        The extraction (cleaned text per page) is stored as JSON, so reused
+        files give the same 'content' and 'pages' as freshly extracted ones.
+        """
+        key = f"pdf:{file_id}"
+        version = file_versions.get(file_id) if file_versions is not None else None
+        found, filename, content = self.state.get_content(course.id, key, version)
+        if found:
+            self._count('reused')
+            return filename, json.loads(content) if content else None, version
+        try:
+            file = course.get_file(file_id)
+            version = str(getattr(file, 'updated_at', None) or getattr(file, 'size', ''))
+            found, filename, content = self.state.get_content(course.id, key, version)
+            if found:
+                self._count('reused')
+                return filename, json.loads(content) if content else None, version
+            filename, extraction = None, None
+            if file.filename.lower().endswith('.pdf'):
+                filename, extraction = file.filename, {'pages': download_pdf(file)['pages']}
+                self._count('fetched')
+            content = json.dumps(extraction) if extraction is not None else None
+            self.state.set_content(course.id, key, version, content, filename)
+            return filename, extraction, version
+        except Exception as e:
+            print(f"Error processing PDF file {title}: {str(e)}")
+            return None, None, version
+
+    def _modules(self, course) -> List[Tuple[str, str, Dict]]:
+        page_versions = self._listing_versions(
+            lambda: ((p.url, p.updated_at) for p in stream(course.get_pages()))
+        )
+        file_versions = self._listing_versions(
+            lambda: ((f.id, f.updated_at) for f in stream(course.get_files()))
+        )
+        modules = list_modules_with_items(course)
+
+        # Each page/file is checked once, however many modules link it
+        pages, files = {}, {}
+        for module in modules:
+            for item in module['items']:
+                if item.get('type') == 'Page' and item.get('page_url'):
+                    pages.setdefault(item['page_url'], item.get('title'))
+                elif item.get('type') == 'File' and item.get('content_id') is not None:
+                    files.setdefault(item['content_id'], item.get('title'))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            page_futures = {
+                url: executor.submit(self._page_content, course, url, title, page_versions)
+                for url, title in pages.items()
+            }
+            file_futures = {
+                fid: executor.submit(self._file_content, course, fid, title, file_versions)
+                for fid, title in files.items()
+            }
+            page_results = {url: f.result() for url, f in page_futures.items()}
+            file_results = {fid: f.result() for fid, f in file_futures.items()}
+
+        records = []
+        for module in modules:
+            module_dict = {
+                'id': module['id'],
+                'name': module['name'],
+                'position': module['position'],
+                'items': []
+            }
+            content_versions = []
+            for item in module['items']:
+                item_dict = {
+                    'id': item['id'],
+                    'title': item['title'],
+                    'type': item['type'],
+                    'html_url': item.get('html_url'),
+                    'content': None
+                }
+                version = None
+                if item['type'] == 'Page' and item.get('page_url') in page_results:
+                    item_dict['content'], version = page_results[item['page_url']]
+                elif item['type'] == 'File' and item.get('content_id') in file_results:
+                    filename, extraction, version = file_results[item['content_id']]
+                    if extraction is not None:
+                        item_dict['content'] = pdf_text(extraction)
+                    if filename:
+                        item_dict['filename'] = filename
+                    if extraction is not None:
+                        item_dict['pages'] = cleaned_pages(extraction)
+                content_versions.append(version)
+                module_dict['items'].append(item_dict)
+
+            shape = {k: v for k, v in module_dict.items() if k != 'items'}
+            shape['items'] = [{k: v for k, v in i.items() if k != 'content'} for i in module_dict['items']]
+            records.append((str(module['id']), fingerprint([shape, content_versions]), module_dict))
+        return records
+
+    def sync_course(self, course_id: int, kinds=SYNC_KINDS) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Sync the given kinds of one course
+
+        A kind whose listing fails keeps its previous state and is reported
+        with an 'error' instead of marking every object as deleted.
+
+        Returns:
+            dict: {kind: {'added': [...], 'changed': [...], 'deleted': [...]}}
+        """
+        course = self.canvas.get_course(course_id)
+        listers = {
+            'assignments': self._assignments,
+            'quizzes': self._quizzes,
+            'announcements': self._announcements,
+            'modules': self._modules,
+        }
+        report = {}
+        for kind in kinds:
+            try:
+                records = listers[kind](course)
+            except Exception as e:
+                print(f"Error syncing {kind} for course {course_id}: {str(e)}")
+                report[kind] = {'error': str(e)}
+                continue
+            report[kind] = self.state.apply(kind, course_id, records)
+        return report
+
+def format_report(report: Dict[str, Dict[str, Dict]]) -> str:
+    """
+    Human-readable summary of {course_name: {kind: changes}}
+
+    Kinds without changes are left out.
+    """
+    lines = []
+    for course_name, kinds in report.items():
+        for kind, changes in kinds.items():
+            if 'error' in changes:
+                lines.append(f"{course_name} / {kind}: failed ({changes['error']})")
+                continue
+            counts = {k: len(v) for k, v in changes.items() if v}
+            if counts:
+                summary = ", ".join(f"{n} {k}" for k, n in counts.items())
+                lines.append(f"{course_name} / {kind}: {summary}")
+    return "\n".join(lines) if lines else "No changes since last sync"
+
+# Example usage
+if __name__ == "__main__":
+    load_dotenv("secrets.env")
+    canvas = make_canvas("https://canvas.instructure.com/", os.getenv("CANVAS_API_KEY"))
+    course_id = 17700000000720596
+    syncer = CanvasSync(canvas, SyncState())
+    print(format_report({str(course_id): syncer.sync_course(course_id)}))
+    print(syncer.stats)
@@ -0,0 +1,374 @@
+"""
+Bounded, content-addressed on-disk cache for course exports
+
+Layout under the cache root:
+
+    blobs/<sha256[:2]>/<sha256>    content, named by the hash of its bytes
+    keys/<sha256(key)>.json        {key, digest, size, created, ttl}
+    locks/<sha256(key)>.lock       per-key lock files
+
+Writes go to a temp file in the same directory and are published with
+os.replace, so readers only ever see complete entries. Each key is guarded by a
+thread lock plus an fcntl lock (where available) so concurrent syncs in other
+processes wait instead of writing over each other. The access time of a key is
+the mtime of its key file; once the blobs exceed `max_bytes` the least
+recently used keys are dropped and unreferenced blobs deleted.
+
+Writes keep a running total of entry sizes, so the full scan of key files
+and blobs only runs once that total passes `max_bytes`, or every
+`scan_every` writes to pick up expired entries and other processes' writes.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: thread locks only
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "CANVAS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+)
+DEFAULT_MAX_BYTES = int(os.getenv("CANVAS_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+DEFAULT_SCAN_EVERY = int(os.getenv("CANVAS_CACHE_SCAN_EVERY", "100"))
+# A scan over budget evicts down to this fraction of max_bytes, so a full
+# cache is not rescanned on every write
+_EVICT_TARGET = 0.9
+
+_CHUNK_SIZE = 1024 * 1024
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _atomic_write(path: str, data: bytes):
+    """Write `data` to `path` via a temp file in the same directory and os.replace"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class DiskCache:
+    """
+    Content-addressed file cache with atomic writes, per-key locks and an LRU size budget
+
+    Args:
+        root (str): Cache directory, made absolute so the working directory does not matter
+        max_bytes (int): Total size budget for cached blobs
+        default_ttl (float): Seconds an entry stays valid when put() gets no ttl, None for no expiry
+        scan_every (int): Writes between full eviction scans while under budget
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 default_ttl: Optional[float] = None, scan_every: int = DEFAULT_SCAN_EVERY):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.scan_every = max(1, scan_every)
+        # Bytes referenced by keys as of the last scan plus the writes since
+        # (shared blobs counted per key, so it can only overestimate); None until the first scan
+        self._total: Optional[int] = None
+        self._writes_since_scan = 0
+        self._total_guard = threading.Lock()
+        for sub in ('blobs', 'keys', 'locks'):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self._depths: Dict[str, int] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    # Paths
+
+    def _key_id(self, key: str) -> str:
+        return _sha256(key.encode('utf-8'))
+
+    def _key_file(self, key: str) -> str:
+        return os.path.join(self.root, 'keys', f"{self._key_id(key)}.json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    # Locking
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Hold the lock of one key across threads and processes
+
+        Re-entrant within a thread, so a caller can hold it around a
+        get/compute/put sequence.
+        """
+        with self._locks_guard:
+            thread_lock = self._locks.setdefault(key, threading.RLock())
+        with thread_lock:
+            # flock is per open file, so only the outermost holder takes it
+            depth = self._depths.get(key, 0)
+            if fcntl is None or depth:
+                self._depths[key] = depth + 1
+                try:
+                    yield
+                finally:
+                    self._depths[key] = depth
+                return
+            lock_path = os.path.join(self.root, 'locks', f"{self._key_id(key)}.lock")
+            with open(lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._depths[key] = 1
+                try:
+                    yield
+                finally:
+                    self._depths[key] = 0
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Reads
+
+    def _entry(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._key_file(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_path(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """
+        Path of the cached blob for `key`, or None on a miss
+
+        Args:
+            key (str): Cache key
+            max_age (float): Also treat entries older than this many seconds as missing
+
+        Returns:
+            str: Absolute path of the blob; do not modify it in place
+        """
+        entry = self._entry(key)
+        if entry is not None:
+            age = time.time() - entry['created']
+            expired = (entry.get('ttl') is not None and age > entry['ttl']) or \
+                      (max_age is not None and age > max_age)
+            path = self._blob_path(entry['digest'])
+            if not expired and os.path.exists(path):
+                try:
+                    os.utime(self._key_file(key))  # mark as recently used
+                except OSError:
+                    pass
+                self.stats['hits'] += 1
+                return path
+        self.stats['misses'] += 1
+        return None
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[bytes]:
+        """Cached bytes for `key`, or None on a miss"""
+        path = self.get_path(key, max_age)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_object(self, key: str, max_age: Optional[float] = None):
+        """Unpickled object for `key`, or None on a miss"""
+        data = self.get(key, max_age)
+        return pickle.loads(data) if data is not None else None
+
+    # Writes
+
+    def _publish(self, key: str, digest: str, size: int, ttl: Optional[float]) -> str:
+        entry = {
+            'key': key,
+            'digest': digest,
+            'size': size,
+            'created': time.time(),
+            'ttl': ttl if ttl is not None else self.default_ttl,
+        }
+        with self.lock(key):
+            previous = self._entry(key)
+            _atomic_write(self._key_file(key), json.dumps(entry).encode('utf-8'))
+        self.stats['writes'] += 1
+        with self._total_guard:
+            if self._total is not None:
+                self._total += size - (previous['size'] if previous else 0)
+            self._writes_since_scan += 1
+            scan = (self._total is None or self._total > self.max_bytes
+                    or self._writes_since_scan >= self.scan_every)
+        if scan:
+            self.evict()
+        return self._blob_path(digest)
+
+    def put(self, key: str, data: bytes, ttl: Optional[float] = None) -> str:
+        """
+        Store bytes under `key`
+
+        Returns:
+            str: Path of the stored blob
+        """
+        digest = _sha256(data)
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            os.utime(path)  # keep it clear of the unreferenced-blob sweep
+        else:
+            _atomic_write(path, data)
+        return self._publish(key, digest, len(data), ttl)
+
+    def put_file(self, key: str, src_path: str, ttl: Optional[float] = None) -> str:
+        """
+        Move an existing file into the cache under `key` without reading it into memory
+
+        Returns:
+            str: Path of the stored blob
+        """
+        digest = _file_sha256(src_path)
+        size = os.path.getsize(src_path)
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            os.remove(src_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(src_path, path)
+            except OSError:
+                # Different filesystem: copy next to the blob, then rename
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+                os.close(fd)
+                shutil.move(src_path, tmp_path)
+                os.replace(tmp_path, path)
+        return self._publish(key, digest, size, ttl)
+
+    def put_object(self, key: str, obj, ttl: Optional[float] = None) -> str:
+        """Pickle and store an object under `key`"""
+        return self.put(key, pickle.dumps(obj), ttl)
+
+    def delete(self, key: str):
+        """Drop the entry for `key`; its blob goes away once nothing references it"""
+        with self.lock(key):
+            entry = self._entry(key)
+            try:
+                os.remove(self._key_file(key))
+            except FileNotFoundError:
+                return
+        if entry is not None:
+            with self._total_guard:
+                if self._total is not None:
+                    self._total = max(0, self._total - entry['size'])
+
+    # Eviction
+
+    def _entries(self):
+        keys_dir = os.path.join(self.root, 'keys')
+        for name in os.listdir(keys_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(keys_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    entry = json.load(f)
+                entry['_path'] = path
+                entry['_accessed'] = os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue
+            yield entry
+
+    def size(self) -> int:
+        """Total bytes of all blobs on disk"""
+        total = 0
+        blobs_dir = os.path.join(self.root, 'blobs')
+        for dirpath, _, filenames in os.walk(blobs_dir):
+            for name in filenames:
+                if not name.startswith('.tmp-'):
+                    total += os.path.getsize(os.path.join(dirpath, name))
+        return total
+
+    def evict(self):
+        """Drop expired entries and, when the blobs exceed max_bytes, least recently used ones down to 90% of it"""
+        with self.lock('__evict__'):
+            now = time.time()
+            live = []
+            for entry in self._entries():
+                ttl = entry.get('ttl')
+                if ttl is not None and now - entry['created'] > ttl:
+                    self._drop(entry)
+                else:
+                    live.append(entry)
+
+            # Blobs are shared between keys with identical content
+            sizes = {e['digest']: e['size'] for e in live}
+            total = sum(sizes.values())
+            refs = {}
+            for entry in live:
+                refs[entry['digest']] = refs.get(entry['digest'], 0) + 1
+
+            live.sort(key=lambda e: e['_accessed'])
+            target = self.max_bytes * _EVICT_TARGET if total > self.max_bytes else total
+            for entry in live:
+                if total <= target:
+                    break
+                self._drop(entry)
+                refs[entry['digest']] -= 1
+                if refs[entry['digest']] == 0:
+                    total -= sizes[entry['digest']]
+
+            self._collect_blobs({d for d, n in refs.items() if n > 0})
+            with self._total_guard:
+                self._total = total
+                self._writes_since_scan = 0
+
+    def _drop(self, entry: Dict):
+        try:
+            os.remove(entry['_path'])
+            self.stats['evictions'] += 1
+        except FileNotFoundError:
+            pass
+
+    def _collect_blobs(self, referenced):
+        """Delete blobs no key points at (and temp files left by crashed writers)"""
+        blobs_dir = os.path.join(self.root, 'blobs')
+        stale_before = time.time() - 3600
+        for dirpath, _, filenames in os.walk(blobs_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.startswith('.tmp-'):
+                    if os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                elif name not in referenced:
+                    # A concurrent put may have written this blob but not its key yet
+                    if os.path.getmtime(path) < time.time() - 60:
+                        os.remove(path)
+
+    def clear(self):
+        """Remove every entry and blob"""
+        with self.lock('__evict__'):
+            for entry in list(self._entries()):
+                self._drop(entry)
+            shutil.rmtree(os.path.join(self.root, 'blobs'), ignore_errors=True)
+            os.makedirs(os.path.join(self.root, 'blobs'), exist_ok=True)
+            with self._total_guard:
+                self._total = 0
+                self._writes_since_scan = 0
+
+# Shared cache used by the course content helpers
+course_cache = DiskCache()
@@ -0,0 +1,160 @@
+"""
+In-memory index of assignment and quiz deadlines
+
+Due dates are parsed once when items are added, and dated items are kept
+sorted by due time so range questions ("due in the next 72 hours",
+"overdue", "this week") are two bisects and a slice instead of a scan that
+re-parses every date.
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+import json
+import os
+
+ASSIGNMENTS_FILE = "AllAssignments.json"
+QUIZZES_FILE = "AllQuizzes.json"
+
+def parse_due(value) -> Optional[datetime]:
+    """Parse a Canvas due date ("2025-03-01T04:59:00Z" or any ISO 8601 form) as aware UTC"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+        except ValueError:
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+@dataclass
+class Deadline:
+    due: Optional[datetime]
+    course: str
+    kind: str
+    title: str
+    id: Optional[int] = None
+    points: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'course': self.course,
+            'kind': self.kind,
+            'title': self.title,
+            'id': self.id,
+            'points': self.points,
+            'due_at': self.due.strftime("%Y-%m-%dT%H:%M:%SZ") if self.due else None,
+        }
+
+class DeadlineStore:
+    """
+    Assignments and quizzes sorted by due time
+
+    Items without a due date are kept separately and only returned by undated().
+    """
+
+    def __init__(self, items: Iterable[Deadline] = ()):
+        self._dated: List[Deadline] = []
+        self._keys: List[float] = []
+        self._undated: List[Deadline] = []
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def from_courses(cls, assignments: Optional[Dict[str, List[Dict]]] = None,
+                     quizzes: Optional[Dict[str, List[Dict]]] = None) -> "DeadlineStore":
+        """
+        Build a store from the {course_name: [items]} dictionaries the fetchers produce
+
+        Args:
+            assignments (dict): {course_name: assignment dicts with 'name' and 'due_at'}
+            quizzes (dict): {course_name: quiz dicts with 'title' and 'due_at'}
+        """
+        store = cls()
+        for course, items in (assignments or {}).items():
+            for a in items or []:
+                store.add(Deadline(parse_due(a.get('due_at')), course, 'assignment',
+                                   a.get('name'), a.get('id'), a.get('points_possible')))
+        for course, items in (quizzes or {}).items():
+            for q in items or []:
+                store.add(Deadline(parse_due(q.get('due_at')), course, 'quiz',
+                                   q.get('title'), q.get('id'), q.get('points_possible')))
+        return store
+
+    @classmethod
+    def load(cls, directory: str = ".") -> "DeadlineStore":
+        """Build a store from AllAssignments.json / AllQuizzes.json in `directory`, if present"""
+        data = {}
+        for key, name in (('assignments', ASSIGNMENTS_FILE), ('quizzes', QUIZZES_FILE)):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    data[key] = json.load(f)
+        return cls.from_courses(**data)
+
+    def add(self, item: Deadline):
+        if item.due is None:
+            self._undated.append(item)
+            return
+        key = item.due.timestamp()
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._dated.insert(index, item)
+
+    def __len__(self) -> int:
+        return len(self._dated) + len(self._undated)
+
+    @staticmethod
+    def _matches(item: Deadline, course: Optional[str], kind: Optional[str]) -> bool:
+        if kind is not None and item.kind != kind:
+            return False
+        return course is None or course.lower() in item.course.lower()
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                course: Optional[str] = None, kind: Optional[str] = None) -> List[Deadline]:
+        """
+        Items due in [start, end), sorted by due time
+
+        Args:
+            start (datetime): Inclusive lower bound, None for no bound
+            end (datetime): Exclusive upper bound, None for no bound
+            course (str): Only courses whose name contains this (case-insensitive)
+            kind (str): 'assignment' or 'quiz'
+        """
+        lo = bisect_left(self._keys, start.timestamp()) if start is not None else 0
+        hi = bisect_left(self._keys, end.timestamp()) if end is not None else len(self._keys)
+        return [item for item in self._dated[lo:hi] if self._matches(item, course, kind)]
+
+    def upcoming(self, hours: float = 72, now: Optional[datetime] = None, **filters) -> List[Deadline]:
+        """Items due within the next `hours` (None for everything still ahead)"""
+        now = now or datetime.now(timezone.utc)
+        return self.between(now, now + timedelta(hours=hours) if hours is not None else None, **filters)
+
+    def overdue(self, now: Optional[datetime] = None, days: Optional[float] = None, **filters) -> List[Deadline]:
+        """Items whose due time has passed, optionally only those from the last `days`"""
+        now = now or datetime.now(timezone.utc)
+        return self.between(now - timedelta(days=days) if days is not None else None, now, **filters)
+
+    def this_week(self, now: Optional[datetime] = None, **filters) -> Dict[str, List[Deadline]]:
+        """Items due from now until the end of Sunday (UTC), grouped by course"""
+        now = now or datetime.now(timezone.utc)
+        week_end = (now + timedelta(days=7 - now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        return group_by_course(self.between(now, week_end, **filters))
+
+    def undated(self, course: Optional[str] = None, kind: Optional[str] = None) -> List[Deadline]:
+        """Items without a due date"""
+        return [item for item in self._undated if self._matches(item, course, kind)]
+
+def group_by_course(items: Iterable[Deadline]) -> Dict[str, List[Deadline]]:
+    """{course: [items]} keeping the order of `items`"""
+    grouped = {}
+    for item in items:
+        grouped.setdefault(item.course, []).append(item)
+    return grouped
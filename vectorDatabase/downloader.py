@@ -0,0 +1,106 @@
+"""
+Streamed, resumable HTTP downloads
+
+The body is written to `<dest>.part` in fixed-size chunks, so memory use is
+bounded by the chunk size rather than the file size. If the connection drops,
+the next attempt (in this run or a later one) asks for the missing tail with
+an HTTP Range request. It uses the response validators saved next to the
+partial file in `If-Range`, so a changed file on the server is downloaded
+from the start instead of being spliced together.
+"""
+from typing import Optional
+import json
+import os
+import time
+import requests
+
+CHUNK_SIZE = 1024 * 1024
+
+def _load_validators(meta_path: str) -> dict:
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_validators(meta_path: str, response) -> dict:
+    validators = {
+        k: response.headers[h]
+        for k, h in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+        if h in response.headers
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(validators, f)
+    return validators
+
+def download_to_file(url: str, dest_path: str, chunk_size: int = CHUNK_SIZE, max_retries: int = 5,
+                     timeout: float = 60, session: Optional[requests.Session] = None) -> str:
+    """
+    Download `url` to `dest_path`, resuming a previous partial download if there is one
+
+    Args:
+        url (str): URL to download
+        dest_path (str): Final path; the file only appears there once complete
+        chunk_size (int): Bytes read and written per chunk
+        max_retries (int): Attempts after a dropped connection before giving up
+        timeout (float): Connect/read timeout per request in seconds
+        session: Optional requests.Session to send the requests with
+
+    Returns:
+        str: dest_path
+    """
+    http = session or requests
+    part_path = f"{dest_path}.part"
+    meta_path = f"{part_path}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+    for attempt in range(max_retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            validators = _load_validators(meta_path)
+            validator = validators.get('etag') or validators.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset:
+                    # Range not satisfiable: the partial file is already complete or stale
+                    os.remove(part_path)
+                    continue
+                response.raise_for_status()
+
+                resumed = response.status_code == 206 and \
+                    response.headers.get('Content-Range', '').startswith(f"bytes {offset}-")
+                if not resumed:
+                    offset = 0
+                    _save_validators(meta_path, response)
+                elif offset:
+                    print(f"Resuming download at {offset} bytes")
+
+                with open(part_path, 'ab' if resumed else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+
+                # Decoded (gzip) bodies do not match Content-Length, so only check raw ones
+                expected = response.headers.get('Content-Length')
+                if expected is not None and 'Content-Encoding' not in response.headers \
+                        and os.path.getsize(part_path) != offset + int(expected):
+                    raise requests.exceptions.ChunkedEncodingError("Download ended early")
+
+            os.replace(part_path, dest_path)
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            return dest_path
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = min(30, 2 ** attempt)
+            print(f"Download interrupted ({str(e)}), retrying in {delay}s...")
+            time.sleep(delay)
+
+    raise requests.exceptions.RetryError(f"Could not download {url} after {max_retries + 1} attempts")
@@ -0,0 +1,253 @@
+"""
+Concurrent Canvas content exports with backoff polling and persisted job state
+
+Exports for many courses are started up front and polled from one loop. Each
+job is polled on its own exponential backoff schedule with jitter, so a slow
+course does not hold up the others and the pollers do not hit Canvas in lock
+step. Export IDs are written to a JSON state file as soon as Canvas returns
+them; a restarted process picks up the in-flight exports instead of starting
+new ones.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export_jobs.json")
+
+# Serializes read-modify-write of state files between managers in this process
+_STATE_LOCK = threading.Lock()
+
+# Canvas workflow states
+PENDING_STATES = ('created', 'exporting')
+DONE_STATES = ('exported', 'failed')
+
+class ExportManager:
+    """
+    Start and track course content exports
+
+    Args:
+        canvas: Canvas instance
+        state_path (str): JSON file the export jobs are persisted to
+        base_delay (float): First poll interval in seconds
+        max_delay (float): Upper bound of the poll interval
+        jitter (float): Each interval is scaled by a random factor in [1 - jitter, 1 + jitter]
+        max_age_hours (float): Persisted exports older than this are not resumed
+        export_type (str): Canvas export type
+        max_errors (int): Consecutive failed status checks before a job is marked failed
+    """
+
+    def __init__(self, canvas, state_path: str = DEFAULT_STATE_PATH, base_delay: float = 2,
+                 max_delay: float = 60, jitter: float = 0.3, max_age_hours: float = 24,
+                 export_type: str = 'zip', max_errors: int = 5):
+        self.canvas = canvas
+        self.state_path = os.path.abspath(state_path)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_age_hours = max_age_hours
+        self.export_type = export_type
+        self.max_errors = max_errors
+        self._courses = {}
+        self.jobs: Dict[int, Dict] = self._load()
+
+    # Persistence
+
+    def _load(self) -> Dict[int, Dict]:
+        try:
+            with open(self.state_path, 'r') as f:
+                return {int(course_id): job for course_id, job in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading export state: {str(e)}")
+            return {}
+
+    def _save(self, course_id: int):
+        """
+        Write one course's job (or its removal) to the state file
+
+        The file is re-read under a process-wide lock first, so managers in
+        other threads keep their own jobs.
+        """
+        with _STATE_LOCK:
+            jobs = self._load()
+            if course_id in self.jobs:
+                jobs[course_id] = self.jobs[course_id]
+            else:
+                jobs.pop(course_id, None)
+            directory = os.path.dirname(self.state_path)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.export_jobs-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({str(k): v for k, v in jobs.items()}, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+
+    # Jobs
+
+    def _course(self, course_id: int):
+        course = self._courses.get(course_id)
+        if course is None:
+            course = self._courses[course_id] = self.canvas.get_course(course_id)
+        return course
+
+    def _resumable(self, job: Optional[Dict]) -> bool:
+        if not job or job['state'] == 'failed':
+            return False
+        return time.time() - job['created_at'] < self.max_age_hours * 3600
+
+    def _delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempts))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self, course_ids: Iterable[int], force: bool = False) -> List[int]:
+        """
+        Start exports for the given courses, resuming persisted ones
+
+        Args:
+            course_ids: Canvas course IDs
+            force (bool): Start a new export even if one could be resumed
+
+        Returns:
+            list: Course IDs with a live export job
+        """
+        started = []
+        for course_id in course_ids:
+            job = self.jobs.get(course_id)
+            if not force and self._resumable(job):
+                print(f"Resuming export {job['export_id']} for course {course_id} ({job['state']})")
+                started.append(course_id)
+                continue
+            try:
+                export = self._course(course_id).export_content(self.export_type)
+            except Exception as e:
+                print(f"Error creating export for course {course_id}: {str(e)}")
+                continue
+            print(f"Export created for course {course_id} with ID: {export.id}")
+            now = time.time()
+            self.jobs[course_id] = {
+                'export_id': export.id,
+                'state': getattr(export, 'workflow_state', 'created'),
+                'created_at': now,
+                'updated_at': now,
+                'attempts': 0,
+                'download_url': None,
+                'error': None,
+            }
+            # Persist right away so a crash after this point can resume the export
+            self._save(course_id)
+            started.append(course_id)
+        return started
+
+    def poll(self, course_id: int) -> Dict:
+        """Refresh one job from Canvas and return it"""
+        job = self.jobs[course_id]
+        try:
+            export = self._course(course_id).get_content_export(job['export_id'])
+            job['state'] = export.workflow_state
+            if export.workflow_state == 'exported':
+                job['download_url'] = export.attachment['url']
+            job['error'] = None
+            job['errors'] = 0
+        except Exception as e:
+            print(f"Error checking export status for course {course_id}: {str(e)}")
+            job['error'] = str(e)
+            job['errors'] = job.get('errors', 0) + 1
+            if job['errors'] >= self.max_errors:
+                job['state'] = 'failed'
+        job['attempts'] += 1
+        job['updated_at'] = time.time()
+        self._save(course_id)
+        return job
+
+    def iter_completed(self, course_ids: Optional[Iterable[int]] = None,
+                       timeout: Optional[float] = None) -> Iterator[Tuple[int, Dict]]:
+        """
+        Poll exports until they finish, yielding each one as soon as it does
+
+        Args:
+            course_ids: Courses to wait for, defaults to every tracked job
+            timeout (float): Give up on the remaining jobs after this many seconds
+
+        Yields:
+            (course_id, job) where job['state'] is 'exported' or 'failed'
+        """
+        course_ids = list(self.jobs) if course_ids is None else [c for c in course_ids if c in self.jobs]
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        # (next poll time, course_id) min-heap. Every job is polled at least
+        # once, so resumed exports get a fresh download URL.
+        now = time.monotonic()
+        heap = [(now, course_id) for course_id in course_ids]
+        heapq.heapify(heap)
+
+        while heap:
+            next_poll, course_id = heapq.heappop(heap)
+            wait = next_poll - time.monotonic()
+            if deadline is not None and next_poll > deadline:
+                print(f"Timed out waiting for {len(heap) + 1} export(s)")
+                return
+            if wait > 0:
+                time.sleep(wait)
+
+            job = self.poll(course_id)
+            elapsed = time.time() - job['created_at']
+            if job['state'] in DONE_STATES:
+                print(f"Export for course {course_id} {job['state']} after {elapsed:.1f} seconds")
+                yield course_id, job
+                continue
+            if job['state'] not in PENDING_STATES and not job['error']:
+                print(f"Unknown export state for course {course_id}: {job['state']}")
+            heapq.heappush(heap, (time.monotonic() + self._delay(job['attempts']), course_id))
+
+    def wait(self, course_id: int, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Start (or resume) one course's export and block until it finishes
+
+        Returns:
+            str: Download URL of the export, or None if it failed or timed out
+        """
+        if course_id not in self.start([course_id]):
+            return None
+        for _, job in self.iter_completed([course_id], timeout):
+            return job['download_url'] if job['state'] == 'exported' else None
+        return None
+
+    def forget(self, course_id: int):
+        """Drop a job once its archive has been downloaded"""
+        if self.jobs.pop(course_id, None) is not None:
+            self._save(course_id)
+
+    def progress(self) -> List[Dict]:
+        """
+        Snapshot of every tracked export
+
+        Returns:
+            list: {'course_id', 'export_id', 'state', 'polls', 'elapsed_seconds', 'error'} per job
+        """
+        now = time.time()
+        return [
+            {
+                'course_id': course_id,
+                'export_id': job['export_id'],
+                'state': job['state'],
+                'polls': job['attempts'],
+                'elapsed_seconds': round(now - job['created_at'], 1),
+                'error': job['error'],
+            }
+            for course_id, job in sorted(self.jobs.items())
+        ]
+
+    def format_progress(self) -> str:
+        """Progress table for printing"""
+        lines = [f"{'course':>20}  {'export':>10}  {'state':<10} {'polls':>5}  elapsed"]
+        for row in self.progress():
+            lines.append(
+                f"{row['course_id']:>20}  {row['export_id']:>10}  {row['state']:<10} "
+                f"{row['polls']:>5}  {row['elapsed_seconds']:.0f}s"
+                + (f"  ({row['error']})" if row['error'] else "")
+            )
+        return "\n".join(lines)
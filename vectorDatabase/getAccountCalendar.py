@@ -1,5 +1,5 @@
 # Import the Canvas class
-from canvasapi import Canvas
+from httpSession import make_canvas
 from dotenv import load_dotenv
 import os
 import json
@@ -10,7 +10,7 @@ API_URL = "https://canvas.instructure.com/"
 API_KEY = os.getenv("CANVAS_API_KEY")
 
 # Initialize a new Canvas object
-canvas = Canvas(API_URL, API_KEY)
+canvas = make_canvas(API_URL, API_KEY)
 
 try:
     user = canvas.get_user('self')
@@ -1,9 +1,14 @@
-from canvasapi import Canvas
+from httpSession import make_canvas
+from pagination import stream
+from canvasSchemas import Assignment
 from dotenv import load_dotenv
 import os
-import json
 load_dotenv("secrets.env")
 
+def assignment_to_dict(assignment):
+    """Convert a canvasapi Assignment into a JSON-serializable dictionary of its essential fields"""
+    return Assignment.from_canvas(assignment).to_dict()
+
 def get_course_assignments(canvas, course_id):
     """
     Get assignments for a specific course
@@ -18,32 +23,10 @@ def get_course_assignments(canvas, course_id):
         course = canvas.get_course(course_id)
         
         # Get all assignments for the course
-        assignments = list(course.get_assignments())
+        assignments = stream(course.get_assignments())
         
         # Convert assignments to serializable dictionaries
-        assignment_list = []
-        essential_fields = {
-            'id', 'name', 'description', 'points_possible', 
-            'due_at', 'unlock_at', 'lock_at', 'course_id',
-            'workflow_state', 'submission_types', 'grading_type'
-        }
-        
-        for assignment in assignments:
-            assignment_dict = {}
-            for key, value in assignment.__dict__.items():
-                if key not in essential_fields:
-                    continue
-                try:
-                    # Handle datetime objects
-                    if hasattr(value, 'isoformat') and callable(value.isoformat):
-                        assignment_dict[key] = value.isoformat()
-                    else:
-                        # Test if the value is JSON serializable
-                        json.dumps({key: value})
-                        assignment_dict[key] = value
-                except (TypeError, OverflowError):
-                    pass
-            assignment_list.append(assignment_dict)
+        assignment_list = [assignment_to_dict(assignment) for assignment in assignments]
         
         print(f"Found {len(assignment_list)} assignments for course {course.name}")
         return assignment_list
@@ -56,5 +39,5 @@ def get_course_assignments(canvas, course_id):
 if __name__ == "__main__":
     # Replace with your desired course_id
     course_id = "17700000000720596"
-    canvas = Canvas("https://canvas.instructure.com/", os.getenv("CANVAS_API_KEY"))
+    canvas = make_canvas("https://canvas.instructure.com/", os.getenv("CANVAS_API_KEY"))
     assignments = get_course_assignments(canvas, course_id)
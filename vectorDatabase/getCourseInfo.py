@@ -2,20 +2,23 @@
 # preview_html
 # get_tabs
 
-import io
-import re
 from typing import List, Dict, Optional
-import PyPDF2
-from canvasapi import Canvas
 import docx
+from pdfCleaner import clean_pdf_text
+from pdfExtraction import extract_pdf, cleaned_pages, pdf_text
+from courseCache import course_cache
+from exportManager import ExportManager
+from downloader import download_to_file
+from httpSession import get_session, make_canvas
+from pagination import stream
+from canvasSchemas import Announcement, Module
 from dotenv import load_dotenv
 import os
 import json
-import time
 import zipfile
-import requests
-import pickle
-from datetime import datetime, timedelta
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
 load_dotenv("secrets.env")
 
 def get_course_info(canvas, course_id: int) -> Optional[List[Dict]]:
@@ -68,37 +71,22 @@ def get_cached_export(course_id: int, max_age_hours: int = 24) -> Optional[Dict]
     Returns:
         Dict: Cached export data if valid, None otherwise
     """
-    cache_file = f"cache/course_{course_id}_export.pkl"
-    
-    if not os.path.exists("cache"):
-        os.makedirs("cache")
-        
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'rb') as f:
-                cached_data = pickle.load(f)
-                
-            # Check if cache is still valid
-            cache_time = cached_data.get('timestamp')
-            if cache_time and datetime.now() - cache_time < timedelta(hours=max_age_hours):
-                print(f"Using cached export from {cache_time}")
-                return cached_data
-        except Exception as e:
-            print(f"Error reading cache: {str(e)}")
-    
-    return None
+    try:
+        cached_data = course_cache.get_object(f"course_{course_id}_export", max_age=max_age_hours * 3600)
+        if cached_data is not None:
+            print(f"Using cached export from {cached_data.get('timestamp')}")
+        return cached_data
+    except Exception as e:
+        print(f"Error reading cache: {str(e)}")
+        return None
 
 def save_to_cache(course_id: int, export_data: Dict):
     """Save export data to cache"""
-    cache_file = f"cache/course_{course_id}_export.pkl"
-    
     try:
         # Add timestamp to the export data
         export_data['timestamp'] = datetime.now()
-        
-        with open(cache_file, 'wb') as f:
-            pickle.dump(export_data, f)
-        print(f"Saved export to cache: {cache_file}")
+        path = course_cache.put_object(f"course_{course_id}_export", export_data)
+        print(f"Saved export to cache: {path}")
     except Exception as e:
         print(f"Error saving to cache: {str(e)}")
 
@@ -113,191 +101,42 @@ def get_cached_zip(course_id: int, max_age_hours: int = 24) -> Optional[bytes]:
     Returns:
         bytes: Cached zip content if valid, None otherwise
     """
-    cache_file = f"cache/course_{course_id}_export.zip"
-    cache_meta = f"cache/course_{course_id}_meta.json"
-    
-    if not os.path.exists("cache"):
-        os.makedirs("cache")
-        
-    if os.path.exists(cache_file) and os.path.exists(cache_meta):
-        try:
-            with open(cache_meta, 'r') as f:
-                meta = json.load(f)
-            cache_time = datetime.fromisoformat(meta['timestamp'])
-            
-            if datetime.now() - cache_time < timedelta(hours=max_age_hours):
-                print(f"Using cached zip from {cache_time}")
-                with open(cache_file, 'rb') as f:
-                    return f.read()
-        except Exception as e:
-            print(f"Error reading cache: {str(e)}")
-    
-    return None
+    cache_file = get_cached_zip_path(course_id, max_age_hours)
+    if cache_file is None:
+        return None
+    with open(cache_file, 'rb') as f:
+        return f.read()
 
-def save_zip_to_cache(course_id: int, zip_content: bytes):
-    """Save zip content to cache"""
-    cache_file = f"cache/course_{course_id}_export.zip"
-    cache_meta = f"cache/course_{course_id}_meta.json"
+def get_cached_zip_path(course_id: int, max_age_hours: int = 24) -> Optional[str]:
+    """
+    Like get_cached_zip, but return the path of the cached zip instead of its bytes
     
+    Returns:
+        str: Path to the cached zip if valid, None otherwise
+    """
     try:
-        if not os.path.exists("cache"):
-            os.makedirs("cache")
-            
-        # Save zip file
-        with open(cache_file, 'wb') as f:
-            f.write(zip_content)
-            
-        # Save metadata
-        meta = {
-            'timestamp': datetime.now().isoformat(),
-            'course_id': course_id
-        }
-        with open(cache_meta, 'w') as f:
-            json.dump(meta, f)
-            
-        print(f"Saved zip to cache: {cache_file}")
+        cache_file = course_cache.get_path(f"course_{course_id}_export.zip", max_age=max_age_hours * 3600)
+        if cache_file is not None:
+            print(f"Using cached zip: {cache_file}")
+        return cache_file
     except Exception as e:
-        print(f"Error saving to cache: {str(e)}")
-
-import re
+        print(f"Error reading cache: {str(e)}")
+        return None
 
-def clean_pdf_text(content):
+def save_zip_to_cache(course_id: int, zip_content: bytes) -> Optional[str]:
     """
-    Enhanced PDF text cleanup with additional processing steps for academic slides
+    Save zip content to cache
     
-    Args:
-        content (str): Raw text content from PDF
-        
     Returns:
-        str: Cleaned, readable text content
-    """
-    # Step 1: Fix Unicode escape sequences (expanded list)
-    unicode_map = {
-        '\\u201c': '"', '\\u201d': '"',
-        '\\u00f6': 'ö', '\\u00e9': 'é',
-        '\\u00e1': 'á', '\\u00a0': ' ',
-        '\\u2019': "'", '\\u2013': '-',
-        '\\u2014': '—', '\\u2026': '...',
-        '\\u00f6s': 'ös', '\\u00e9nyi': 'ényi',
-        '\\u2022': '•', '\\u00fb': 'û',
-        '\\u00ff': 'ÿ', '\\ufb01': 'fi',
-        '\\ufb02': 'fl', '\\u00a0': ' ',
-        '\\u00f6\\': 'ö', '\\u00e9\\': 'é',
-        '\\u25cf': '●', '\\u25cb': '○',
-        '\\u2713': '✓', '\\u03b2': 'β',
-        '\\u03b3': 'γ', '\\u221e': '∞'
-    }
-    for escaped, char in unicode_map.items():
-        content = content.replace(escaped, char)
-    
-    # Step 2: Fix literal newlines and fix common PDF extraction issues
-    content = content.replace('\\n', '\n')
-    
-    # Step 3: Remove null bytes and other control characters
-    content = re.sub(r'\u0000+', '', content)
-    content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
-    
-    # Step 4: Remove JSON artifacts (from your sample data)
-    content = re.sub(r'"filename":\s*"[^"]+\.pdf",\s*"content":\s*"', '\n\n--- NEW SLIDE SET: ', content)
-    content = re.sub(r'",\s*"type":\s*"pdf"', '', content)
-    
-    # Step 5: Remove matrix-like structures and mathematical notation
-    content = re.sub(r'266664.*?377775', '', content, flags=re.DOTALL)
-    content = re.sub(r'\[A\^?n\]i,j.*?edges', '', content, flags=re.DOTALL)
-    content = re.sub(r'<latexit.*?</latexit>', '', content, flags=re.DOTALL)
-    content = re.sub(r'\\\w+\{.*?\}', '', content)
-    
-    # Step 6: Remove specific patterns for common slide elements
-    slide_patterns = [
-        r'\d+\s*x\s*\d+',  # Dimensions like "3 x 3"
-        r'p\s*=\s*0\.\d+',  # Probability notation
-        r'\(\d+,\s*\d+\)',  # Coordinate pairs
-        r'\b[0-9]+\.[0-9]+\b',  # Decimal numbers
-        r'^\s*\d{1,2}\s*$',  # Standalone numbers (slide numbers)
-        r'^\s*[A-Z]\d\s*$',  # Notation like "A2"
-        r'^\s*[a-zA-Z]{1,2}\s*$',  # Single letters
-        r'i,j',  # Matrix notation
-        r'dI/dt',  # Differential equations
-        r'[kK]_\w+',  # Variables with subscripts
-        r'A\d+',  # Matrix notation
-    ]
-    for pattern in slide_patterns:
-        content = re.sub(pattern, '', content, flags=re.MULTILINE)
-    
-    # Step 7: Handle PDF slide headers and footers
-    content = re.sub(r'Memes, Measles, and Misinformation', 'COURSE: Memes, Measles, and Misinformation', content)
-    
-    # Step 8: Remove lines containing only a single type of character
-    content = re.sub(r'^\s*(.)\1{3,}\s*$', '', content, flags=re.MULTILINE)
-    
-    # Step 9: Remove lines that likely represent code or formulas
-    code_patterns = [
-        r'^\s*import\s+\w+.*$',
-        r'^\s*random_nums\s*=.*$',
-        r'^\s*if\s*\(.*\):.*$',
-        r'.*=\s*\[\[.*\]\].*$',
-        r'.*\.add_\w+\(.*\).*$',
-        r'^\s*g\s*=\s*nx\..*$',
-        r'for\s+i\s+in\s+range.*$',
-        r'.*pyplot\..*$',
-        r'.*\.decode\(.*\).*$',
-        r'.*zip_ref\..*$',
-        r'Nt\+1\s*=\s*Nt.*',  # Mathematical equations
-        r'ddt=.*',            # More differential equations
-        r'.*=.*\(\s*.*\)',    # Function calls
-        r'.*\[.*\].*=.*',     # Array assignments
-    ]
-    for pattern in code_patterns:
-        content = re.sub(pattern, '', content, flags=re.MULTILINE)
-    
-    # Step 10: Split into lines and filter problematic ones
-    lines = content.split('\n')
-    filtered_lines = []
-    
-    prev_line = ""
-    for line in lines:
-        line = line.strip()
-        
-        # Skip empty lines or too short lines
-        if not line or len(line) < 2:
-            continue
-            
-        # Skip lines that are likely slide artifacts
-        if re.match(r'^[0-9]+$', line) or re.match(r'^[A-Z][0-9]$', line):
-            continue
-            
-        # Skip lines with too many numbers or special characters
-        if sum(c.isdigit() for c in line) > len(line) * 0.5:
-            continue
-            
-        # Skip very short lines that are likely labels
-        if len(line) <= 3 and not line.lower() in ['the', 'and', 'but', 'or', 'a', 'an']:
-            continue
-        
-        # Avoid duplicating the same line that appears consecutively
-        if line == prev_line:
-            continue
-            
-        # Add the line to our filtered list
-        filtered_lines.append(line)
-        prev_line = line
-    
-    # Step 11: Join lines and fix multiple newlines
-    content = '\n'.join(filtered_lines)
-    content = re.sub(r'\n{3,}', '\n\n', content)
-    
-    # Step 12: Fix spacing issues
-    content = re.sub(r'\s{2,}', ' ', content)
-    
-    # Step 13: Fix academic-specific patterns
-    content = re.sub(r'•', '- ', content)  # Convert bullets to dashes
-    content = re.sub(r'–', '-', content)   # Standardize dashes
-    
-    # Step 14: Clean up remaining specific patterns from the sample data
-    content = re.sub(r'In Class Points[!]?', '\n[In-Class Activity]', content)
-    content = re.sub(r'https?://\S+', lambda m: f"\n{m.group(0)}\n", content)  # Put URLs on their own lines
-    
-    return content.strip()
+        str: Path of the cached zip, or None if it could not be saved
+    """
+    try:
+        cache_file = course_cache.put(f"course_{course_id}_export.zip", zip_content)
+        print(f"Saved zip to cache: {cache_file}")
+        return cache_file
+    except Exception as e:
+        print(f"Error saving to cache: {str(e)}")
+        return None
 
 def process_course_content(content_list):
     """
@@ -327,7 +166,113 @@ def process_course_content(content_list):
     
     return processed_content
 
-def get_syllabus_content(canvas, course_id: int, use_cache: bool = True) -> Optional[Dict]:
+# ZipFile handles opened by each extraction worker process, keyed by path
+_worker_zips = {}
+
+def extract_zip_member(zip_path: str, file_name: str) -> Optional[Dict]:
+    """
+    Extract and clean the text of one member of a course export zip
+
+    Runs inside a worker process: the member is read straight from the zip
+    on disk, so the parent never ships file contents to workers.
+
+    Args:
+        zip_path (str): Path to the export zip on disk
+        file_name (str): Member name inside the zip
+
+    Returns:
+        Dict: Processed {'filename', 'content', 'type'}, or None for unsupported files
+    """
+    if file_name.lower().endswith('.pdf'):
+        # Cleaned text comes straight from the extraction cache when this PDF was seen before
+        extraction = extract_pdf(_worker_zip(zip_path).read(file_name))
+        return {'filename': file_name, 'content': pdf_text(extraction), 'type': 'pdf',
+                'pages': cleaned_pages(extraction)}
+
+    item = _read_zip_member(zip_path, file_name)
+    return process_course_content([item])[0] if item else None
+
+def _worker_zip(zip_path: str) -> zipfile.ZipFile:
+    zip_ref = _worker_zips.get(zip_path)
+    if zip_ref is None:
+        zip_ref = _worker_zips[zip_path] = zipfile.ZipFile(zip_path)
+    return zip_ref
+
+def _close_worker_zip(zip_path: str):
+    zip_ref = _worker_zips.pop(zip_path, None)
+    if zip_ref is not None:
+        zip_ref.close()
+
+def _close_worker_zips():
+    for zip_path in list(_worker_zips):
+        _close_worker_zip(zip_path)
+
+def _init_extraction_worker():
+    # Pool workers leave through multiprocessing's exit handlers, not atexit
+    multiprocessing.util.Finalize(None, _close_worker_zips, exitpriority=10)
+
+def _read_zip_member(zip_path: str, file_name: str) -> Optional[Dict]:
+    """Raw text of one zip member, before cleaning"""
+    zip_ref = _worker_zip(zip_path)
+
+    file_lower = file_name.lower()
+    if file_lower.endswith(('.txt', '.html', '.htm')):
+        content = zip_ref.read(file_name).decode('utf-8')
+        return {'filename': file_name, 'content': content, 'type': 'text'}
+
+    if file_lower.endswith('.docx'):
+        with zip_ref.open(file_name) as f:
+            doc = docx.Document(f)
+        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        return {'filename': file_name, 'content': text, 'type': 'docx'}
+
+    return None
+
+def iter_zip_content(zip_path: str, workers: Optional[int] = None):
+    """
+    Extract and clean every supported member of a course export zip across a process pool
+
+    Args:
+        zip_path (str): Path to the export zip on disk
+        workers (int): Worker processes, defaults to the CPU count; 1 extracts inline
+
+    Yields:
+        Dict: Processed content dictionaries, in completion order
+    """
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        names = [n for n in zip_ref.namelist() if n.lower().endswith(('.txt', '.html', '.htm', '.pdf', '.docx'))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(names) <= 1:
+        try:
+            for file_name in names:
+                print(f"- {file_name}")
+                try:
+                    item = extract_zip_member(zip_path, file_name)
+                except Exception as e:
+                    print(f"Error processing file {file_name}: {str(e)}")
+                    continue
+                if item:
+                    yield item
+        finally:
+            _close_worker_zip(zip_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(names)), initializer=_init_extraction_worker) as executor:
+        futures = {executor.submit(extract_zip_member, zip_path, name): name for name in names}
+        for future in as_completed(futures):
+            file_name = futures[future]
+            print(f"- {file_name}")
+            try:
+                item = future.result()
+            except Exception as e:
+                print(f"Error processing file {file_name}: {str(e)}")
+                continue
+            if item:
+                yield item
+
+def get_syllabus_content(canvas, course_id: int, use_cache: bool = True, workers: Optional[int] = None,
+                         zip_path: Optional[str] = None) -> Optional[Dict]:
     """
     Fetch and process the syllabus content for a specific course using content export
     
@@ -335,110 +280,27 @@ def get_syllabus_content(canvas, course_id: int, use_cache: bool = True) -> Opti
         canvas: Canvas instance
         course_id (int): The ID of the course to fetch syllabus from
         use_cache (bool): Whether to use cached data if available
+        workers (int): Processes used to extract files from the export zip
+        zip_path (str): An export zip already on disk (e.g. from export_course_zips);
+            the course is only exported when this is None
         
     Returns:
         Dict: Dictionary containing processed syllabus content, or None if there's an error
     """
     try:
-        # Check for cached zip file if enabled
-        zip_content = None
-        if use_cache:
-            zip_content = get_cached_zip(course_id)
-            
-        if zip_content is None:
-            # No cache or cache expired, need to export
-            course = canvas.get_course(course_id)
-            print(f"Successfully accessed course: {course.name}")
-            
-            print("Creating content export...")
-            try:
-                export = course.export_content('zip')
-                print(f"Export created with ID: {export.id}")
-            except Exception as e:
-                print(f"Error creating export: {str(e)}")
-                return None
-            
-            # Wait for export to complete
-            print("Waiting for export to complete...")
-            start_time = time.time()
-            while True:
-                try:
-                    export = course.get_content_export(export.id)
-                    elapsed_time = time.time() - start_time
-                    print(f"Export status: {export.workflow_state} (Time elapsed: {elapsed_time:.1f} seconds)")
-                    
-                    if export.workflow_state == 'exported':
-                        print(f"Export completed successfully in {elapsed_time:.1f} seconds")
-                        download_url = export.attachment['url']
-                        break
-                    elif export.workflow_state == 'failed':
-                        print(f"Export failed after {elapsed_time:.1f} seconds")
-                        return None
-                    elif export.workflow_state in ['created', 'exporting']:
-                        print(f"Export is {export.workflow_state}...")
-                    else:
-                        print(f"Unknown export state: {export.workflow_state}")
-                    
-                    time.sleep(2)
-                except Exception as e:
-                    print(f"Error checking export status: {str(e)}")
-                    return None
-            
-            # Download the zip file
-            print("Downloading export file...")
-            response = requests.get(download_url)
-            response.raise_for_status()
-            zip_content = response.content
-            
-            # Save to cache
-            save_zip_to_cache(course_id, zip_content)
+        if zip_path is None:
+            # Hold the course's cache lock so concurrent syncs of the same course
+            # wait for one export instead of racing to write the cache entry
+            with course_cache.lock(f"course_{course_id}_export.zip"):
+                zip_path = _export_course_zip(canvas, course_id, use_cache)
+        if zip_path is None:
+            return None
         
-        # Process the zip content
-        course_content = []
-        with zipfile.ZipFile(io.BytesIO(zip_content)) as zip_ref:
-            print("\nProcessing files in export:")
-            for file_name in zip_ref.namelist():
-                print(f"- {file_name}")
-                
-                file_lower = file_name.lower()
-                try:
-                    if file_lower.endswith(('.txt', '.html', '.htm')):
-                        with zip_ref.open(file_name) as f:
-                            content = f.read().decode('utf-8')
-                            course_content.append({
-                                'filename': file_name,
-                                'content': content,
-                                'type': 'text'
-                            })
-                            
-                    elif file_lower.endswith('.pdf'):
-                        with zip_ref.open(file_name) as f:
-                            pdf_reader = PyPDF2.PdfReader(io.BytesIO(f.read()))
-                            text = ""
-                            for page in pdf_reader.pages:
-                                text += page.extract_text()
-                            course_content.append({
-                                'filename': file_name,
-                                'content': text,
-                                'type': 'pdf'
-                            })
-                            
-                    elif file_lower.endswith('.docx'):
-                        with zip_ref.open(file_name) as f:
-                            doc = docx.Document(io.BytesIO(f.read()))
-                            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                            course_content.append({
-                                'filename': file_name,
-                                'content': text,
-                                'type': 'docx'
-                            })
-                            
-                except Exception as e:
-                    print(f"Error processing file {file_name}: {str(e)}")
-                    continue
+        # Extract and clean the zip content across worker processes
+        print("\nProcessing files in export:")
+        processed_content = list(iter_zip_content(zip_path, workers))
         
-        if course_content:
-            processed_content = process_course_content(course_content)
+        if processed_content:
             return processed_content
         
         print("\nNo readable content found in export")
@@ -448,6 +310,97 @@ def get_syllabus_content(canvas, course_id: int, use_cache: bool = True) -> Opti
         print(f"Error in get_syllabus_content: {str(e)}")
         return None
 
+def _export_course_zip(canvas, course_id: int, use_cache: bool = True) -> Optional[str]:
+    """
+    Return the path of a course's export zip, exporting and caching it if needed
+    
+    Returns:
+        str: Path to the export zip on disk, or None if the export failed
+    """
+    # Check for cached zip file if enabled
+    zip_path = None
+    if use_cache:
+        zip_path = get_cached_zip_path(course_id)
+        
+    if zip_path is None:
+        # No cache or cache expired, need to export (or resume a persisted export)
+        manager = ExportManager(canvas)
+        print("Waiting for export to complete...")
+        download_url = manager.wait(course_id)
+        if download_url is None:
+            return None
+        export_id = manager.jobs[course_id]['export_id']
+        zip_path = _download_export(course_id, download_url, export_id)
+        manager.forget(course_id)
+
+    return zip_path
+
+def _download_export(course_id: int, download_url: str, export_id: Optional[int] = None) -> str:
+    """
+    Stream a finished export into the cache and return its path on disk
+    
+    The archive goes to a partial file in chunks and is then moved into the
+    cache, so memory use does not grow with the archive size. The partial file
+    is named after the export, so an interrupted download resumes where it left off.
+    """
+    print("Downloading export file...")
+    partial_dir = os.path.join(course_cache.root, 'downloads')
+    name = f"export_{export_id}.zip" if export_id is not None else f"course_{course_id}_export.zip"
+    download_path = download_to_file(download_url, os.path.join(partial_dir, name), session=get_session())
+    
+    # Move into the cache; extraction workers read the zip from disk
+    try:
+        zip_path = course_cache.put_file(f"course_{course_id}_export.zip", download_path)
+        print(f"Saved zip to cache: {zip_path}")
+        return zip_path
+    except Exception as e:
+        print(f"Error saving to cache: {str(e)}")
+        return download_path
+
+def export_course_zips(canvas, course_ids: List[int], use_cache: bool = True,
+                       timeout: Optional[float] = None) -> Dict[int, str]:
+    """
+    Export many courses at once and download each archive as soon as it is ready
+    
+    Args:
+        canvas: Canvas instance
+        course_ids (List[int]): Courses to export
+        use_cache (bool): Skip courses with a fresh cached zip
+        timeout (float): Stop waiting for unfinished exports after this many seconds
+        
+    Returns:
+        Dict[int, str]: {course_id: zip path} for every course that has an archive
+    """
+    zip_paths = {}
+    pending = []
+    for course_id in course_ids:
+        zip_path = get_cached_zip_path(course_id) if use_cache else None
+        if zip_path:
+            zip_paths[course_id] = zip_path
+        else:
+            pending.append(course_id)
+    if not pending:
+        return zip_paths
+    
+    manager = ExportManager(canvas)
+    started = manager.start(pending)
+    print(manager.format_progress())
+    for course_id, job in manager.iter_completed(started, timeout):
+        if job['state'] != 'exported':
+            continue
+        try:
+            with course_cache.lock(f"course_{course_id}_export.zip"):
+                zip_paths[course_id] = _download_export(course_id, job['download_url'], job['export_id'])
+            manager.forget(course_id)
+        except Exception as e:
+            print(f"Error downloading export for course {course_id}: {str(e)}")
+    print(manager.format_progress())
+    return zip_paths
+
+def announcement_to_dict(announcement) -> Dict:
+    """Convert a canvasapi DiscussionTopic announcement into a dictionary"""
+    return Announcement.from_canvas(announcement).to_dict()
+
 def get_announcements(canvas, course_id: int) -> Optional[List[Dict]]:
     """
     Fetch all announcements for a specific course
@@ -461,27 +414,9 @@ def get_announcements(canvas, course_id: int) -> Optional[List[Dict]]:
     """
     try:
         course = canvas.get_course(course_id)
-        announcements = course.get_discussion_topics(only_announcements=True)
+        announcements = stream(course.get_discussion_topics(only_announcements=True))
         
-        announcements_list = []
-        for announcement in announcements:
-            announcement_dict = {
-                'id': announcement.id,
-                'title': announcement.title,
-                'message': announcement.message,
-                'posted_at': announcement.posted_at,
-                'delayed_post_at': getattr(announcement, 'delayed_post_at', None),
-                'last_reply_at': getattr(announcement, 'last_reply_at', None),
-                'published': announcement.published,
-                'locked': getattr(announcement, 'locked', False),
-                'pinned': getattr(announcement, 'pinned', False),
-                'position': getattr(announcement, 'position', None),
-                'author': {
-                    'id': announcement.user_id,
-                    'name': getattr(announcement, 'user_name', None),
-                } if hasattr(announcement, 'user_id') else None,
-            }
-            announcements_list.append(announcement_dict)
+        announcements_list = [announcement_to_dict(announcement) for announcement in announcements]
             
         return announcements_list
     
@@ -489,82 +424,147 @@ def get_announcements(canvas, course_id: int) -> Optional[List[Dict]]:
         print(f"Error fetching announcements for course {course_id}: {str(e)}")
         return None
 
-def get_module_content(canvas, course_id: int) -> Optional[List[Dict]]:
+def download_pdf(file) -> Dict:
+    """
+    Download a Canvas PDF file and extract its text
+    
+    Args:
+        file: canvasapi File object
+        
+    Returns:
+        Dict: extract_pdf result with the cleaned text of every page
+    """
+    print(f"Downloading PDF: {file.filename}")
+    
+    # Download the PDF content
+    response = get_session().get(file.url)
+    response.raise_for_status()
+    
+    # Extract and clean the text, or reuse it if this exact file was extracted before
+    return extract_pdf(response.content)
+
+def download_pdf_text(file) -> str:
+    """
+    Download a Canvas PDF file and return its cleaned text
+    
+    Args:
+        file: canvasapi File object
+        
+    Returns:
+        str: Cleaned text content of the PDF
+    """
+    return pdf_text(download_pdf(file))
+
+def list_modules_with_items(course) -> List[Dict]:
+    """
+    List a course's modules together with their items in as few requests as possible
+    
+    Items come inline with the module listing (include[]=items). Canvas leaves
+    them out for modules with too many items, and only those modules get a
+    separate item request.
+    
+    Args:
+        course: canvasapi Course object
+        
+    Returns:
+        List[Dict]: {'id', 'name', 'position', 'items': [ModuleItem dicts]} per module
+    """
+    modules_list = []
+    for module in stream(course.get_modules(include=['items', 'content_details'])):
+        items = getattr(module, 'items', None)
+        if items is None:
+            try:
+                items = list(stream(module.get_module_items(include=['content_details'])))
+            except Exception as e:
+                print(f"Error fetching items for module {module.name}: {str(e)}")
+                items = []
+        modules_list.append(Module.from_canvas(module, items).to_dict())
+    return modules_list
+
+def fetch_module_item_content(course, modules: List[Dict], workers: int = 8):
+    """
+    Fetch the content behind Page and File module items, once per page/file
+    
+    A page or file linked from several modules is fetched (and a PDF
+    downloaded and parsed) only once. The fetches run concurrently.
+    
+    Returns:
+        (pages, files): {page_url: body}, {file_id: (filename, extract_pdf result)}
+        with None for items that could not be fetched
+    """
+    page_titles, file_titles = {}, {}
+    for module in modules:
+        for item in module['items']:
+            if item.get('type') == 'Page' and item.get('page_url'):
+                page_titles.setdefault(item['page_url'], item.get('title'))
+            elif item.get('type') == 'File' and item.get('content_id') is not None:
+                file_titles.setdefault(item['content_id'], item.get('title'))
+
+    def fetch_page(page_url):
+        try:
+            return course.get_page(page_url).body
+        except Exception:
+            print(f"Could not fetch content for page: {page_titles[page_url]}")
+            return None
+
+    def fetch_file(file_id):
+        try:
+            file = course.get_file(file_id)
+            # Only PDFs are downloaded
+            if file.filename.lower().endswith('.pdf'):
+                return file.filename, download_pdf(file)
+        except Exception as e:
+            print(f"Error processing PDF file {file_titles[file_id]}: {str(e)}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        page_futures = {url: executor.submit(fetch_page, url) for url in page_titles}
+        file_futures = {fid: executor.submit(fetch_file, fid) for fid in file_titles}
+        pages = {url: future.result() for url, future in page_futures.items()}
+        files = {fid: future.result() for fid, future in file_futures.items()}
+    return pages, files
+
+def get_module_content(canvas, course_id: int, workers: int = 8) -> Optional[List[Dict]]:
     """
     Fetch all modules and their items for a specific course
+    
+    Args:
+        canvas: Canvas instance
+        course_id (int): The ID of the course to fetch modules from
+        workers (int): Concurrent page/file fetches
+        
+    Returns:
+        List[Dict]: Modules with their items and page/PDF content, or None if there's an error
     """
     try:
         course = canvas.get_course(course_id)
-        modules = course.get_modules()
+        modules = list_modules_with_items(course)
+        pages, files = fetch_module_item_content(course, modules, workers)
         
         modules_list = []
         for module in modules:
             module_dict = {
-                'id': module.id,
-                'name': module.name,
-                'position': module.position,
+                'id': module['id'],
+                'name': module['name'],
+                'position': module['position'],
                 'items': []
             }
-            
-            # Get all items in the module
-            try:
-                module_items = module.get_module_items()
-                for item in module_items:
-                    item_dict = {
-                        'id': item.id,
-                        'title': item.title,
-                        'type': item.type,
-                        'html_url': item.html_url,
-                        'content': None
-                    }
-                    
-                    # Handle different types of content
-                    if item.type == 'Page':
-                        try:
-                            page = course.get_page(item.page_url)
-                            item_dict['content'] = page.body
-                        except:
-                            print(f"Could not fetch content for page: {item.title}")
-                            
-                    elif item.type == 'File':
-                        try:
-                            # Get the file object
-                            file_id = item.content_id
-                            file = course.get_file(file_id)
-                            
-                            # Download the file if it's a PDF
-                            if file.filename.lower().endswith('.pdf'):
-                                print(f"Downloading PDF: {file.filename}")
-                                
-                                # Get the download URL
-                                download_url = file.url
-                                
-                                # Download the PDF content
-                                response = requests.get(download_url)
-                                response.raise_for_status()
-                                
-                                # Read the PDF content
-                                pdf_content = io.BytesIO(response.content)
-                                pdf_reader = PyPDF2.PdfReader(pdf_content)
-                                
-                                # Extract text from all pages
-                                text = ""
-                                for page in pdf_reader.pages:
-                                    text += page.extract_text()
-                                
-                                # Clean the extracted text
-                                cleaned_text = clean_pdf_text(text)
-                                item_dict['content'] = cleaned_text
-                                item_dict['filename'] = file.filename
-                                
-                        except Exception as e:
-                            print(f"Error processing PDF file {item.title}: {str(e)}")
-                    
-                    module_dict['items'].append(item_dict)
-                    
-            except Exception as e:
-                print(f"Error fetching items for module {module.name}: {str(e)}")
-                
+            for item in module['items']:
+                item_dict = {
+                    'id': item['id'],
+                    'title': item['title'],
+                    'type': item['type'],
+                    'html_url': item.get('html_url'),
+                    'content': None
+                }
+                if item['type'] == 'Page':
+                    item_dict['content'] = pages.get(item.get('page_url'))
+                elif item['type'] == 'File' and files.get(item.get('content_id')):
+                    filename, extraction = files[item['content_id']]
+                    item_dict['content'] = pdf_text(extraction)
+                    item_dict['filename'] = filename
+                    item_dict['pages'] = cleaned_pages(extraction)
+                module_dict['items'].append(item_dict)
             modules_list.append(module_dict)
             
         return modules_list
@@ -573,14 +573,45 @@ def get_module_content(canvas, course_id: int) -> Optional[List[Dict]]:
         print(f"Error fetching modules for course {course_id}: {str(e)}")
         return None
 
+def get_all_courses_content(canvas, course_ids: List[int], use_cache: bool = True) -> Dict[int, Dict]:
+    """
+    Fetch all content of several courses, exporting them concurrently
+    
+    Every course export is started up front through export_course_zips, so
+    the Canvas-side exports run in parallel instead of one after another;
+    each course is then extracted from its finished zip.
+    
+    Args:
+        canvas: Canvas instance
+        course_ids (List[int]): Courses to fetch
+        use_cache (bool): Reuse fresh cached export zips
+        
+    Returns:
+        Dict[int, Dict]: {course_id: get_all_course_content result}; a course
+            whose export failed has no syllabus
+    """
+    try:
+        zip_paths = export_course_zips(canvas, course_ids, use_cache)
+    except Exception as e:
+        print(f"Error exporting courses: {str(e)}")
+        zip_paths = {}
+    return {
+        course_id: _course_content(canvas, course_id, zip_paths.get(course_id))
+        for course_id in course_ids
+    }
+
 def get_all_course_content(canvas, course_id: int) -> Dict:
     """
     Fetch all relevant content from a course including tabs, syllabus, announcements, and modules
     """
+    return get_all_courses_content(canvas, [course_id])[course_id]
+
+def _course_content(canvas, course_id: int, zip_path: Optional[str]) -> Optional[Dict]:
+    """Content of one course, with the syllabus extracted from `zip_path` (None when its export failed)"""
     try:
         course_content = {
             'tabs': get_course_info(canvas, course_id),
-            'syllabus': get_syllabus_content(canvas, course_id),
+            'syllabus': get_syllabus_content(canvas, course_id, zip_path=zip_path) if zip_path else None,
             'announcements': get_announcements(canvas, course_id),
             'modules': get_module_content(canvas, course_id)  # Add modules content
         }
@@ -599,7 +630,7 @@ def get_all_course_content(canvas, course_id: int) -> Dict:
 if __name__ == "__main__":
     # Replace with your desired course_id
     course_id = 17700000000720596  # Remove the quotes and tilde to make it an integer
-    canvas = Canvas("https://canvas.instructure.com/", os.getenv("CANVAS_API_KEY"))
+    canvas = make_canvas("https://canvas.instructure.com/", os.getenv("CANVAS_API_KEY"))
     
     # Get all course content
     content = get_all_course_content(canvas, course_id)
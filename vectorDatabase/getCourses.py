@@ -1,32 +1,16 @@
 from canvasapi import Canvas
 from dotenv import load_dotenv
 import os
-import json
+from pagination import stream
+from canvasSchemas import Course, save_json
 
 def get_all_courses(canvas):
     """Get all courses for the current user"""
     user = canvas.get_user('self')
     print(f"logged in as: {user.name}")
 
-    courses = list(user.get_courses(completed=False))
-    dict_courses = []
-    
-    for course in courses:
-        course_dict = {}
-        for key, value in course.__dict__.items():
-            try:
-                # Handle datetime objects by converting them to ISO format strings
-                if hasattr(value, 'isoformat') and callable(value.isoformat):
-                    course_dict[key] = value.isoformat()
-                else:
-                    # Test if the value is JSON serializable
-                    json.dumps({key: value})
-                    course_dict[key] = value
-            except (TypeError, OverflowError) as e:
-                # Skip attributes that can't be serialized
-                # print(f"Error: {e}, {key}")
-                pass
-        dict_courses.append(course_dict)
+    courses = stream(user.get_courses(completed=False))
+    dict_courses = [Course.from_canvas(course).to_dict() for course in courses]
     
     print(f"Found {len(dict_courses)} total courses")
     return dict_courses
@@ -45,7 +29,6 @@ def get_current_courses(courses):
             print(f"{course_name} {course_term}")
     return current_courses
 
-def save_courses_to_json(courses, filename):
-    """Save courses to a JSON file"""
-    with open(filename, "w") as f:
-        json.dump(courses, f, indent=2)
\ No newline at end of file
+def save_courses_to_json(courses, filename, jsonl=False):
+    """Save courses to a JSON file (and a JSON Lines file next to it if jsonl)"""
+    save_json(courses, filename, jsonl)
\ No newline at end of file
@@ -1,4 +1,10 @@
 from typing import List, Dict, Optional
+from pagination import stream
+from canvasSchemas import Quiz
+
+def quiz_to_dict(quiz) -> Dict:
+    """Convert a canvasapi Quiz into a dictionary with the relevant information"""
+    return Quiz.from_canvas(quiz).to_dict()
 
 def get_course_quizzes(canvas, course_id: int) -> Optional[List[Dict]]:
     """
@@ -13,22 +19,10 @@ def get_course_quizzes(canvas, course_id: int) -> Optional[List[Dict]]:
     """
     try:
         course = canvas.get_course(course_id)
-        quizzes = course.get_quizzes()
-        print(quizzes[0])
+        quizzes = stream(course.get_quizzes())
         
         # Convert quiz objects to dictionaries with relevant information
-        quiz_list = []
-        for quiz in quizzes:
-            quiz_dict = {
-                'id': quiz.id,
-                'title': quiz.title,
-                'description': quiz.description,
-                'due_at': quiz.due_at,
-                'points_possible': quiz.points_possible,
-                'quiz_type': quiz.quiz_type,
-                'allowed_attempts': quiz.allowed_attempts
-            }
-            quiz_list.append(quiz_dict)
+        quiz_list = [quiz_to_dict(quiz) for quiz in quizzes]
             
         return quiz_list
     
@@ -1,41 +1,149 @@
-from canvasapi import Canvas
 from dotenv import load_dotenv
 import os
 import json
+import argparse
 from getCourses import get_all_courses, get_current_courses, save_courses_to_json
 from getAssignments import get_course_assignments
 from getQuizes import get_course_quizzes
-from datetime import datetime
-import pytz
+from getCourseInfo import get_announcements, get_module_content
+from httpSession import make_canvas, connection_stats
+from deadlineStore import DeadlineStore, group_by_course
+from canvasSync import CanvasSync, SyncState, SYNC_KINDS, DEFAULT_STATE_PATH, format_report
+from canvasSchemas import save_json
+from concurrent.futures import ThreadPoolExecutor
+
+# Per-course fetchers used by the concurrent fan-out, keyed by content kind
+COURSE_FETCHERS = {
+    'assignments': get_course_assignments,
+    'quizzes': get_course_quizzes,
+    'announcements': get_announcements,
+    'modules': get_module_content,
+}
 
 class CanvasManager:
-    def __init__(self):
-        """Initialize the CanvasManager with Canvas instance and course data"""
+    def __init__(self, workers: int = 8, jsonl: bool = False):
+        """
+        Initialize the CanvasManager with Canvas instance and course data
+
+        Args:
+            workers (int): Number of concurrent Canvas fetches (1 fetches serially)
+            jsonl (bool): Also write every saved JSON file as compact JSON Lines
+        """
+        self.workers = max(1, workers)
+        self.jsonl = jsonl
         self.canvas = self._initialize_canvas()
         self.all_courses = get_all_courses(self.canvas)
         self.current_courses = get_current_courses(self.all_courses)
         
         # Save courses to JSON files
-        save_courses_to_json(self.all_courses, "AllCourses.json")
-        save_courses_to_json(self.current_courses, "CurrentCourses.json")
+        save_courses_to_json(self.all_courses, "AllCourses.json", self.jsonl)
+        save_courses_to_json(self.current_courses, "CurrentCourses.json", self.jsonl)
 
     def _initialize_canvas(self):
         """Initialize and return a Canvas instance"""
         load_dotenv("secrets.env")
         API_URL = "https://canvas.instructure.com/"
         API_KEY = os.getenv("CANVAS_API_KEY")
-        return Canvas(API_URL, API_KEY)
+        return make_canvas(API_URL, API_KEY)
+
+    def _fetch_for_courses(self, kinds):
+        """
+        Fetch the given content kinds for every current course concurrently
+
+        Each (course, kind) pair is its own task, so one failing course or
+        endpoint does not affect the others.
+
+        Args:
+            kinds (list): Keys of COURSE_FETCHERS to fetch
+
+        Returns:
+            dict: {kind: {course_name: result or None}} in current course order
+        """
+        results = {kind: {} for kind in kinds}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = []
+            for course in self.current_courses:
+                for kind in kinds:
+                    print(f"\nFetching {kind} for: {course['name']}")
+                    future = executor.submit(COURSE_FETCHERS[kind], self.canvas, course['id'])
+                    futures.append((kind, course['name'], future))
+
+            for kind, course_name, future in futures:
+                try:
+                    results[kind][course_name] = future.result()
+                except Exception as e:
+                    print(f"Error fetching {kind} for {course_name}: {str(e)}")
+                    results[kind][course_name] = None
+        return results
+
+    def fetch_current_courses_content(self):
+        """
+        Fetch assignments, quizzes, announcements and modules for all current
+        courses in parallel and save each kind to its own JSON file
+
+        Returns:
+            dict: {kind: {course_name: data}} with courses that returned nothing omitted
+        """
+        results = self._fetch_for_courses(list(COURSE_FETCHERS))
+        content = {}
+        for kind, by_course in results.items():
+            content[kind] = {name: data for name, data in by_course.items() if data}
+            save_json(content[kind], f"All{kind.capitalize()}.json", self.jsonl)
+        print("\nSaved assignments, quizzes, announcements and modules!")
+        return content
+
+    def sync_current_courses(self, state_path: str = DEFAULT_STATE_PATH, kinds=SYNC_KINDS):
+        """
+        Incrementally sync all current courses against the local SQLite state
+
+        Only new or changed module pages and PDFs are downloaded; everything
+        else is read back from the state file. The JSON files are rewritten
+        from the synced state, in the same shape fetch_current_courses_content
+        produces.
+
+        Args:
+            state_path (str): Path of the SQLite change-tracking file
+            kinds (tuple): Content kinds to sync
+
+        Returns:
+            dict: {course_name: {kind: {'added': [...], 'changed': [...], 'deleted': [...]}}}
+        """
+        state = SyncState(state_path)
+        syncer = CanvasSync(self.canvas, state)
+        report = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    (course, executor.submit(syncer.sync_course, course['id'], kinds))
+                    for course in self.current_courses
+                ]
+                for course, future in futures:
+                    try:
+                        report[course['name']] = future.result()
+                    except Exception as e:
+                        print(f"Error syncing {course['name']}: {str(e)}")
+
+            for kind in kinds:
+                content = {}
+                for course in self.current_courses:
+                    data = state.load(kind, course['id'])
+                    if data:
+                        content[course['name']] = data
+                save_json(content, f"All{kind.capitalize()}.json", self.jsonl)
+        finally:
+            state.close()
+
+        print("\nSync report:")
+        print(format_report(report))
+        print(f"Content fetched: {syncer.stats['fetched']}, reused: {syncer.stats['reused']}")
+        return report
 
     def get_current_courses_assignments(self):
         """Get assignments for all current courses and save them to a JSON file"""
         try:
             all_assignments = {}
-            for course in self.current_courses:
-                course_id = course['id']
-                course_name = course['name']
-                print(f"\nFetching assignments for: {course_name}")
-                
-                assignments = get_course_assignments(self.canvas, course_id)
+            fetched = self._fetch_for_courses(['assignments'])['assignments']
+            for course_name, assignments in fetched.items():
                 if assignments:
                     all_assignments[course_name] = assignments
                 else:
@@ -43,8 +151,7 @@ class CanvasManager:
             
             # Save all assignments to a single file
             if all_assignments:
-                with open("AllAssignments.json", "w") as f:
-                    json.dump(all_assignments, f, indent=2)
+                save_json(all_assignments, "AllAssignments.json", self.jsonl)
                 print("\nSuccessfully fetched and saved all assignments!")
             else:
                 print("\nNo assignments were successfully fetched.")
@@ -59,19 +166,14 @@ class CanvasManager:
         """Get quizzes for all current courses and save them to a JSON file"""
         try:
             all_quizzes = {}
-            for course in self.current_courses:
-                course_id = course['id']
-                course_name = course['name']
-                print(f"\nFetching quizzes for: {course_name}")
-                
-                quizzes = get_course_quizzes(self.canvas, course_id)
+            fetched = self._fetch_for_courses(['quizzes'])['quizzes']
+            for course_name, quizzes in fetched.items():
                 if quizzes:
                     all_quizzes[course_name] = quizzes
             
             # Save all quizzes to a single file
             if all_quizzes:
-                with open("AllQuizzes.json", "w") as f:
-                    json.dump(all_quizzes, f, indent=2)
+                save_json(all_quizzes, "AllQuizzes.json", self.jsonl)
                 print("\nSuccessfully fetched and saved all quizzes!")
             else:
                 print("\nNo quizzes were successfully fetched.")
@@ -89,30 +191,18 @@ class CanvasManager:
         Args:
             all_assignments (dict): Dictionary containing courses and their assignments
         """
-        # Get current time in UTC
-        current_time = datetime.now(pytz.UTC)
+        store = DeadlineStore.from_courses(assignments=all_assignments)
         
         print("\nUpcoming Assignments:")
         print("-" * 50)
         
-        for course_name, assignments in all_assignments.items():
-            future_assignments = []
-            for assignment in assignments:
-                # Check if due_at exists and is not None
-                if assignment.get('due_at'):
-                    due_date = datetime.strptime(assignment['due_at'], "%Y-%m-%dT%H:%M:%SZ")
-                    due_date = pytz.UTC.localize(due_date)
-                    
-                    if due_date > current_time:
-                        future_assignments.append({
-                            'name': assignment['name'],
-                            'due_date': due_date.strftime("%Y-%m-%d %H:%M UTC")
-                        })
-            
-            if future_assignments:
-                print(f"\n{course_name}:")
-                for assignment in future_assignments:
-                    print(f"  - {assignment['name']} (Due: {assignment['due_date']})")
+        by_course = group_by_course(store.upcoming(hours=None))
+        for course_name in all_assignments:
+            if course_name not in by_course:
+                continue
+            print(f"\n{course_name}:")
+            for assignment in by_course[course_name]:
+                print(f"  - {assignment.title} (Due: {assignment.due.strftime('%Y-%m-%d %H:%M UTC')})")
 
     def display_all_quizzes(self, all_quizzes):
         """
@@ -121,27 +211,41 @@ class CanvasManager:
         Args:
             all_quizzes (dict): Dictionary containing courses and their quizzes
         """
+        store = DeadlineStore.from_courses(quizzes=all_quizzes)
+        by_course = group_by_course(store.between() + store.undated())
+        
         print("\nAll Quizzes:")
         print("-" * 50)
         
-        for course_name, quizzes in all_quizzes.items():
-            if quizzes:  # Only print course name if it has quizzes
-                print(f"\n{course_name}:")
-                for quiz in quizzes:
-                    due_date_str = "No due date"
-                    if quiz.get('due_at'):
-                        due_date = datetime.strptime(quiz['due_at'], "%Y-%m-%dT%H:%M:%SZ")
-                        due_date = pytz.UTC.localize(due_date)
-                        due_date_str = due_date.strftime("%Y-%m-%d %H:%M UTC")
-                    
-                    print(f"  - {quiz['title']} (Due: {due_date_str})")
+        for course_name in all_quizzes:
+            if course_name not in by_course:
+                continue
+            print(f"\n{course_name}:")
+            for quiz in by_course[course_name]:
+                due_date_str = quiz.due.strftime("%Y-%m-%d %H:%M UTC") if quiz.due else "No due date"
+                print(f"  - {quiz.title} (Due: {due_date_str})")
 
 def main():
     """Main function to run the program"""
+    parser = argparse.ArgumentParser(description="Collect Canvas course data")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Sync assignments, quizzes, announcements and modules against the local change-tracking state")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Path of the SQLite sync state file")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Also write compact JSON Lines (one record per line) next to each JSON file")
+    args = parser.parse_args()
+
     print("Starting Canvas Data Collection...")
     
     # Create single instance of CanvasManager
-    canvas_manager = CanvasManager()
+    canvas_manager = CanvasManager(workers=int(os.getenv("CANVAS_WORKERS", "8")), jsonl=args.jsonl)
+    
+    if args.incremental:
+        canvas_manager.sync_current_courses(args.state)
+        with open("AllAssignments.json") as f:
+            canvas_manager.display_future_assignments(json.load(f))
+        print_connection_stats()
+        return
     
     # Fetch assignments and quizzes using the manager
     assignments = canvas_manager.get_current_courses_assignments()
@@ -155,6 +259,13 @@ def main():
         #     canvas_manager.display_all_quizzes(quizzes)
     else:
         print("\nProgram encountered an error.")
+    print_connection_stats()
+
+def print_connection_stats():
+    """Print how many HTTP requests reused a pooled keep-alive connection"""
+    stats = connection_stats()
+    print(f"\nHTTP requests: {stats['requests']}, connections opened: {stats['connections_opened']}, "
+          f"reused: {stats['connections_reused']}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
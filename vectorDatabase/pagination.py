@@ -0,0 +1,54 @@
+"""
+Streaming, prefetching iteration over canvasapi PaginatedLists
+
+Iterating a PaginatedList fetches a page only once the previous one has been
+consumed, so every page costs a full round trip on the consumer's clock.
+`stream()` asks for the largest page size, and fetches the next page (from the
+Link header) in the background while the records of the current page are
+being processed.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, TypeVar
+import os
+
+T = TypeVar('T')
+
+# Largest page size Canvas honours on its list endpoints
+MAX_PER_PAGE = 100
+
+# Page fetches only ever run here, never tasks that submit more work, so the
+# pool cannot deadlock however many streams share it
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CANVAS_PREFETCH_WORKERS", "8")),
+    thread_name_prefix="canvas-prefetch",
+)
+
+def stream(paginated: Iterable[T], per_page: int = MAX_PER_PAGE) -> Iterator[T]:
+    """
+    Yield the records of a PaginatedList while the next page is being fetched
+
+    The list is consumed: pages are not kept in it, so iterate it only once.
+    Anything that is not a canvasapi PaginatedList is iterated as usual.
+
+    Args:
+        paginated: canvasapi PaginatedList (e.g. course.get_assignments())
+        per_page (int): Page size asked for on the first request
+
+    Yields:
+        The list's content objects, in Canvas order
+    """
+    if not hasattr(paginated, '_get_next_page'):
+        yield from paginated
+        return
+
+    if not paginated._elements and paginated._next_url == paginated._first_url:
+        paginated._next_params['per_page'] = per_page
+    yield from list(paginated._elements)
+
+    # Only one page is in flight at a time: each fetch reads the next URL
+    # the previous one left behind
+    future = _prefetch_pool.submit(paginated._get_next_page) if paginated._has_next() else None
+    while future is not None:
+        page = future.result()
+        future = _prefetch_pool.submit(paginated._get_next_page) if paginated._has_next() else None
+        yield from page
@@ -0,0 +1,225 @@
+import re
+
+# Bump whenever the output of clean_pdf_text changes, so cached cleaned text
+# produced by an older cleaner is not reused
+CLEANER_VERSION = 1
+
+# Step 1/2: literal unicode escapes and "\n" left in the text by JSON dumps.
+# Every longer key in the original map ('ös', 'ényi', 'ö\') starts
+# with a shorter key that is replaced first, so only the 6-character escapes
+# can ever match and one alternation is equivalent to the sequential replaces.
+_UNICODE_ESCAPES = {
+    '201c': '"', '201d': '"',
+    '00f6': 'ö', '00e9': 'é',
+    '00e1': 'á', '00a0': ' ',
+    '2019': "'", '2013': '-',
+    '2014': '—', '2026': '...',
+    '2022': '•', '00fb': 'û',
+    '00ff': 'ÿ', 'fb01': 'fi',
+    'fb02': 'fl', '25cf': '●',
+    '25cb': '○', '2713': '✓',
+    '03b2': 'β', '03b3': 'γ',
+    '221e': '∞',
+}
+_ESCAPE_RE = re.compile(r'\\u(' + '|'.join(_UNICODE_ESCAPES) + r')|\\n')
+
+# Step 3: null bytes and other control characters
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
+# Step 4: JSON artifacts; neither pattern can start inside a match of the other
+_JSON_ARTIFACT_RE = re.compile(r'("filename":\s*"[^"]+\.pdf",\s*"content":\s*")|",\s*"type":\s*"pdf"')
+
+# Each pass is (required substring(s) or None, compiled pattern, replacement).
+# A pass is skipped when its required substring is absent (for a tuple, when
+# all of them are), since the pattern cannot match without it. Patterns that
+# began with `.*` and end at `$` (or with a trailing `.*`) always match from
+# the start of a line, so they are anchored with `^` to avoid retrying every
+# position of every line.
+_M, _S = re.MULTILINE, re.DOTALL
+
+# Step 5: matrix-like structures and mathematical notation
+_MATH_PASSES = [
+    ('266664', re.compile(r'266664.*?377775', _S), ''),
+    ('edges', re.compile(r'\[A\^?n\]i,j.*?edges', _S), ''),
+    ('<latexit', re.compile(r'<latexit.*?</latexit>', _S), ''),
+    ('{', re.compile(r'\\\w+\{.*?\}'), ''),
+]
+
+# Step 6: common slide elements. The three standalone-line patterns only ever
+# remove whole lines, so they share one alternation.
+_SLIDE_PASSES = [
+    ('x', re.compile(r'\d+\s*x\s*\d+', _M), ''),
+    ('0.', re.compile(r'p\s*=\s*0\.\d+', _M), ''),
+    ('(', re.compile(r'\(\d+,\s*\d+\)', _M), ''),
+    ('.', re.compile(r'\b[0-9]+\.[0-9]+\b', _M), ''),
+    (None, re.compile(r'^\s*(?:\d{1,2}|[A-Z]\d|[a-zA-Z]{1,2})\s*$', _M), ''),
+    ('i,j', None, ''),
+    ('dI/dt', None, ''),
+    ('_', re.compile(r'[kK]_\w+', _M), ''),
+    ('A', re.compile(r'A\d+', _M), ''),
+]
+
+# Step 8: lines containing only a single repeated character
+_REPEATED_CHAR_RE = re.compile(r'^\s*(.)\1{3,}\s*$', _M)
+
+# Step 9: lines that likely represent code or formulas
+_CODE_PASSES = [
+    ('import', re.compile(r'^\s*import\s+\w+.*$', _M), ''),
+    ('random_nums', re.compile(r'^\s*random_nums\s*=.*$', _M), ''),
+    ('if', re.compile(r'^\s*if\s*\(.*\):.*$', _M), ''),
+    ('[[', re.compile(r'^.*=\s*\[\[.*\]\].*$', _M), ''),
+    ('.add_', re.compile(r'^.*\.add_\w+\(.*\).*$', _M), ''),
+    ('nx.', re.compile(r'^\s*g\s*=\s*nx\..*$', _M), ''),
+    ('range', re.compile(r'for\s+i\s+in\s+range.*$', _M), ''),
+    (('pyplot.', '.decode(', 'zip_ref.'), re.compile(r'^.*(?:pyplot\.|\.decode\(.*\)|zip_ref\.).*$', _M), ''),
+    ('Nt+1', re.compile(r'Nt\+1\s*=\s*Nt.*', _M), ''),
+    ('ddt=', re.compile(r'ddt=.*', _M), ''),
+]
+# Function calls: this one can end mid-line, so it cannot simply be anchored
+_CALL_ANCHORED_RE = re.compile(r'^.*=.*\(\s*.*\)', _M)
+_CALL_RE = re.compile(r'.*=.*\(\s*.*\)', _M)
+_ASSIGNMENT_RE = re.compile(r'^.*\[.*\].*=.*', _M)
+
+_SPACES_RE = re.compile(r'\s{2,}')
+_IN_CLASS_RE = re.compile(r'In Class Points[!]?')
+_URL_RE = re.compile(r'https?://\S+')
+
+_SHORT_WORDS = frozenset(['the', 'and', 'but', 'or', 'a', 'an'])
+_DIGITS = b'0123456789'
+
+
+def _apply(passes, content):
+    for required, pattern, replacement in passes:
+        if isinstance(required, tuple):
+            if not any(r in content for r in required):
+                continue
+        elif required is not None and required not in content:
+            continue
+        if pattern is None:
+            content = content.replace(required, replacement)
+        else:
+            content = pattern.sub(replacement, content)
+    return content
+
+
+def _remove_calls(content):
+    """
+    Same result as re.sub(r'.*=.*\\(\\s*.*\\)', '', content, flags=re.M)
+
+    From a line start the leftmost match always begins at the line start, so
+    the anchored pattern finds it without trying every column. Only after a
+    match that ended mid-line are the remaining columns of that line tried.
+    """
+    out, pos, n = [], 0, len(content)
+    while pos <= n:
+        match = None
+        if pos > 0 and content[pos - 1] != '\n':
+            eol = content.find('\n', pos)
+            eol = n if eol == -1 else eol
+            for start in range(pos, eol):
+                match = _CALL_RE.match(content, start)
+                if match:
+                    break
+            else:
+                match = _CALL_ANCHORED_RE.search(content, eol)
+        else:
+            match = _CALL_ANCHORED_RE.search(content, pos)
+        if match is None:
+            break
+        out.append(content[pos:match.start()])
+        pos = match.end()
+    out.append(content[pos:])
+    return ''.join(out)
+
+
+def _filter_lines(content):
+    """Step 10: drop empty, numeric, label-like and consecutively repeated lines"""
+    filtered_lines = []
+    prev_line = ""
+    for line in content.split('\n'):
+        line = line.strip()
+        length = len(line)
+
+        # Skip empty lines or too short lines
+        if length < 2:
+            continue
+
+        # Skip lines with too many numbers. Lines of only digits and lines like
+        # "A2" are covered by this check and the short-line check below.
+        if line.isascii():
+            digits = length - len(line.encode('ascii').translate(None, _DIGITS))
+        else:
+            digits = sum(c.isdigit() for c in line)
+        if digits > length * 0.5:
+            continue
+
+        # Skip very short lines that are likely labels
+        if length <= 3 and line.lower() not in _SHORT_WORDS:
+            continue
+
+        # Avoid duplicating the same line that appears consecutively
+        if line == prev_line:
+            continue
+
+        filtered_lines.append(line)
+        prev_line = line
+    return filtered_lines
+
+
+def clean_pdf_text(content):
+    """
+    Enhanced PDF text cleanup with additional processing steps for academic slides
+
+    Args:
+        content (str): Raw text content from PDF
+
+    Returns:
+        str: Cleaned, readable text content
+    """
+    # Step 1/2: unicode escapes and literal newlines
+    if '\\' in content:
+        content = _ESCAPE_RE.sub(
+            lambda m: _UNICODE_ESCAPES[m.group(1)] if m.group(1) else '\n', content
+        )
+
+    # Step 3: null bytes and other control characters
+    content = content.translate(_CONTROL_CHARS)
+
+    # Step 4: JSON artifacts
+    if '"' in content:
+        content = _JSON_ARTIFACT_RE.sub(
+            lambda m: '\n\n--- NEW SLIDE SET: ' if m.group(1) else '', content
+        )
+
+    # Step 5/6: mathematical notation and slide elements
+    content = _apply(_MATH_PASSES, content)
+    content = _apply(_SLIDE_PASSES, content)
+
+    # Step 7: slide headers and footers
+    content = content.replace('Memes, Measles, and Misinformation', 'COURSE: Memes, Measles, and Misinformation')
+
+    # Step 8: lines containing only a single type of character
+    content = _REPEATED_CHAR_RE.sub('', content)
+
+    # Step 9: code and formulas
+    content = _apply(_CODE_PASSES, content)
+    if '=' in content:
+        if '(' in content:
+            content = _remove_calls(content)
+        if '[' in content:
+            content = _ASSIGNMENT_RE.sub('', content)
+
+    # Step 10-12: filter lines, join and fix spacing. Joined lines are non-empty,
+    # so there are never three consecutive newlines to collapse.
+    content = _SPACES_RE.sub(' ', '\n'.join(_filter_lines(content)))
+
+    # Step 13: academic-specific patterns
+    content = content.replace('•', '- ').replace('–', '-')
+
+    # Step 14: remaining specific patterns, URLs on their own lines
+    if 'In Class Points' in content:
+        content = _IN_CLASS_RE.sub('\n[In-Class Activity]', content)
+    if 'http' in content:
+        content = _URL_RE.sub('\n\\g<0>\n', content)
+
+    return content.strip()
@@ -0,0 +1,105 @@
+"""
+PDF text extraction with a persistent cache keyed by file content
+
+Results are stored under the SHA-256 of the PDF bytes plus the extractor and
+cleaner versions and the size limits. The same lecture PDF reached through the
+export zip and through module downloads, in this run or a later one, is parsed
+only once. Bumping EXTRACTOR_VERSION or pdfCleaner.CLEANER_VERSION, or changing
+PDF_MAX_PAGES / PDF_MAX_BYTES, invalidates old entries.
+
+Pages are cleaned as they are read and only the cleaned text is kept; the
+document text is the cleaned pages joined (see pdf_text).
+"""
+from typing import Dict, Iterator, Optional, Tuple
+import hashlib
+import io
+import json
+import os
+import PyPDF2
+from courseCache import DiskCache, DEFAULT_CACHE_DIR
+from pdfCleaner import clean_pdf_text, CLEANER_VERSION
+
+# Bump whenever the text or layout of an extraction result changes
+EXTRACTOR_VERSION = 3
+
+# Guards against pathological PDFs
+MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "2000"))
+MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(200 * 1024 ** 2)))
+
+extraction_cache = DiskCache(
+    os.path.join(DEFAULT_CACHE_DIR, "extracted"),
+    max_bytes=int(os.getenv("PDF_TEXT_CACHE_MAX_BYTES", str(512 * 1024 ** 2))),
+)
+
+def extraction_key(digest: str) -> str:
+    # A result truncated by the limits must not outlive them
+    return (f"pdf:{digest}:extractor-{EXTRACTOR_VERSION}:cleaner-{CLEANER_VERSION}"
+            f":pages-{MAX_PAGES}:bytes-{MAX_BYTES}")
+
+def iter_pdf_pages(data: bytes, max_pages: Optional[int] = MAX_PAGES,
+                   max_bytes: Optional[int] = MAX_BYTES) -> Iterator[Tuple[int, str]]:
+    """
+    Yield the raw text of a PDF one page at a time
+
+    Args:
+        data (bytes): PDF file content
+        max_pages (int): Stop after this many pages, None for no limit
+        max_bytes (int): Skip PDFs larger than this, None for no limit
+
+    Yields:
+        (page_number, text) with 1-based page numbers
+    """
+    if max_bytes is not None and len(data) > max_bytes:
+        print(f"Skipping PDF of {len(data)} bytes (limit {max_bytes})")
+        return
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    for index, page in enumerate(pdf_reader.pages):
+        if max_pages is not None and index >= max_pages:
+            print(f"Stopping after {max_pages} of {len(pdf_reader.pages)} pages")
+            return
+        yield index + 1, page.extract_text() or ""
+
+def _extract(data: bytes) -> Dict:
+    # Each page's raw text is dropped as soon as it is cleaned
+    return {'pages': [{'page': number, 'cleaned': clean_pdf_text(raw)} for number, raw in iter_pdf_pages(data)]}
+
+def extract_pdf(data: bytes) -> Dict:
+    """
+    Cleaned text of a PDF page by page, from the cache when this exact file was seen before
+
+    Args:
+        data (bytes): PDF file content
+
+    Returns:
+        Dict: {'sha256', 'pages': [{'page', 'cleaned'}]}
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    key = extraction_key(digest)
+    try:
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            result = json.loads(cached)
+            result['sha256'] = digest
+            return result
+    except Exception as e:
+        print(f"Error reading extraction cache: {str(e)}")
+
+    result = _extract(data)
+    try:
+        extraction_cache.put(key, json.dumps(result).encode('utf-8'))
+    except Exception as e:
+        print(f"Error saving to extraction cache: {str(e)}")
+    result['sha256'] = digest
+    return result
+
+def pdf_text(extraction: Dict) -> str:
+    """Cleaned text of a whole document: the non-empty cleaned pages of an extract_pdf result, one per line"""
+    return "\n".join(page['cleaned'] for page in extraction['pages'] if page['cleaned'])
+
+def extract_pdf_text(data: bytes) -> str:
+    """Cleaned text of a PDF"""
+    return pdf_text(extract_pdf(data))
+
+def cleaned_pages(extraction: Dict):
+    """[{'page', 'content'}] of an extract_pdf result, for citing content by page"""
+    return [{'page': page['page'], 'content': page['cleaned']} for page in extraction['pages']]
@@ -0,0 +1,437 @@
+import json
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Row count above which `search(mode="auto")` uses the IVF index when present
+ANN_THRESHOLD = 50000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def strip_html(html: Optional[str]) -> str:
+    """Reduce Canvas HTML (pages, announcements) to plain text"""
+    if not html:
+        return ""
+    text = _TAG_RE.sub(" ", html)
+    text = text.replace("&nbsp;", " ").replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">")
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
+    """
+    Split text into chunks of at most `max_chars`, preferring paragraph breaks
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Maximum characters per chunk
+        overlap (int): Characters carried over between chunks of a long paragraph
+
+    Returns:
+        List[str]: Non-empty chunks
+    """
+    chunks, current = [], ""
+    for paragraph in _PARAGRAPH_RE.split(text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(current) + len(paragraph) + 2 <= max_chars:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        # Paragraphs longer than a chunk are windowed with overlap
+        step = max_chars - overlap
+        while len(paragraph) > max_chars:
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[step:]
+        current = paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class HashingEmbedder:
+    """
+    Offline embedder: signed feature hashing of word unigrams and bigrams with
+    sublinear term frequency. Needs no model or network, so it is the default
+    for tests and for machines without a Gemini key.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def config(self) -> Dict:
+        return {"name": self.name, "dim": self.dim}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features)
+            )
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], hashes % self.dim, signs)
+        out = np.sign(out) * np.log1p(np.abs(out))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+class GeminiEmbedder:
+    """Embeds text with the Gemini embedding API (requires GEMINI_API_KEY)"""
+    name = "gemini"
+
+    def __init__(self, model: str = "text-embedding-004", dim: int = 768, batch_size: int = 100):
+        from google import genai
+
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+    def config(self) -> Dict:
+        return {"name": self.name, "dim": self.dim, "model": self.model}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            result = self.client.models.embed_content(
+                model=self.model, contents=texts[start:start + self.batch_size]
+            )
+            vectors.extend(e.values for e in result.embeddings)
+        out = np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder, "gemini": GeminiEmbedder}
+
+
+def make_embedder(config: Dict):
+    """Instantiate an embedder from the config stored in a store's meta.json"""
+    options = {k: v for k, v in config.items() if k != "name"}
+    return EMBEDDERS[config["name"]](**options)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(scores, -k)[-k:]
+    return idx[np.argsort(scores[idx])[::-1]]
+
+
+class VectorStore:
+    """
+    Persistent local vector store
+
+    Layout of `path`:
+        meta.json      embedder config, dimension and row count
+        vectors.f32    row-major float32 matrix (memory-mapped for search)
+        chunks.jsonl   one metadata record per row
+        ivf_*.npy      optional IVF index for approximate search
+
+    Vectors are L2-normalized, so the dot product is the cosine similarity.
+    """
+
+    def __init__(self, path: str, embedder=None):
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._meta_file = os.path.join(self.path, "meta.json")
+        self._vectors_file = os.path.join(self.path, "vectors.f32")
+        self._chunks_file = os.path.join(self.path, "chunks.jsonl")
+
+        if os.path.exists(self._meta_file):
+            with open(self._meta_file, "r") as f:
+                self.meta = json.load(f)
+            if embedder is not None and embedder.config() != self.meta["embedder"]:
+                raise ValueError(f"Store at {self.path} was built with {self.meta['embedder']}")
+            self.embedder = embedder or make_embedder(self.meta["embedder"])
+        else:
+            self.embedder = embedder or HashingEmbedder()
+            self.meta = {"embedder": self.embedder.config(), "dim": self.embedder.dim, "count": 0}
+            self._write_meta()
+
+        self._matrix = None
+        self._chunks = None
+        self._ivf = None
+        self._filters = {}
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _write_meta(self):
+        tmp = f"{self._meta_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, self._meta_file)
+
+    def _invalidate(self):
+        self._matrix = None
+        self._chunks = None
+        self._ivf = None
+        self._filters = {}
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped (count, dim) matrix of stored vectors"""
+        if self._matrix is None:
+            if self.meta["count"] == 0:
+                return np.empty((0, self.meta["dim"]), dtype=np.float32)
+            self._matrix = np.memmap(
+                self._vectors_file, dtype=np.float32, mode="r",
+                shape=(self.meta["count"], self.meta["dim"]),
+            )
+        return self._matrix
+
+    @property
+    def chunks(self) -> List[Dict]:
+        if self._chunks is None:
+            self._chunks = []
+            if os.path.exists(self._chunks_file):
+                with open(self._chunks_file, "r") as f:
+                    self._chunks = [json.loads(line) for line in f]
+        return self._chunks
+
+    def add(self, records: List[Dict], batch_size: int = 256) -> int:
+        """
+        Embed and append records
+
+        Args:
+            records (List[Dict]): Chunk records, each with a 'text' key plus
+                any metadata (course_id, source, title, ...)
+
+        Returns:
+            int: Number of rows added
+        """
+        added = 0
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            vectors = self.embedder.embed([r["text"] for r in batch]).astype(np.float32)
+            with open(self._vectors_file, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._chunks_file, "a") as f:
+                for record in batch:
+                    f.write(json.dumps(record) + "\n")
+            added += len(batch)
+        self.meta["count"] += added
+        self.meta.pop("ivf_count", None)
+        self._write_meta()
+        self._invalidate()
+        return added
+
+    def delete_where(self, **match) -> int:
+        """Remove every row whose metadata matches all `match` items, rewriting the store"""
+        keep = [i for i, c in enumerate(self.chunks) if any(c.get(k) != v for k, v in match.items())]
+        removed = len(self) - len(keep)
+        if not removed:
+            return 0
+
+        kept_vectors = np.asarray(self.matrix[keep]) if keep else np.empty((0, self.meta["dim"]), np.float32)
+        kept_chunks = [self.chunks[i] for i in keep]
+        self._matrix = None
+        with open(f"{self._vectors_file}.tmp", "wb") as f:
+            f.write(kept_vectors.astype(np.float32).tobytes())
+        with open(f"{self._chunks_file}.tmp", "w") as f:
+            for record in kept_chunks:
+                f.write(json.dumps(record) + "\n")
+        os.replace(f"{self._vectors_file}.tmp", self._vectors_file)
+        os.replace(f"{self._chunks_file}.tmp", self._chunks_file)
+
+        self.meta["count"] = len(keep)
+        self.meta.pop("ivf_count", None)
+        self._write_meta()
+        self._invalidate()
+        return removed
+
+    def build_ann(self, n_lists: Optional[int] = None, iterations: int = 8, seed: int = 0):
+        """
+        Build an IVF (inverted file) index: spherical k-means centroids plus
+        the rows of each centroid's cell stored contiguously
+
+        Args:
+            n_lists (int): Number of cells, defaults to sqrt(count)
+            iterations (int): k-means iterations over a training sample
+        """
+        matrix = self.matrix
+        n = len(matrix)
+        if n == 0:
+            return
+        n_lists = min(n, n_lists or max(1, int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(n, min(n, n_lists * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = np.bincount(assign, minlength=n_lists) > 0
+            centroids[filled] = sums[filled]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms == 0, 1, norms)
+
+        lists = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            lists[start:start + 65536] = np.argmax(matrix[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(lists, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(lists[order], np.arange(n_lists + 1))
+
+        np.save(os.path.join(self.path, "ivf_centroids.npy"), centroids)
+        np.save(os.path.join(self.path, "ivf_order.npy"), order)
+        np.save(os.path.join(self.path, "ivf_offsets.npy"), offsets)
+        self.meta["ivf_count"] = n
+        self._write_meta()
+        self._ivf = None
+
+    def _load_ivf(self):
+        if self._ivf is None and self.meta.get("ivf_count") == self.meta["count"]:
+            self._ivf = tuple(
+                np.load(os.path.join(self.path, f"ivf_{name}.npy"), mmap_mode="r")
+                for name in ("centroids", "order", "offsets")
+            )
+        return self._ivf
+
+    def _matching_rows(self, match: Dict) -> np.ndarray:
+        """Sorted indices of the rows whose metadata matches all `match` items (cached per filter)"""
+        key = tuple(sorted((k, json.dumps(v, sort_keys=True)) for k, v in match.items()))
+        rows = self._filters.get(key)
+        if rows is None:
+            rows = np.fromiter(
+                (i for i, c in enumerate(self.chunks) if all(c.get(k) == v for k, v in match.items())),
+                dtype=np.int64,
+            )
+            self._filters[key] = rows
+        return rows
+
+    def search(self, query: str, k: int = 5, mode: str = "auto", nprobe: int = 8, **match) -> List[Dict]:
+        """
+        Find the chunks most similar to `query`
+
+        Args:
+            query (str): Natural language query
+            k (int): Number of results
+            mode (str): "exact", "ann", or "auto" (ANN only for large stores
+                with an up-to-date IVF index)
+            nprobe (int): IVF cells scanned in ANN mode
+            **match: Metadata filters, e.g. course_id=123
+
+        Returns:
+            List[Dict]: Chunk records with an added 'score', best first
+        """
+        if len(self) == 0:
+            return []
+        # Filters pick the candidate rows before ranking, so rows of other
+        # courses can never crowd the matching ones out of the top k
+        allowed = self._matching_rows(match) if match else None
+        if allowed is not None and len(allowed) == 0:
+            return []
+        q = self.embedder.embed([query])[0]
+        ivf = self._load_ivf() if mode in ("auto", "ann") else None
+        candidates = len(self) if allowed is None else len(allowed)
+        use_ann = ivf is not None and (mode == "ann" or candidates >= ANN_THRESHOLD)
+
+        if use_ann:
+            centroids, order, offsets = ivf
+            cells = _top_k(np.asarray(centroids) @ q, nprobe)
+            rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in cells]))
+            if allowed is not None:
+                rows = rows[np.isin(rows, allowed, assume_unique=True)]
+                # The probed cells hold too few matching rows: rank all of them instead
+                if len(rows) < min(k, len(allowed)):
+                    rows = allowed
+            scores = np.asarray(self.matrix[rows]) @ q
+        elif allowed is not None:
+            rows = allowed
+            scores = np.asarray(self.matrix[rows]) @ q
+        else:
+            rows = None
+            scores = self.matrix @ q
+
+        top = _top_k(scores, k)
+        best = rows[top] if rows is not None else top
+        return [{**self.chunks[row], "score": float(score)} for row, score in zip(best, scores[top])]
+
+
+def iter_course_records(course_id: int, course_content: Dict) -> Iterable[Dict]:
+    """
+    Turn `get_all_course_content` output into chunk records
+
+    Args:
+        course_id (int): The course the content belongs to
+        course_content (Dict): Output of getCourseInfo.get_all_course_content
+
+    Yields:
+        Dict: Records with text, course_id, source and title (plus page for PDFs)
+    """
+    for item in course_content.get("syllabus") or []:
+        if item.get("pages"):
+            # PDFs are chunked page by page so results can cite the page
+            for page in item["pages"]:
+                for chunk in chunk_text(page["content"]):
+                    yield {"course_id": course_id, "source": "file", "title": item["filename"],
+                           "page": page["page"], "text": chunk}
+            continue
+        for chunk in chunk_text(strip_html(item["content"]) if item["type"] == "text" else item["content"]):
+            yield {"course_id": course_id, "source": "file", "title": item["filename"], "text": chunk}
+
+    for announcement in course_content.get("announcements") or []:
+        text = strip_html(announcement.get("message"))
+        for chunk in chunk_text(text):
+            yield {"course_id": course_id, "source": "announcement", "title": announcement.get("title"),
+                   "posted_at": announcement.get("posted_at"), "text": chunk}
+
+    for module in course_content.get("modules") or []:
+        for item in module.get("items", []):
+            if not item.get("content"):
+                continue
+            if item.get("pages"):
+                for page in item["pages"]:
+                    for chunk in chunk_text(page["content"]):
+                        yield {"course_id": course_id, "source": "module", "module": module["name"],
+                               "title": item["title"], "url": item.get("html_url"),
+                               "page": page["page"], "text": chunk}
+                continue
+            text = strip_html(item["content"]) if item["type"] == "Page" else item["content"]
+            for chunk in chunk_text(text):
+                yield {"course_id": course_id, "source": "module", "module": module["name"],
+                       "title": item["title"], "url": item.get("html_url"), "text": chunk}
+
+
+def index_course_content(store: VectorStore, course_id: int, course_content: Dict) -> int:
+    """Replace everything indexed for `course_id` with freshly chunked content"""
+    store.delete_where(course_id=course_id)
+    added = store.add(list(iter_course_records(course_id, course_content)))
+    print(f"Indexed {added} chunks for course {course_id}")
+    return added
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+
+    # Index the output of getCourseInfo.py: python vectorStore.py course_content.json <course_id>
+    content_file = sys.argv[1] if len(sys.argv) > 1 else "course_content.json"
+    course_id = int(sys.argv[2]) if len(sys.argv) > 2 else 17700000000720596
+    store = VectorStore(os.getenv("VECTOR_STORE_DIR", "index"))
+
+    with open(content_file, "r") as f:
+        index_course_content(store, course_id, json.load(f))
+    if len(store) >= ANN_THRESHOLD:
+        store.build_ann()
+
+    for result in store.search("when is the midterm", k=3):
+        print(f"{result['score']:.3f} {result['title']}: {result['text'][:80]}")